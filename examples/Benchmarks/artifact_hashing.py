@@ -0,0 +1,97 @@
+"""Compare the cost of preparing a large file artifact for upload.
+
+A file of random data is created, then prepared for upload as previously,
+copying the file for a snapshot, reading it again to calculate its
+checksum and reading it into memory to construct the upload request, and
+as now, with the snapshot and checksum created within a single read of the
+file and the upload request streaming the file. The time taken for each
+stage and the peak memory allocated constructing the upload request are
+shown.
+"""
+
+import hashlib
+import io
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import click
+import requests
+
+from simvue.api.objects.artifact.base import _FormDataStream
+from simvue.utilities import calculate_file_sha256
+
+_FIELDS: dict[str, str] = {"key": "artifacts/benchmark.bin", "policy": "policy"}
+
+
+def _previous(file_path: pathlib.Path, snapshot: pathlib.Path | None) -> None:
+    _start = time.perf_counter()
+    if snapshot:
+        shutil.copy(file_path, snapshot)
+        file_path = snapshot
+    _sha256 = hashlib.sha256()
+    with file_path.open("rb") as in_f:
+        for block in iter(lambda: in_f.read(4096), b""):
+            _sha256.update(block)
+    _checksum_time = time.perf_counter() - _start
+
+    tracemalloc.start()
+    _start = time.perf_counter()
+    with file_path.open("rb") as in_f:
+        _request = requests.Request(
+            "POST", "http://localhost", data=_FIELDS, files={"file": in_f}
+        ).prepare()
+        _body = io.BytesIO(_request.body)
+        while _body.read(1024 * 1024):
+            pass
+        del _request, _body
+    _upload_time = time.perf_counter() - _start
+    _, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    _report("previous", _checksum_time, _upload_time, _peak)
+
+
+def _current(file_path: pathlib.Path, snapshot: pathlib.Path | None) -> None:
+    _start = time.perf_counter()
+    calculate_file_sha256(file_path, copy_to=snapshot)
+    _checksum_time = time.perf_counter() - _start
+
+    tracemalloc.start()
+    _start = time.perf_counter()
+    with (snapshot or file_path).open("rb") as in_f:
+        for _ in _FormDataStream(_FIELDS, "file", in_f):
+            pass
+    _upload_time = time.perf_counter() - _start
+    _, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    _report("current", _checksum_time, _upload_time, _peak)
+
+
+def _report(label: str, checksum_time: float, upload_time: float, peak: int) -> None:
+    click.echo(
+        f"{label:>9}: checksum {checksum_time:6.2f}s, "
+        f"upload body {upload_time:6.2f}s, peak memory {peak / 1024**2:8.1f} MiB"
+    )
+
+
+@click.command
+@click.option("--size", type=float, default=1.0, help="File size in GiB")
+@click.option("--snapshot/--no-snapshot", default=True, help="Snapshot the file")
+def benchmark_artifact_hashing(size: float, snapshot: bool) -> None:
+    with tempfile.TemporaryDirectory() as temp_d:
+        _file_path = pathlib.Path(temp_d).joinpath("benchmark.bin")
+        with _file_path.open("wb") as out_f:
+            for _ in range(int(size * 1024)):
+                out_f.write(os.urandom(1024 * 1024))
+
+        for method in (_current, _previous):
+            _snapshot = pathlib.Path(temp_d).joinpath("snapshot.bin")
+            method(_file_path, _snapshot if snapshot else None)
+            _snapshot.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    benchmark_artifact_hashing()
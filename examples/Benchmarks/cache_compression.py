@@ -0,0 +1,78 @@
+"""Compare the disk footprint and CPU cost of compressing the offline cache.
+
+Metrics are written to segment files in the same way as an offline run,
+one record for each batch drained from the dispatch queue, using each of
+the available codecs. The time taken to write and to read back the
+records is shown alongside the size of the cache on disk.
+"""
+
+import importlib.util
+import pathlib
+import tempfile
+import time
+
+import click
+import numpy
+
+from simvue.cache import SegmentReader, SegmentWriter, segment_files
+from simvue.dispatch.columnar import ColumnarMetricQueue
+
+
+@click.command
+@click.option("--steps", type=int, default=100000, help="Number of steps")
+@click.option("--metrics", type=int, default=10, help="Number of metrics per step")
+@click.option("--batch", type=int, default=1000, help="Number of steps per record")
+@click.option("--level", type=int, default=None, help="Compression level")
+def benchmark_cache_compression(
+    steps: int, metrics: int, batch: int, level: int | None
+) -> None:
+    _records: list[dict] = []
+    for start in range(0, steps, batch):
+        _steps = numpy.arange(start, min(start + batch, steps))
+        _queue = ColumnarMetricQueue(capacity=len(_steps) * metrics)
+        _queue.extend(
+            {f"metric_{i}": numpy.random.random(len(_steps)) for i in range(metrics)},
+            step=_steps,
+            time=_steps * 0.1,
+            timestamp=numpy.full(len(_steps), time.time()),
+        )
+        _records.append({"metrics": _queue.drain().to_metric_sets()})
+
+    for codec in ("none", "gzip", "zstd"):
+        if codec == "zstd" and not importlib.util.find_spec("zstandard"):
+            click.echo(f"{codec:>5}: skipped, requires the 'zstandard' package")
+            continue
+
+        with tempfile.TemporaryDirectory() as temp_d:
+            _writer = SegmentWriter(
+                directory=pathlib.Path(temp_d),
+                run="offline_run",
+                object_type="metrics",
+                max_segment_size=16 * 1024 * 1024,
+                fsync="never",
+                codec=codec,
+                level=level,
+            )
+            _start = time.perf_counter()
+            for record in _records:
+                _writer.append(record)
+            _writer.close()
+            _write_time = time.perf_counter() - _start
+
+            _segments = segment_files(pathlib.Path(temp_d), "metrics")["offline_run"]
+            _size = sum(segment.stat().st_size for segment in _segments)
+
+            _start = time.perf_counter()
+            for segment in _segments:
+                for _ in SegmentReader(segment).records():
+                    pass
+            _read_time = time.perf_counter() - _start
+
+        click.echo(
+            f"{codec:>5}: {_size / 1024**2:8.2f} MiB, "
+            f"write {_write_time:6.2f}s, read {_read_time:6.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_cache_compression()
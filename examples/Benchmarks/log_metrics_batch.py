@@ -0,0 +1,52 @@
+"""Compare the per-point cost of `Run.log_metrics` and `Run.log_metrics_batch`.
+
+Metrics are recorded in offline mode so that only the client side cost of
+validation and queueing is measured.
+"""
+
+import tempfile
+import time
+import os
+
+import click
+import numpy
+
+from simvue import Run
+
+
+def _time_logging(n_steps: int, n_metrics: int, batch: bool) -> float:
+    _values: dict[str, numpy.ndarray] = {
+        f"metric_{i}": numpy.random.random(n_steps) for i in range(n_metrics)
+    }
+    with Run(mode="offline") as run:
+        run.init(folder="/simvue_client_demos", name="log-metrics-benchmark")
+        _start = time.perf_counter()
+        if batch:
+            run.log_metrics_batch(_values, times=numpy.arange(n_steps, dtype=float))
+        else:
+            for step in range(n_steps):
+                run.log_metrics(
+                    {name: values[step] for name, values in _values.items()},
+                    time=float(step),
+                )
+        return time.perf_counter() - _start
+
+
+@click.command
+@click.option("--steps", type=int, default=10000, help="Number of steps to record")
+@click.option("--metrics", type=int, default=5, help="Number of metrics per step")
+def benchmark_log_metrics_batch(steps: int, metrics: int) -> None:
+    with tempfile.TemporaryDirectory() as cache:
+        os.environ["SIMVUE_OFFLINE_DIRECTORY"] = cache
+        _n_points = steps * metrics
+
+        for label, batch in (("log_metrics", False), ("log_metrics_batch", True)):
+            _duration = _time_logging(steps, metrics, batch)
+            click.echo(
+                f"{label:>18}: {_duration:8.3f}s total, "
+                f"{1e6 * _duration / _n_points:8.3f}us per point"
+            )
+
+
+if __name__ == "__main__":
+    benchmark_log_metrics_batch()
@@ -0,0 +1,72 @@
+"""Compare encoding of scalar metrics for upload to the server.
+
+The previous path validates every metric set as a pydantic model before
+dumping it and serialising the request body, the batch path serialises
+the columnar dispatch buffer directly. The size of the equivalent JSON
+body is shown for reference.
+"""
+
+import json
+import time
+
+import click
+import msgpack
+import numpy
+
+from simvue.dispatch.columnar import ColumnarMetricQueue, MetricBatch
+from simvue.models import MetricSet
+
+
+def _encode_models(batch: MetricBatch) -> bytes:
+    _metric_sets = [MetricSet(**metric_set) for metric_set in batch.to_metric_sets()]
+    return msgpack.packb(
+        {
+            "run": "run",
+            "metrics": [metric_set.model_dump() for metric_set in _metric_sets],
+        },
+        use_bin_type=True,
+    )
+
+
+def _encode_batch(batch: MetricBatch) -> bytes:
+    return msgpack.packb(
+        {"run": "run", "metrics": batch.to_metric_sets()}, use_bin_type=True
+    )
+
+
+def _encode_json(batch: MetricBatch) -> bytes:
+    return json.dumps({"run": "run", "metrics": batch.to_metric_sets()}).encode()
+
+
+@click.command
+@click.option("--steps", type=int, default=16000, help="Number of steps per upload")
+@click.option("--metrics", type=int, default=4, help="Number of metrics per step")
+@click.option("--repeats", type=int, default=5, help="Number of repeat encodings")
+def benchmark_metrics_encoding(steps: int, metrics: int, repeats: int) -> None:
+    _queue = ColumnarMetricQueue(capacity=steps * metrics)
+    _queue.extend(
+        {f"metric_{i}": numpy.random.random(steps) for i in range(metrics)},
+        step=numpy.arange(steps),
+        time=numpy.linspace(0, steps, steps),
+        timestamp=numpy.full(steps, time.time()),
+    )
+    _batch = _queue.drain()
+
+    for label, encoder in (
+        ("pydantic + msgpack", _encode_models),
+        ("batch + msgpack", _encode_batch),
+        ("batch + json", _encode_json),
+    ):
+        _start = time.perf_counter()
+        for _ in range(repeats):
+            _body = encoder(_batch)
+        _duration = (time.perf_counter() - _start) / repeats
+        click.echo(
+            f"{label:>18}: {len(_body) / 1024:10.1f} KiB, "
+            f"{1e3 * _duration:8.2f}ms per upload, "
+            f"{1e6 * _duration / steps:6.2f}us per step"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_metrics_encoding()
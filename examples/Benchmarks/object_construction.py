@@ -0,0 +1,72 @@
+"""Compare the cost of constructing Simvue objects with and without caching.
+
+Every Simvue object fetches the configuration when constructed, the run
+dispatch callback constructing a Metrics or Events object for each upload.
+The uncached case clears the configuration cache before each construction,
+so the configuration files are located, read and validated each time.
+"""
+
+import datetime
+import time
+
+import click
+
+from simvue.api.objects import Events, Metrics
+from simvue.config.user import SimvueConfiguration
+from simvue.models import DATETIME_FORMAT
+
+
+def _fetch() -> None:
+    SimvueConfiguration.fetch(mode="offline")
+
+
+def _metrics() -> None:
+    Metrics.new(run="benchmark", metrics=[], offline=True)
+
+
+def _events() -> None:
+    Events.new(
+        run="benchmark",
+        events=[
+            {
+                "message": "benchmark",
+                "timestamp": datetime.datetime.now().strftime(DATETIME_FORMAT),
+            }
+        ],
+        offline=True,
+    )
+
+
+@click.command
+@click.option("--repeats", type=int, default=1000, help="Number of constructions")
+def benchmark_object_construction(repeats: int) -> None:
+    for label, construct in (
+        ("SimvueConfiguration.fetch", _fetch),
+        ("Metrics.new", _metrics),
+        ("Events.new", _events),
+    ):
+        _durations: dict[str, float] = {}
+
+        for cached in (False, True):
+            SimvueConfiguration.clear_cache()
+            construct()
+            _start = time.perf_counter()
+            for _ in range(repeats):
+                if not cached:
+                    SimvueConfiguration.clear_cache()
+                construct()
+            _durations["cached" if cached else "uncached"] = (
+                time.perf_counter() - _start
+            ) / repeats
+
+        click.echo(
+            f"{label:>26}: "
+            + ", ".join(
+                f"{key} {1e6 * value:8.1f}us" for key, value in _durations.items()
+            )
+            + f", speedup {_durations['uncached'] / _durations['cached']:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_object_construction()
@@ -0,0 +1,127 @@
+"""Compare uploading a backlog of cached metrics one file at a time and batched.
+
+A local HTTP server stands in for the Simvue server, each request being
+delayed to approximate the round trip time to a remote server. The cache
+is populated with one JSON file per metrics upload, as written by offline
+runs and objects, spread across a number of runs.
+"""
+
+import base64
+import http.server
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import uuid
+
+import click
+
+from simvue.cache import CacheManifest
+from simvue.config.user import SimvueConfiguration
+from simvue.sender import Sender
+from simvue.sender.actions import MetricsUploadAction
+
+
+def _mock_token() -> str:
+    def _encode(content: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(content).encode()).decode()
+
+    _expiry = int(time.time()) + 24 * 60 * 60
+    return f"{_encode({'alg': 'HS256', 'typ': 'JWT'})}.{_encode({'exp': _expiry})}.sig"
+
+
+def _mock_server(latency: float) -> http.server.ThreadingHTTPServer:
+    class _Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        requests: int = 0
+
+        def _respond(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(latency)
+            _Handler.requests += 1
+            _body = json.dumps(
+                {"version": "1.5.0"} if self.path.endswith("/version") else {}
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", f"{len(_body)}")
+            self.end_headers()
+            self.wfile.write(_body)
+
+        do_GET = do_POST = do_PUT = _respond
+
+        def log_message(self, *_) -> None:
+            pass
+
+    _server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def _populate_cache(cache: pathlib.Path, files: int, runs: int, steps: int) -> None:
+    cache.joinpath("metrics").mkdir(parents=True, exist_ok=True)
+    _manifest = CacheManifest.open(cache)
+    for i in range(files):
+        _identifier = f"offline_{uuid.uuid1()}"
+        cache.joinpath("metrics", f"{_identifier}.json").write_text(
+            json.dumps(
+                {
+                    "obj_type": "Metrics",
+                    "run": f"offline_run_{i % runs}",
+                    "metrics": [
+                        {
+                            "time": float(step),
+                            "timestamp": "2025-01-01T00:00:00.000000",
+                            "step": i * steps + step,
+                            "values": {"x": float(step), "y": 2.0 * step},
+                        }
+                        for step in range(steps)
+                    ],
+                }
+            )
+        )
+        _manifest.add("metrics", _identifier, run=f"offline_run_{i % runs}")
+
+
+@click.command
+@click.option("--files", type=int, default=10000, help="Number of cached files")
+@click.option("--runs", type=int, default=10, help="Number of runs")
+@click.option("--steps", type=int, default=5, help="Number of steps per file")
+@click.option("--latency", type=float, default=5.0, help="Request latency in ms")
+@click.option("--max-workers", type=int, default=5, help="Number of sender threads")
+def benchmark_sender_upload(
+    files: int, runs: int, steps: int, latency: float, max_workers: int
+) -> None:
+    _server = _mock_server(latency / 1000)
+    _max_batch_entries = MetricsUploadAction.max_batch_entries
+
+    with tempfile.TemporaryDirectory() as temp_d:
+        os.environ |= {
+            "SIMVUE_URL": f"http://127.0.0.1:{_server.server_port}",
+            "SIMVUE_TOKEN": _mock_token(),
+            "SIMVUE_OFFLINE_DIRECTORY": temp_d,
+        }
+        SimvueConfiguration.clear_cache()
+
+        for label, max_batch_entries in (
+            ("per file", 1),
+            ("batched", _max_batch_entries),
+        ):
+            _populate_cache(pathlib.Path(temp_d), files, runs, steps)
+            MetricsUploadAction.max_batch_entries = max_batch_entries
+            _requests = _server.RequestHandlerClass.requests
+            _start = time.perf_counter()
+            Sender(max_workers=max_workers, throw_exceptions=True).upload(["metrics"])
+            click.echo(
+                f"{label:>9}: {time.perf_counter() - _start:8.2f}s, "
+                f"{_server.RequestHandlerClass.requests - _requests} requests"
+            )
+
+    MetricsUploadAction.max_batch_entries = _max_batch_entries
+    _server.shutdown()
+
+
+if __name__ == "__main__":
+    benchmark_sender_upload()
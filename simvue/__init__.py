@@ -2,3 +2,4 @@ from simvue.client import Client as Client
 from simvue.handler import Handler as Handler
 from simvue.models import RunInput as RunInput
 from simvue.run import Run as Run
+from simvue.async_run import AsyncRun as AsyncRun
@@ -9,8 +9,13 @@ Class for defining and interacting with artifact objects.
 import datetime
 import http
 import io
+import os
+import pathlib
 import typing
 import pydantic
+import requests.utils
+import urllib3.fields
+import urllib3.filepost
 
 try:
     from typing import Self
@@ -23,6 +28,11 @@ from simvue.exception import ObjectNotFoundError
 from simvue.models import DATETIME_FORMAT
 from simvue.api.objects.base import SimvueObject, staging_check, write_only
 from simvue.api.objects.run import Run
+from simvue.api.objects.artifact.multipart import (
+    MultipartUpload,
+    MultipartURLs,
+    part_size_for,
+)
 from simvue.api.request import (
     put as sv_put,
     get_json_from_response,
@@ -36,6 +46,55 @@ BASE_TIMEOUT: int = 10
 UPLOAD_TIMEOUT_PER_MB: int = 1
 DOWNLOAD_TIMEOUT_PER_MB: int = 1
 DOWNLOAD_CHUNK_SIZE: int = 8192
+UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+
+class _FormDataStream:
+    """Multipart form data request body streaming a file.
+
+    The body is generated each time it is iterated, reading the file from
+    its initial position, such that a failed request can be retried. The
+    length of the body is known in advance so that it is not sent chunked.
+    """
+
+    def __init__(
+        self, fields: dict[str, str] | None, name: str, file: typing.BinaryIO
+    ) -> None:
+        self._file: typing.BinaryIO = file
+        self._start: int = file.tell()
+        self._file_size: int = file.seek(0, os.SEEK_END) - self._start
+        file.seek(self._start)
+
+        self.boundary: str = urllib3.filepost.choose_boundary()
+        self._preamble: bytes = b""
+
+        for field_name, value in (fields or {}).items():
+            _field = urllib3.fields.RequestField(name=field_name, data=value)
+            _field.make_multipart()
+            self._preamble += (
+                f"--{self.boundary}\r\n{_field.render_headers()}{value}\r\n".encode()
+            )
+
+        _field = urllib3.fields.RequestField(
+            name=name, data=b"", filename=requests.utils.guess_filename(file) or name
+        )
+        _field.make_multipart()
+        self._preamble += f"--{self.boundary}\r\n{_field.render_headers()}".encode()
+        self._epilogue: bytes = f"\r\n--{self.boundary}--\r\n".encode()
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return len(self._preamble) + self._file_size + len(self._epilogue)
+
+    def __iter__(self) -> Generator[bytes]:
+        yield self._preamble
+        self._file.seek(self._start)
+        while _chunk := self._file.read(UPLOAD_CHUNK_SIZE):
+            yield _chunk
+        yield self._epilogue
 
 
 class ArtifactBase(SimvueObject):
@@ -79,7 +138,7 @@ class ArtifactBase(SimvueObject):
         category : Literal['input', 'output', 'code']
             category of this artifact with respect to the run.
         """
-        self._init_data["runs"][run_id] = category
+        self._init_data.setdefault("runs", {})[run_id] = category
 
         if self._offline:
             self._staging["runs"] = self._init_data["runs"]
@@ -88,7 +147,7 @@ class ArtifactBase(SimvueObject):
 
         _run_artifacts_url = (
             URL(self._user_config.server.url)
-            / f"runs/{run_id}/artifacts/{self._init_data['id']}"
+            / f"runs/{run_id}/artifacts/{self._init_data.get('id', self._identifier)}"
         )
 
         _response = sv_put(
@@ -132,14 +191,16 @@ class ArtifactBase(SimvueObject):
 
         _name = self._staging["name"]
 
+        # File is streamed rather than read into memory to construct the request
+        _body = _FormDataStream(self._init_data.get("fields"), "file", file)
+
         _response = sv_post(
             url=_url,
-            headers={},
+            headers={"Content-Type": _body.content_type},
             params={},
             is_json=False,
             timeout=timeout,
-            files={"file": file},
-            data=self._init_data.get("fields"),
+            data=_body,
         )
 
         self._logger.debug(
@@ -154,10 +215,78 @@ class ArtifactBase(SimvueObject):
             response=_response,
         )
 
+        self._confirm_upload()
+
+    def _multipart_urls(
+        self, n_parts: int, part_size: int, upload_id: str | None
+    ) -> MultipartURLs | None:
+        """Request presigned URLs for uploading this artifact in parts.
+
+        Returns None if the server does not support multipart uploads.
+        """
+        _response = sv_post(
+            url=f"{self.url}/multipart",
+            headers=self._headers,
+            params={},
+            data={"parts": n_parts, "part_size": part_size}
+            | ({"upload_id": upload_id} if upload_id else {}),
+        )
+
+        if _response.status_code in (
+            http.HTTPStatus.NOT_FOUND,
+            http.HTTPStatus.METHOD_NOT_ALLOWED,
+            http.HTTPStatus.NOT_IMPLEMENTED,
+        ):
+            return None
+
+        return get_json_from_response(
+            expected_status=[http.HTTPStatus.OK],
+            scenario=f"requesting multipart upload of artifact '{self._staging['name']}'",
+            response=_response,
+        )
+
+    def _upload_multipart(
+        self, file_path: pathlib.Path, file_size: int, checksum: str
+    ) -> bool:
+        """Upload the file for this artifact in parts.
+
+        Parts are uploaded concurrently, the parts uploaded being recorded
+        in a journal within the cache such that an interrupted upload of
+        the same file resumes from the remaining parts.
+
+        Returns
+        -------
+        bool
+            whether the file was uploaded, False if the server does not
+            support multipart uploads.
+        """
+        if not self._staging.get("url"):
+            return True
+
+        _part_size: int = part_size_for(file_size)
+        _upload = MultipartUpload(
+            file_path,
+            journal_path=self._user_config.offline.cache.joinpath(
+                "uploads", f"{checksum}.journal"
+            ),
+            part_size=_part_size,
+        )
+
+        if not _upload.upload(
+            lambda upload_id: self._multipart_urls(
+                _upload.n_parts, _part_size, upload_id
+            )
+        ):
+            return False
+
+        self._confirm_upload()
+        return True
+
+    def _confirm_upload(self) -> None:
+        """Update the server status to confirm the file was uploaded"""
         # Temporarily remove read-only state
         self.read_only(False)
 
-        # Update the server status to confirm file uploaded
         self.uploaded = True
         super().commit()
         self.read_only(True)
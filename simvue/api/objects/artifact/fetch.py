@@ -15,6 +15,8 @@ from simvue.exception import ObjectNotFoundError
 
 __all__ = ["Artifact"]
 
+MAX_CHECKSUM_MATCHES: int = 10
+
 
 class ArtifactSort(Sort):
     @pydantic.field_validator("column")
@@ -170,6 +172,40 @@ class Artifact:
             _local=True,
         )
 
+    @classmethod
+    def from_checksum(
+        cls, checksum: str, name: str | None = None, **kwargs
+    ) -> FileArtifact | ObjectArtifact | None:
+        """Retrieve an uploaded artifact by the checksum of its content.
+
+        Parameters
+        ----------
+        checksum : str
+            the SHA-256 checksum of the artifact content.
+        name : str | None, optional
+            if specified, the name the artifact must also have.
+
+        Returns
+        -------
+        FileArtifact | ObjectArtifact | None
+            the artifact if found and its content has been uploaded.
+        """
+        _filters: list[str] = [f"checksum == {checksum}"]
+        if name:
+            _filters.append(f"name == {name}")
+
+        for _, _artifact in cls.get(
+            count=MAX_CHECKSUM_MATCHES, filters=json.dumps(_filters), **kwargs
+        ):
+            if (
+                _artifact.checksum == checksum
+                and (not name or _artifact.name == name)
+                and _artifact.uploaded
+            ):
+                return _artifact
+
+        return None
+
     @classmethod
     @pydantic.validate_call
     def get(
@@ -1,4 +1,5 @@
 from .base import ArtifactBase
+from .multipart import MULTIPART_THRESHOLD
 
 import typing
 import pydantic
@@ -8,7 +9,11 @@ import shutil
 from simvue.config.user import SimvueConfiguration
 from datetime import datetime
 from simvue.models import NAME_REGEX
-from simvue.utilities import get_mimetype_for_file, get_mimetypes, calculate_sha256
+from simvue.utilities import (
+    calculate_file_sha256,
+    get_mimetype_for_file,
+    get_mimetypes,
+)
 
 try:
     from typing import Self
@@ -44,6 +49,37 @@ class FileArtifact(ArtifactBase):
         """
         super().__init__(identifier=identifier, _read_only=_read_only, **kwargs)
 
+    @staticmethod
+    def create_snapshot(
+        file_path: pathlib.Path, cache_directory: pathlib.Path
+    ) -> tuple[pathlib.Path, int, str]:
+        """Copy a file to the local staging directory prior to upload
+
+        The snapshot is created within the same read of the file as the checksum.
+
+        Parameters
+        ----------
+        file_path : pathlib.Path
+            path of the file to snapshot
+        cache_directory : pathlib.Path
+            the local cache directory, snapshots being staged within it
+
+        Returns
+        -------
+        tuple[pathlib.Path, int, str]
+            the path, size and checksum of the snapshot
+        """
+        _local_staging_dir: pathlib.Path = cache_directory.joinpath("artifacts")
+        _local_staging_dir.mkdir(parents=True, exist_ok=True)
+        _local_staging_file = _local_staging_dir.joinpath(
+            f"{file_path.stem}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S_%f')}.file"
+        )
+
+        _file_checksum = calculate_file_sha256(file_path, copy_to=_local_staging_file)
+        shutil.copymode(file_path, _local_staging_file)
+
+        return _local_staging_file, _local_staging_file.stat().st_size, _file_checksum
+
     @classmethod
     def new(
         cls,
@@ -90,26 +126,19 @@ class FileArtifact(ArtifactBase):
         if _file_orig_path := kwargs.pop("original_path", None):
             _file_size = kwargs.pop("size")
             _file_checksum = kwargs.pop("checksum")
+        elif snapshot:
+            _user_config = SimvueConfiguration.fetch(
+                mode="offline" if offline else "online"
+            )
+            file_path, _file_size, _file_checksum = cls.create_snapshot(
+                pathlib.Path(file_path), _user_config.offline.cache
+            )
+            _file_orig_path = file_path.expanduser().absolute()
         else:
             file_path = pathlib.Path(file_path)
-            if snapshot:
-                _user_config = SimvueConfiguration.fetch(
-                    mode="offline" if offline else "online"
-                )
-
-                _local_staging_dir: pathlib.Path = _user_config.offline.cache.joinpath(
-                    "artifacts"
-                )
-                _local_staging_dir.mkdir(parents=True, exist_ok=True)
-                _local_staging_file = _local_staging_dir.joinpath(
-                    f"{file_path.stem}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S_%f')[:-3]}.file"
-                )
-                shutil.copy(file_path, _local_staging_file)
-                file_path = _local_staging_file
-
+            _file_checksum = calculate_file_sha256(file_path)
             _file_size = file_path.stat().st_size
             _file_orig_path = file_path.expanduser().absolute()
-            _file_checksum = calculate_sha256(f"{file_path}", is_file=True)
 
         _artifact = FileArtifact(
             name=name,
@@ -136,8 +165,16 @@ class FileArtifact(ArtifactBase):
         if offline:
             return _artifact
 
-        with open(_file_orig_path, "rb") as out_f:
-            _artifact._upload(file=out_f, timeout=upload_timeout, file_size=_file_size)
+        # Large files are uploaded in parts where supported by the server
+        if _file_size < MULTIPART_THRESHOLD or not _artifact._upload_multipart(
+            file_path=pathlib.Path(_file_orig_path),
+            file_size=_file_size,
+            checksum=_file_checksum,
+        ):
+            with open(_file_orig_path, "rb") as out_f:
+                _artifact._upload(
+                    file=out_f, timeout=upload_timeout, file_size=_file_size
+                )
 
         # If snapshot created, delete it after uploading
         if pathlib.Path(_file_orig_path).parent == _artifact._local_staging_file.parent:
@@ -0,0 +1,251 @@
+"""
+Simvue Multipart Upload
+=======================
+
+Upload of large files to S3 compatible object storage in fixed size parts.
+
+The server initiates a multipart upload on the storage configured for an
+artifact and presigns a URL for each part, the parts then being uploaded
+concurrently, each part being retried independently. Completed parts are
+recorded in a local journal such that an interrupted upload resumes from
+the parts which remain, rather than from the start of the file.
+"""
+
+import http
+import json
+import logging
+import os
+import pathlib
+import threading
+import typing
+import xml.sax.saxutils
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from simvue.api.request import get_json_from_response, post as sv_post, put as sv_put
+
+MULTIPART_THRESHOLD: int = 64 * 1024 * 1024
+MULTIPART_PART_SIZE: int = 16 * 1024 * 1024
+MULTIPART_MAX_WORKERS: int = 4
+MULTIPART_MAX_PARTS: int = 10000
+PART_TIMEOUT_PER_MB: int = 1
+BASE_TIMEOUT: int = 10
+
+logger = logging.getLogger(__name__)
+
+
+class MultipartURLs(typing.TypedDict):
+    """Presigned URLs for uploading the parts of a file"""
+
+    upload_id: str
+    part_urls: list[str]
+    complete_url: str
+
+
+def part_size_for(file_size: int, part_size: int = MULTIPART_PART_SIZE) -> int:
+    """Returns the part size used to upload a file within the maximum number of parts"""
+    return max(part_size, -(-file_size // MULTIPART_MAX_PARTS))
+
+
+class MultipartUpload:
+    """Upload a file to object storage in fixed size parts."""
+
+    def __init__(
+        self,
+        file_path: pathlib.Path,
+        *,
+        journal_path: pathlib.Path,
+        part_size: int = MULTIPART_PART_SIZE,
+        max_workers: int = MULTIPART_MAX_WORKERS,
+    ) -> None:
+        """Initialise an upload of a file in parts.
+
+        Parameters
+        ----------
+        file_path : pathlib.Path
+            the file to upload.
+        journal_path : pathlib.Path
+            file recording the parts which have been uploaded, allowing
+            an interrupted upload to be resumed.
+        part_size : int, optional
+            size of each part in bytes, all but the last part being of
+            this size, default is 16MiB.
+        max_workers : int, optional
+            maximum number of parts uploaded concurrently, default 4.
+        """
+        self._file_path: pathlib.Path = file_path
+        self._journal_path: pathlib.Path = journal_path
+        self._file_size: int = file_path.stat().st_size
+        self._part_size: int = part_size
+        self._max_workers: int = max_workers
+        self._lock: threading.Lock = threading.Lock()
+        self._upload_id: str | None = None
+        self._etags: dict[int, str] = {}
+        self._load_journal()
+
+    @property
+    def n_parts(self) -> int:
+        """Returns the number of parts the file is uploaded in"""
+        return max(1, -(-self._file_size // self._part_size))
+
+    @property
+    def upload_id(self) -> str | None:
+        """Returns the identifier of the upload being resumed, if any"""
+        return self._upload_id
+
+    @property
+    def completed_parts(self) -> list[int]:
+        """Returns the numbers of the parts which have been uploaded"""
+        return sorted(self._etags)
+
+    def _load_journal(self) -> None:
+        """Read the parts uploaded by a previous attempt at this upload"""
+        try:
+            _journal: dict[str, typing.Any] = json.loads(self._journal_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        # Only resume if the file is unchanged since the previous attempt
+        if (
+            _journal.get("file_size") != self._file_size
+            or _journal.get("part_size") != self._part_size
+        ):
+            return
+
+        self._upload_id = _journal.get("upload_id")
+        self._etags = {int(part): etag for part, etag in _journal["parts"].items()}
+
+    def _write_journal(self) -> None:
+        """Record the parts uploaded so far, replacing the journal atomically"""
+        self._journal_path.parent.mkdir(parents=True, exist_ok=True)
+        _temp_path = self._journal_path.with_suffix(".tmp")
+        _temp_path.write_text(
+            json.dumps(
+                {
+                    "upload_id": self._upload_id,
+                    "file_size": self._file_size,
+                    "part_size": self._part_size,
+                    "parts": self._etags,
+                }
+            )
+        )
+        os.replace(_temp_path, self._journal_path)
+
+    def _upload_part(self, part_number: int, url: str) -> None:
+        """Upload a single part, recording its entity tag in the journal"""
+        with self._file_path.open("rb") as in_f:
+            in_f.seek((part_number - 1) * self._part_size)
+            _data: bytes = in_f.read(self._part_size)
+
+        _response = sv_put(
+            url=url,
+            headers={},
+            data=_data,
+            is_json=False,
+            timeout=BASE_TIMEOUT + PART_TIMEOUT_PER_MB * len(_data) // (1024 * 1024),
+        )
+
+        if _response.status_code != http.HTTPStatus.OK:
+            get_json_from_response(
+                expected_status=[http.HTTPStatus.OK],
+                allow_parse_failure=True,
+                scenario=f"uploading part {part_number} of '{self._file_path}'",
+                response=_response,
+            )
+
+        if not (_etag := _response.headers.get("ETag")):
+            raise RuntimeError(
+                f"No entity tag returned for part {part_number} of '{self._file_path}'"
+            )
+
+        with self._lock:
+            self._etags[part_number] = _etag
+            self._write_journal()
+
+    def _complete(self, url: str) -> None:
+        """Combine the uploaded parts into a single object"""
+        _parts: str = "".join(
+            f"<Part><PartNumber>{part}</PartNumber>"
+            f"<ETag>{xml.sax.saxutils.escape(self._etags[part])}</ETag></Part>"
+            for part in sorted(self._etags)
+        )
+        _response = sv_post(
+            url=url,
+            headers={"Content-Type": "application/xml"},
+            params={},
+            data=f"<CompleteMultipartUpload>{_parts}</CompleteMultipartUpload>",
+            is_json=False,
+            timeout=BASE_TIMEOUT,
+        )
+
+        # Storage may report failure to combine parts in an OK response
+        if _response.status_code != http.HTTPStatus.OK or "<Error>" in _response.text:
+            raise RuntimeError(
+                f"Completing upload of '{self._file_path}' failed with status "
+                f"{_response.status_code}: {_response.text}"
+            )
+
+    def upload(
+        self, request_urls: Callable[[str | None], MultipartURLs | None]
+    ) -> bool:
+        """Upload all parts of the file not yet uploaded, then complete the upload.
+
+        Parameters
+        ----------
+        request_urls : Callable[[str | None], MultipartURLs | None]
+            returns the presigned URLs for the upload, given the identifier
+            of the upload being resumed if any, or None if the storage does
+            not support multipart uploads.
+
+        Returns
+        -------
+        bool
+            whether the file was uploaded, False if multipart uploads are
+            not supported.
+        """
+        if not (_urls := request_urls(self._upload_id)):
+            return False
+
+        if _urls["upload_id"] != self._upload_id:
+            # The previous upload has expired, or there was none
+            self._upload_id = _urls["upload_id"]
+            self._etags = {}
+            self._write_journal()
+        elif self._etags:
+            logger.info(
+                "Resuming upload of '%s', %d of %d parts already uploaded",
+                self._file_path,
+                len(self._etags),
+                self.n_parts,
+            )
+
+        if len(_urls["part_urls"]) != self.n_parts:
+            raise RuntimeError(
+                f"Expected {self.n_parts} part URLs for upload of "
+                f"'{self._file_path}', but received {len(_urls['part_urls'])}"
+            )
+
+        _remaining: list[int] = [
+            part for part in range(1, self.n_parts + 1) if part not in self._etags
+        ]
+
+        with ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="multipart_upload"
+        ) as executor:
+            _futures = [
+                executor.submit(self._upload_part, part, _urls["part_urls"][part - 1])
+                for part in _remaining
+            ]
+            try:
+                for future in _futures:
+                    # This will raise any exceptions encountered during upload
+                    future.result()
+            except BaseException:
+                for future in _futures:
+                    future.cancel()
+                raise
+
+        self._complete(_urls["complete_url"])
+        self._journal_path.unlink(missing_ok=True)
+        return True
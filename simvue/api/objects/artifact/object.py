@@ -43,6 +43,40 @@ class ObjectArtifact(ArtifactBase):
         kwargs.pop("original_path", None)
         super().__init__(identifier, _read_only, original_path="", **kwargs)
 
+    @staticmethod
+    def serialize(obj: typing.Any, allow_pickling: bool) -> tuple[bytes, str | None]:
+        """Serialize an object for upload as an artifact
+
+        Parameters
+        ----------
+        obj : Any
+            object to serialize
+        allow_pickling : bool
+            whether to allow the object to be pickled if no other
+            serialization found.
+
+        Returns
+        -------
+        tuple[bytes, str | None]
+            the serialized object and its MIME type
+
+        Raises
+        ------
+        ValueError
+            if the object could not be serialized
+        """
+        _serialization = serialize_object(obj, allow_pickling)
+
+        if not _serialization or not (_serialized := _serialization[0]):
+            raise ValueError(f"Could not serialize object of type '{type(obj)}'")
+
+        if not (_data_type := _serialization[1]) and not allow_pickling:
+            raise ValueError(
+                f"Could not serialize object of type '{type(obj)}' without pickling"
+            )
+
+        return _serialized, _data_type
+
     @classmethod
     @pydantic.validate_call
     def new(
@@ -92,16 +126,7 @@ class ObjectArtifact(ArtifactBase):
                 raise ValueError("Must provide an object to be saved, not None.")
 
         else:
-            _serialization = serialize_object(obj, allow_pickling)
-
-            if not _serialization or not (_serialized := _serialization[0]):
-                raise ValueError(f"Could not serialize object of type '{type(obj)}'")
-
-            if not (_data_type := _serialization[1]) and not allow_pickling:
-                raise ValueError(
-                    f"Could not serialize object of type '{type(obj)}' without pickling"
-                )
-
+            _serialized, _data_type = cls.serialize(obj, allow_pickling)
             _checksum = calculate_sha256(_serialized, is_file=False)
 
         _artifact = ObjectArtifact(
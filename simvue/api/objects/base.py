@@ -20,6 +20,7 @@ import pydantic
 
 from collections.abc import Generator
 from simvue.utilities import staging_merger
+from simvue.cache import CacheManifest
 from simvue.config.user import SimvueConfiguration
 from simvue.exception import ObjectNotFoundError
 from simvue.api.request import (
@@ -539,7 +540,10 @@ class SimvueObject(abc.ABC):
 
         if self._offline:
             self._logger.debug(
-                f"Writing updates to staging file for {self._label} '{self.id}': {self._staging}"
+                "Writing updates to staging file for %s '%s': %s",
+                self._label,
+                self.id,
+                self._staging,
             )
             self._cache()
             return
@@ -557,12 +561,18 @@ class SimvueObject(abc.ABC):
                 _response = self._post_batch(batch_data=_batch_commit)
             else:
                 self._logger.debug(
-                    f"Posting from staged data for {self._label} '{self.id}': {self._staging}"
+                    "Posting from staged data for %s '%s': %s",
+                    self._label,
+                    self.id,
+                    self._staging,
                 )
                 _response = self._post_single(**self._staging)
         elif self._staging:
             self._logger.debug(
-                f"Pushing updates from staged data for {self._label} '{self.id}': {self._staging}"
+                "Pushing updates from staged data for %s '%s': %s",
+                self._label,
+                self.id,
+                self._staging,
             )
             _response = self._put(**self._staging)
 
@@ -705,6 +715,9 @@ class SimvueObject(abc.ABC):
         """
 
         if self._get_local_staged():
+            CacheManifest.open(self._user_config.offline.cache).remove(
+                self._local_staging_file.parent.name, self._identifier
+            )
             self._local_staging_file.unlink(missing_ok=True)
 
         if self._offline:
@@ -778,6 +791,14 @@ class SimvueObject(abc.ABC):
         with self._local_staging_file.open("w", encoding="utf-8") as out_f:
             json.dump(_local_data, out_f, indent=2)
 
+        # Registered once written so the sender never finds an entry
+        # without its file, unless the file has since been uploaded
+        CacheManifest.open(self._user_config.offline.cache).add(
+            self._local_staging_file.parent.name,
+            self._identifier,
+            run=_local_data.get("run"),
+        )
+
     def to_dict(self) -> dict[str, typing.Any]:
         """Convert object to serializable dictionary.
 
@@ -36,6 +36,7 @@ from simvue.api.request import (
     get_json_from_response,
 )
 from simvue.api.url import URL
+from simvue.cache import CacheManifest
 from simvue.models import FOLDER_REGEX, NAME_REGEX, DATETIME_FORMAT, simvue_timestamp
 
 Status = typing.Literal[
@@ -613,6 +614,9 @@ class Run(SimvueObject):
                 _dir.mkdir(parents=True)
             _heartbeat_file = self._local_staging_file.with_suffix(".heartbeat")
             _heartbeat_file.touch()
+            CacheManifest.open(self._user_config.offline.cache).add(
+                "heartbeat", self._identifier, run=self._identifier, kind="heartbeat"
+            )
             return None
 
         _url = self._base_url
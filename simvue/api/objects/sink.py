@@ -0,0 +1,234 @@
+"""
+Simvue Run Data Sink
+====================
+
+Contains a class for sending the high frequency data of a single run,
+namely events, metrics and tensor metrics, to the Simvue server.
+
+Unlike Events, Metrics and GridMetrics the sink is constructed once per run
+and reused for every dispatch, the configuration, request headers and
+endpoints being resolved on construction. Each write is then a single
+MessagePack serialisation and HTTP request, or in offline mode a single
+record appended to the segmented cache log for the run.
+
+"""
+
+import http
+import logging
+import typing
+
+import msgpack
+import numpy
+
+from simvue.api.request import post as sv_post, get_json_from_response
+from simvue.api.url import URL
+from simvue.cache import CacheManifest, SegmentWriter
+from simvue.config.user import SimvueConfiguration
+from simvue.dispatch.columnar import MetricBatch
+
+from .grids import GridMetrics
+
+__all__ = ["RunDataSink"]
+
+
+class RunDataSink:
+    """
+    Simvue Run Data Sink
+    ====================
+
+    Writes dispatched events and metrics for a single run.
+
+    Items are sent as they were added to the dispatch queue, having
+    been validated when logged, so no model is constructed per item.
+    In offline mode each write is appended to a rolling segment file
+    for the run and object type, the segments being sealed on 'close'.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        run: str,
+        offline: bool = False,
+        user_config: SimvueConfiguration | None = None,
+    ) -> None:
+        """Initialise a sink for the given run.
+
+        Parameters
+        ----------
+        run: str
+            identifier for the run to attach data to.
+        offline: bool, optional
+            whether to write data to the local cache, default is False.
+        user_config : SimvueConfiguration | None, optional
+            configuration to use, by default this is fetched.
+        """
+        self._run_id: str = run
+        self._offline: bool = offline
+        self._logger = logging.getLogger(f"simvue.{self.__class__.__name__}")
+        self._user_config: SimvueConfiguration = (
+            user_config
+            or SimvueConfiguration.fetch(mode="offline" if offline else "online")
+        )
+        self._segment_writers: dict[str, SegmentWriter] = {}
+
+        if offline:
+            return
+
+        _server_url = URL(self._user_config.server.url)
+        self._headers: dict[str, str] = self._user_config.headers | {
+            "Content-Type": "application/msgpack"
+        }
+        self._events_url: str = f"{_server_url / 'events'}"
+        self._metrics_url: str = f"{_server_url / 'metrics'}"
+        self._grid_metrics_url: str = (
+            f"{self._user_config.server.url}/{GridMetrics.run_grids_endpoint(run)}"
+        )
+
+    @property
+    def run_id(self) -> str:
+        """Returns the identifier of the run data is written to"""
+        return self._run_id
+
+    @property
+    def offline(self) -> bool:
+        """Returns whether data is written to the local cache"""
+        return self._offline
+
+    def _append(self, object_type: str, record: dict[str, typing.Any]) -> None:
+        """Append a record to the local cache for the given object type"""
+        if not (_writer := self._segment_writers.get(object_type)):
+            _writer = self._segment_writers[object_type] = SegmentWriter(
+                directory=self._user_config.offline.cache,
+                run=self._run_id,
+                object_type=object_type,
+                max_segment_size=self._user_config.offline.segment_size,
+                fsync=self._user_config.offline.segment_fsync,
+                codec=self._user_config.offline.segment_compression,
+                level=self._user_config.offline.segment_compression_level,
+                manifest=CacheManifest.open(self._user_config.offline.cache),
+            )
+        _writer.append(record)
+
+    def close(self) -> None:
+        """Seal any segments written in offline mode"""
+        for writer in self._segment_writers.values():
+            writer.close()
+
+    def _post(
+        self,
+        url: str,
+        content: dict[str, typing.Any] | list[dict[str, typing.Any]],
+        label: str,
+        expected_status: list[int],
+    ) -> dict[str, typing.Any]:
+        """Serialise and post content to the server"""
+        _response = sv_post(
+            url=url,
+            headers=self._headers,
+            params={},
+            data=msgpack.packb(content, use_bin_type=True),
+            is_json=False,
+        )
+
+        if _response.status_code == http.HTTPStatus.FORBIDDEN:
+            raise RuntimeError(
+                f"Forbidden: You do not have permission to create object of type '{label}'"
+            )
+
+        return get_json_from_response(
+            response=_response,
+            expected_status=expected_status,
+            scenario=f"Creation of {label} for run '{self._run_id}'",
+        )
+
+    def events(self, events: list[dict[str, typing.Any]]) -> dict | None:
+        """Write a set of events.
+
+        Parameters
+        ----------
+        events : list[dict[str, Any]]
+            events as added to the dispatch queue.
+
+        Returns
+        -------
+        dict | None
+            server response if online.
+        """
+        if self._offline:
+            return self._append("events", {"events": events})
+
+        self._logger.debug("Posting %d events for run '%s'", len(events), self._run_id)
+        return self._post(
+            self._events_url,
+            {"run": self._run_id, "events": events},
+            "event",
+            [http.HTTPStatus.OK, http.HTTPStatus.CONFLICT],
+        )
+
+    def metrics(
+        self, metrics: MetricBatch | list[dict[str, typing.Any]]
+    ) -> dict | None:
+        """Write a set of metrics.
+
+        Parameters
+        ----------
+        metrics : MetricBatch | list[dict[str, Any]]
+            batch removed from a columnar dispatch queue, or metric sets.
+
+        Returns
+        -------
+        dict | None
+            server response if online.
+        """
+        if isinstance(metrics, MetricBatch):
+            metrics = metrics.to_metric_sets()
+
+        if self._offline:
+            return self._append("metrics", {"metrics": metrics})
+
+        self._logger.debug(
+            "Posting %d metric sets for run '%s'", len(metrics), self._run_id
+        )
+        return self._post(
+            self._metrics_url,
+            {"run": self._run_id, "metrics": metrics},
+            "metric",
+            [http.HTTPStatus.OK, http.HTTPStatus.CONFLICT],
+        )
+
+    def grid_metrics(self, data: list[dict[str, typing.Any]]) -> dict | None:
+        """Write a set of tensor metrics.
+
+        Parameters
+        ----------
+        data : list[dict[str, Any]]
+            tensor metric sets as added to the dispatch queue.
+
+        Returns
+        -------
+        dict | None
+            server response if online.
+        """
+        data = [
+            entry
+            | {
+                "array": entry["array"].tolist()
+                if isinstance(entry["array"], numpy.ndarray)
+                else entry["array"]
+            }
+            for entry in data
+        ]
+
+        if self._offline:
+            return self._append("grid_metrics", {"data": data})
+
+        self._logger.debug(
+            "Posting %d tensor metric sets for run '%s'", len(data), self._run_id
+        )
+        return self._post(
+            self._grid_metrics_url,
+            data,
+            "grid_metric",
+            [http.HTTPStatus.OK],
+        )
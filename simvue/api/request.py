@@ -5,15 +5,26 @@ Simvue API Connection
 Provides methods for interacting with a Simvue server which include retry
 policies. In cases where JSON is the expected form the data is firstly converted
 to a JSON string
+
+Requests are sent through persistent sessions so that connections to a server
+are kept alive and reused rather than a new TCP/TLS connection being opened for
+every call. Connection pools are shared between threads, one per server.
+
+The rate at which requests and bytes are sent may be limited across all
+threads, see 'configure_rate_limit'.
 """
 
 import copy
 import json as json_module
+import threading
+import time
 import typing
 import logging
 import http
+import urllib.parse
 
 import requests
+import requests.adapters
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -29,7 +40,10 @@ RETRY_MIN = 4
 RETRY_MAX = 10
 RETRY_STOP = 5
 MAX_ENTRIES_PER_PAGE: int = 100
-RETRY_STATUSES = {502, 503, 504}
+RETRY_STATUSES = {429, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+DEFAULT_POOL_SIZE: int = 10
+RATE_LIMIT_CHUNK_SIZE: int = 64 * 1024
 
 
 def set_json_header(headers: dict[str, str]) -> dict[str, str]:
@@ -46,6 +60,371 @@ class RetryableHTTPError(Exception):
     pass
 
 
+class RateLimiter:
+    """Token bucket limiting the rate at which requests and bytes are sent.
+
+    Tokens for requests and for bytes accumulate at the configured rates up
+    to one second's worth, each request and each chunk of a request body
+    consuming tokens before being sent. Where too few tokens remain the
+    sending thread reserves them and waits for them to accumulate, such
+    that the limits hold across all threads sharing the limiter.
+    """
+
+    def __init__(
+        self,
+        bytes_per_second: int | None = None,
+        requests_per_second: float | None = None,
+        chunk_size: int = RATE_LIMIT_CHUNK_SIZE,
+    ) -> None:
+        """Initialise a new rate limiter.
+
+        Parameters
+        ----------
+        bytes_per_second : int | None, optional
+            maximum number of bytes sent per second, default is no limit.
+        requests_per_second : float | None, optional
+            maximum number of requests sent per second, default is no limit.
+        chunk_size : int, optional
+            size in bytes of the chunks in which request bodies are sent
+            when the number of bytes per second is limited, default is 64KiB.
+        """
+        self._lock: threading.Lock = threading.Lock()
+        self._chunk_size: int = chunk_size
+        self._bytes_sent: int = 0
+        self._requests_sent: int = 0
+        self._wait_time: float = 0
+        self.configure(
+            bytes_per_second=bytes_per_second, requests_per_second=requests_per_second
+        )
+
+    @property
+    def bytes_per_second(self) -> int | None:
+        """Returns the maximum number of bytes sent per second"""
+        return self._bytes_per_second
+
+    @property
+    def requests_per_second(self) -> float | None:
+        """Returns the maximum number of requests sent per second"""
+        return self._requests_per_second
+
+    def configure(
+        self,
+        *,
+        bytes_per_second: int | None = None,
+        requests_per_second: float | None = None,
+    ) -> None:
+        """Set the limits on the rate of sending, None removing the limit.
+
+        Parameters
+        ----------
+        bytes_per_second : int | None, optional
+            maximum number of bytes sent per second, default is no limit.
+        requests_per_second : float | None, optional
+            maximum number of requests sent per second, default is no limit.
+        """
+        with self._lock:
+            self._bytes_per_second: int | None = bytes_per_second
+            self._requests_per_second: float | None = requests_per_second
+            self._byte_tokens: float = bytes_per_second or 0
+            self._request_tokens: float = requests_per_second or 0
+            self._last_refill: float = time.monotonic()
+
+    def _reserve(self, n_bytes: int, n_requests: int) -> float:
+        """Consume tokens, returning the time to wait for any deficit"""
+        with self._lock:
+            _now: float = time.monotonic()
+            _elapsed: float = _now - self._last_refill
+            self._last_refill = _now
+            self._bytes_sent += n_bytes
+            self._requests_sent += n_requests
+            _wait: float = 0
+
+            if self._bytes_per_second:
+                self._byte_tokens = (
+                    min(
+                        self._bytes_per_second,
+                        self._byte_tokens + _elapsed * self._bytes_per_second,
+                    )
+                    - n_bytes
+                )
+                _wait = max(_wait, -self._byte_tokens / self._bytes_per_second)
+
+            if self._requests_per_second:
+                self._request_tokens = (
+                    min(
+                        self._requests_per_second,
+                        self._request_tokens + _elapsed * self._requests_per_second,
+                    )
+                    - n_requests
+                )
+                _wait = max(_wait, -self._request_tokens / self._requests_per_second)
+
+            self._wait_time += _wait
+        return _wait
+
+    def acquire(self, n_bytes: int = 0, n_requests: int = 0) -> None:
+        """Wait until the given number of bytes and requests may be sent.
+
+        Parameters
+        ----------
+        n_bytes : int, optional
+            number of bytes to be sent, default 0.
+        n_requests : int, optional
+            number of requests to be sent, default 0.
+        """
+        if (_wait := self._reserve(n_bytes, n_requests)) > 0:
+            time.sleep(_wait)
+
+    def _chunks(self, body: typing.Any) -> Generator[bytes | memoryview]:
+        """Yield a request body in chunks, each once its bytes may be sent"""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if isinstance(body, bytes | bytearray | memoryview):
+            _view = memoryview(body)
+            for start in range(0, len(_view), self._chunk_size):
+                _chunk = _view[start : start + self._chunk_size]
+                self.acquire(len(_chunk))
+                yield _chunk
+        elif hasattr(body, "read"):
+            while _chunk := body.read(self._chunk_size):
+                if isinstance(_chunk, str):
+                    _chunk = _chunk.encode("utf-8")
+                self.acquire(len(_chunk))
+                yield _chunk
+        else:
+            for _chunk in body:
+                if isinstance(_chunk, str):
+                    _chunk = _chunk.encode("utf-8")
+                self.acquire(len(_chunk))
+                yield _chunk
+
+    def throttle(self, request: requests.PreparedRequest) -> None:
+        """Wait until a request may be sent, limiting the rate its body is sent.
+
+        If the number of bytes per second is limited the body of the
+        request is replaced by one sent in chunks as tokens become
+        available, the length of the body being unchanged.
+
+        Parameters
+        ----------
+        request : requests.PreparedRequest
+            the request to be sent.
+        """
+        if (
+            self._bytes_per_second
+            and request.body is not None
+            and "Content-Length" in request.headers
+        ):
+            self.acquire(n_requests=1)
+            request.body = self._chunks(request.body)
+        else:
+            self.acquire(
+                int(request.headers.get("Content-Length") or 0),
+                n_requests=1,
+            )
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns the total number of bytes and requests sent.
+
+        Returns
+        -------
+        dict[str, int | float]
+            the number of bytes and requests sent, and the total time in
+            seconds spent waiting by sending threads due to the limits.
+        """
+        with self._lock:
+            return {
+                "bytes": self._bytes_sent,
+                "requests": self._requests_sent,
+                "wait_time": self._wait_time,
+            }
+
+
+class _RateLimitedAdapter(requests.adapters.HTTPAdapter):
+    """HTTP adapter sending requests subject to a rate limiter"""
+
+    def __init__(self, rate_limiter: RateLimiter, **kwargs) -> None:
+        self._rate_limiter: RateLimiter = rate_limiter
+        super().__init__(**kwargs)
+
+    def send(
+        self, request: requests.PreparedRequest, *args, **kwargs
+    ) -> requests.Response:
+        self._rate_limiter.throttle(request)
+        return super().send(request, *args, **kwargs)
+
+
+class SessionPool:
+    """Persistent HTTP sessions with connection pooling for each server.
+
+    Each server, identified by scheme, host and port, has a single connection
+    pool which is shared between all threads. As ``requests.Session`` is not
+    itself thread safe, each thread is given its own session mounting the
+    shared pool. All requests are subject to a single rate limiter.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE) -> None:
+        """Initialise a new session pool.
+
+        Parameters
+        ----------
+        pool_size : int, optional
+            maximum number of connections kept alive per server,
+            default is 10.
+        """
+        self._pool_size: int = pool_size
+        self._adapters: dict[str, requests.adapters.HTTPAdapter] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._local: threading.local = threading.local()
+        self._rate_limiter: RateLimiter = RateLimiter()
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Returns the rate limiter applied to all requests"""
+        return self._rate_limiter
+
+    @property
+    def pool_size(self) -> int:
+        """Returns the maximum number of connections kept alive per server"""
+        return self._pool_size
+
+    def configure(self, *, pool_size: int) -> None:
+        """Set the number of connections kept alive per server.
+
+        Only affects servers to which no connection has yet been made.
+
+        Parameters
+        ----------
+        pool_size : int
+            maximum number of connections kept alive per server.
+        """
+        self._pool_size = pool_size
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        """Returns the scheme, host and port of a URL"""
+        _parsed = urllib.parse.urlsplit(f"{url}")
+        return f"{_parsed.scheme}://{_parsed.netloc}/"
+
+    def _adapter(self, origin: str) -> requests.adapters.HTTPAdapter:
+        """Returns the shared connection pool for a server, creating it if needed"""
+        with self._lock:
+            if not (_adapter := self._adapters.get(origin)):
+                _adapter = _RateLimitedAdapter(
+                    self._rate_limiter,
+                    pool_connections=1,
+                    pool_maxsize=self._pool_size,
+                )
+                self._adapters[origin] = _adapter
+        return _adapter
+
+    def session(self, url: str) -> requests.Session:
+        """Returns the session for the current thread to use for a given URL.
+
+        Parameters
+        ----------
+        url : str
+            URL the request will be sent to.
+
+        Returns
+        -------
+        requests.Session
+            session using the shared connection pool for the server.
+        """
+        _origin: str = self._origin(url)
+        _sessions: dict[str, requests.Session] = self._local.__dict__.setdefault(
+            "sessions", {}
+        )
+        if not (_session := _sessions.get(_origin)):
+            _session = requests.Session()
+            _session.mount(_origin, self._adapter(_origin))
+            _sessions[_origin] = _session
+        return _session
+
+    def record_status(self, status_code: int) -> None:
+        """Record the status of a response received by the current thread"""
+        if status_code in THROTTLE_STATUSES:
+            self._local.throttled = getattr(self._local, "throttled", 0) + 1
+
+    def throttle_count(self) -> int:
+        """Returns the number of throttling responses received by the current thread"""
+        return getattr(self._local, "throttled", 0)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Returns connection usage for each server.
+
+        Returns
+        -------
+        dict[str, dict[str, int]]
+            for each server the number of connections opened, the number
+            of requests sent, and the number of requests sent on an
+            existing connection.
+        """
+        _stats: dict[str, dict[str, int]] = {}
+        with self._lock:
+            _adapters = dict(self._adapters)
+        for origin, adapter in _adapters.items():
+            _pools = [
+                adapter.poolmanager.pools[key]
+                for key in adapter.poolmanager.pools.keys()
+            ]
+            _connections: int = sum(pool.num_connections for pool in _pools)
+            _requests: int = sum(pool.num_requests for pool in _pools)
+            _stats[origin] = {
+                "connections": _connections,
+                "requests": _requests,
+                "reused": max(_requests - _connections, 0),
+            }
+        return _stats
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        with self._lock:
+            for adapter in self._adapters.values():
+                adapter.close()
+            self._adapters.clear()
+        self._local = threading.local()
+
+
+_session_pool: SessionPool = SessionPool()
+
+
+def get_session(url: str) -> requests.Session:
+    """Returns the pooled session for the current thread for a given URL"""
+    return _session_pool.session(url)
+
+
+def configure_connection_pool(*, pool_size: int) -> None:
+    """Set the number of connections kept alive per server"""
+    _session_pool.configure(pool_size=pool_size)
+
+
+def configure_rate_limit(
+    *,
+    bytes_per_second: int | None = None,
+    requests_per_second: float | None = None,
+) -> None:
+    """Limit the rate of sending across all threads, None removing the limit"""
+    _session_pool.rate_limiter.configure(
+        bytes_per_second=bytes_per_second, requests_per_second=requests_per_second
+    )
+
+
+def transfer_stats() -> dict[str, int | float]:
+    """Returns the total number of bytes and requests sent, see RateLimiter.stats"""
+    return _session_pool.rate_limiter.stats()
+
+
+def throttled_responses() -> int:
+    """Returns the number of HTTP 429 and 503 responses received by the current thread"""
+    return _session_pool.throttle_count()
+
+
+def connection_stats() -> dict[str, dict[str, int]]:
+    """Returns connection usage for each server, see SessionPool.stats"""
+    return _session_pool.stats()
+
+
 @retry(
     wait=wait_exponential(multiplier=RETRY_MULTIPLIER, min=RETRY_MIN, max=RETRY_MAX),
     stop=stop_after_attempt(RETRY_STOP),
@@ -94,7 +473,7 @@ def post(
     else:
         data_sent = data
 
-    response = requests.post(
+    response = get_session(url).post(
         url,
         headers=headers,
         params=params,
@@ -103,6 +482,8 @@ def post(
         files=files,
     )
 
+    _session_pool.record_status(response.status_code)
+
     if response.status_code == http.HTTPStatus.UNPROCESSABLE_ENTITY:
         _parsed_response = parse_validation_response(response.json())
         raise ValueError(
@@ -165,12 +546,14 @@ def put(
     else:
         data_sent = data
 
-    logging.debug(f"PUT: {url}\n\tdata={data_sent}\n\tjson={json}")
+    logging.debug("PUT: %s\n\tdata=%s\n\tjson=%s", url, data_sent, json)
 
-    response = requests.put(
+    response = get_session(url).put(
         url, headers=headers, data=data_sent, timeout=timeout, json=json
     )
 
+    _session_pool.record_status(response.status_code)
+
     if response.status_code in RETRY_STATUSES:
         raise RetryableHTTPError(
             f"Received status code {response.status_code} from server"
@@ -217,10 +600,12 @@ def get(
         response from executing GET
     """
     logging.debug(f"GET: {url}\n\tparams={params}")
-    response = requests.get(
+    response = get_session(url).get(
         url, headers=headers, timeout=timeout, params=params, json=json
     )
 
+    _session_pool.record_status(response.status_code)
+
     if response.status_code in RETRY_STATUSES:
         raise RetryableHTTPError(
             f"Received status code {response.status_code} from server"
@@ -266,7 +651,11 @@ def delete(
         response from executing DELETE
     """
     logging.debug(f"DELETE: {url}\n\tparams={params}")
-    response = requests.delete(url, headers=headers, timeout=timeout, params=params)
+    response = get_session(url).delete(
+        url, headers=headers, timeout=timeout, params=params
+    )
+
+    _session_pool.record_status(response.status_code)
 
     if response.status_code in RETRY_STATUSES:
         raise RetryableHTTPError(
@@ -0,0 +1,328 @@
+"""
+Simvue Asynchronous Run
+=======================
+
+Asyncio interface for recording metrics and information to Simvue, intended
+for services which manage many concurrent runs from a single event loop.
+
+Rather than each run creating its own dispatcher and heartbeat threads, the
+dispatch and heartbeat of every AsyncRun is scheduled as a task on the event
+loop. Calls which block on the server or filesystem are executed by a thread
+pool shared by all runs within the process, with all requests sharing the
+pooled HTTP connections to each server.
+"""
+
+import asyncio
+import contextlib
+import datetime
+import functools
+import logging
+import threading
+import time
+import types
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+import pydantic
+
+from .dispatch import ScheduledDispatcher
+from .run import Run
+
+if typing.TYPE_CHECKING:
+    from .dispatch import DispatcherBaseClass
+
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self  # noqa: F401
+
+HEARTBEAT_POLL_INTERVAL: float = 1.0
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock: threading.Lock = threading.Lock()
+
+
+def _shared_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Returns the thread pool shared by all asynchronous runs, creating it if needed"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="simvue_async"
+            )
+    return _executor
+
+
+class _ScheduledRun(Run):
+    """Run whose dispatch and heartbeat are performed by an AsyncRun.
+
+    No dispatcher or heartbeat threads are created, the dispatcher being
+    notified of new items through the 'wake' callback.
+    """
+
+    def __init__(self, *, wake: typing.Callable[[], None], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._wake: typing.Callable[[], None] = wake
+
+    def _create_dispatcher(self) -> "DispatcherBaseClass":
+        return ScheduledDispatcher(wake=self._wake, **self._dispatcher_arguments())
+
+    def _create_heartbeat_thread(self) -> None:
+        return None
+
+
+class AsyncRun:
+    """Asynchronous Simvue run.
+
+    Provides awaitable equivalents of the main methods of 'simvue.Run',
+    with the dispatch of metrics and events and the sending of heartbeats
+    scheduled on the running event loop.
+
+    Examples
+    --------
+
+    ```python
+    async with simvue.AsyncRun() as run:
+        await run.init(name="my_run")
+        await run.log_metrics({"x": 1})
+    ```
+    """
+
+    def __init__(
+        self,
+        *,
+        mode: typing.Literal["online", "offline", "disabled"] = "online",
+        abort_callback: typing.Callable[[Run], None] | None = None,
+        server_token: pydantic.SecretStr | None = None,
+        server_url: str | None = None,
+        debug: bool = False,
+        server_profile: str | None = None,
+    ) -> None:
+        """Initialise a new asynchronous Simvue run
+
+        Parameters are as for 'simvue.Run', if `abort_callback` is provided
+        the first argument is the underlying Run instance.
+
+        Parameters
+        ----------
+        mode : Literal['online', 'offline', 'disabled'], optional
+            mode of running
+                * online - objects sent directly to Simvue server
+                * offline - everything is written to disk for later dispatch
+                * disabled - disable monitoring completely
+        abort_callback : Callable | None, optional
+            callback executed when the run is aborted
+        server_token : str, optional
+            overwrite value for server token, default is None
+        server_url : str, optional
+            overwrite value for server URL, default is None
+        debug : bool, optional
+            run in debug mode, default is False
+        server_profile : str | None, optional
+            specify alternative profile to use for server, default is
+            to use the main server.
+        """
+        self._run: _ScheduledRun = _ScheduledRun(
+            wake=self._wake,
+            mode=mode,
+            abort_callback=abort_callback,
+            server_token=server_token,
+            server_url=server_url,
+            debug=debug,
+            server_profile=server_profile,
+        )
+        self._executor: ThreadPoolExecutor = _shared_executor(
+            self._run._user_config.client.connection_pool_size
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake_event: asyncio.Event | None = None
+        self._service_task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> Self:
+        self._run.__enter__()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        value: BaseException | None,
+        traceback: types.TracebackType | None,
+    ) -> None:
+        try:
+            await self._in_executor(self._run.__exit__, exc_type, value, traceback)
+        finally:
+            await self._stop_service()
+
+    @property
+    def id(self) -> str | None:
+        """Return the unique id of the run"""
+        return self._run.id
+
+    @property
+    def name(self) -> str | None:
+        """Return the name of the run"""
+        return self._run.name
+
+    @property
+    def run(self) -> Run:
+        """Return the underlying synchronous run"""
+        return self._run
+
+    def _wake(self) -> None:
+        """Wake the service task from any thread"""
+        if self._loop and self._wake_event:
+            # The event loop may have been closed before the run
+            with contextlib.suppress(RuntimeError):
+                self._loop.call_soon_threadsafe(self._wake_event.set)
+
+    async def _in_executor(
+        self, function: typing.Callable[..., typing.Any], *args, **kwargs
+    ) -> typing.Any:
+        """Execute a blocking call in the shared thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(function, *args, **kwargs)
+        )
+
+    async def _record(
+        self, function: typing.Callable[..., bool], *args, **kwargs
+    ) -> bool:
+        """Add data to the dispatch queue, leaving the event loop if this may block.
+
+        If the run is configured with 'queue_blocking' adding to a full
+        queue waits for it to be dispatched, which would stall every task
+        on the event loop, so the call is made within the shared thread pool.
+        """
+        if self._run._queue_blocking:
+            return await self._in_executor(function, *args, **kwargs)
+        return function(*args, **kwargs)
+
+    async def _service(self, dispatcher: ScheduledDispatcher) -> None:
+        """Dispatch items and send heartbeats until the run is closed.
+
+        Between iterations the task sleeps until the dispatcher is woken
+        by a new item, a queue is due for dispatch or the heartbeat poll
+        interval has passed.
+        """
+        _termination_trigger = self._run._heartbeat_termination_trigger
+        _last_heartbeat_step: float = 0
+
+        while not _termination_trigger.is_set():
+            self._wake_event.clear()
+
+            try:
+                await self._in_executor(dispatcher.dispatch_ready)
+
+                if time.time() - _last_heartbeat_step >= HEARTBEAT_POLL_INTERVAL:
+                    _last_heartbeat_step = time.time()
+                    await self._in_executor(self._run._heartbeat_step)
+            except Exception:
+                logger.exception("Error during dispatch for run '%s'", self.id)
+
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._wake_event.wait(),
+                    timeout=min(dispatcher.wait_timeout(), HEARTBEAT_POLL_INTERVAL),
+                )
+
+    async def _stop_service(self) -> None:
+        """Wait for the service task to finish once the run has been closed"""
+        if not self._service_task:
+            return
+        if self._run._heartbeat_termination_trigger:
+            self._run._heartbeat_termination_trigger.set()
+        self._wake()
+        await self._service_task
+        self._service_task = None
+
+    def config(self, **kwargs) -> bool:
+        """Optional configuration, see 'simvue.Run.config'"""
+        return self._run.config(**kwargs)
+
+    async def init(self, name: str | None = None, **kwargs) -> bool:
+        """Initialise the run, see 'simvue.Run.init'
+
+        Once initialised the dispatch and heartbeat for the run are
+        scheduled on the running event loop.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
+
+        _success: bool = await self._in_executor(self._run.init, name, **kwargs)
+
+        if isinstance(self._run._dispatcher, ScheduledDispatcher):
+            self._service_task = self._loop.create_task(
+                self._service(self._run._dispatcher),
+                name=f"{self._run.id}_service",
+            )
+
+        return _success
+
+    async def log_metrics(
+        self,
+        metrics: dict[str, int | float | numpy.ndarray],
+        step: int | None = None,
+        time: float | None = None,
+        timestamp: datetime.datetime | str | None = None,
+    ) -> bool:
+        """Log metrics, see 'simvue.Run.log_metrics'
+
+        Scalar metrics are added to the dispatch queue without leaving the
+        event loop unless the queue may block. Tensor metrics may require
+        creation of a grid on the server, and metric units set since the
+        last call are sent as run metadata, so in either case the metrics
+        are recorded within the shared thread pool.
+        """
+        _args = (metrics, step, time, timestamp)
+        if self._run._meta_cache.get("metrics") or any(
+            isinstance(value, numpy.ndarray) for value in metrics.values()
+        ):
+            return await self._in_executor(self._run.log_metrics, *_args)
+        return await self._record(self._run.log_metrics, *_args)
+
+    async def log_event(
+        self,
+        message: str,
+        *,
+        timestamp: datetime.datetime | str | None = None,
+        **kwargs,
+    ) -> bool:
+        """Log an event, see 'simvue.Run.log_event'"""
+        return await self._record(
+            self._run.log_event, message, timestamp=timestamp, **kwargs
+        )
+
+    async def save_file(self, file_path: str, category: str, **kwargs) -> bool:
+        """Upload a file, see 'simvue.Run.save_file'"""
+        return await self._in_executor(
+            self._run.save_file, file_path, category, **kwargs
+        )
+
+    async def update_metadata(self, metadata: dict[str, typing.Any]) -> bool:
+        """Update run metadata, see 'simvue.Run.update_metadata'"""
+        return await self._in_executor(self._run.update_metadata, metadata)
+
+    async def update_tags(self, tags: list[str]) -> bool:
+        """Update run tags, see 'simvue.Run.update_tags'"""
+        return await self._in_executor(self._run.update_tags, tags)
+
+    async def set_status(
+        self, status: typing.Literal["completed", "failed", "terminated"]
+    ) -> bool:
+        """Set the run status, see 'simvue.Run.set_status'"""
+        return await self._in_executor(self._run.set_status, status)
+
+    async def close(self) -> bool:
+        """Close the run, flushing any remaining metrics and events
+
+        Returns
+        -------
+        bool
+            whether close was successful
+        """
+        try:
+            return await self._in_executor(self._run.close)
+        finally:
+            await self._stop_service()
@@ -2,14 +2,35 @@
 
 import logging
 import pathlib
+import re
 import click
 
 from simvue.sender import Sender, UPLOAD_ORDER, UploadItem
+from simvue.sender.base import FOLLOW_INTERVAL
 
 
 _logger = logging.getLogger(__name__)
 _logger.setLevel(logging.INFO)
 
+_BANDWIDTH_UNITS: dict[str, int] = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def _parse_bandwidth(
+    _: click.Context, __: click.Parameter, value: str | None
+) -> int | None:
+    """Parse a number of bytes per second with an optional K, M or G suffix"""
+    if value is None:
+        return None
+    _match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?\s*", value.upper())
+    if (
+        not _match
+        or (_bandwidth := int(float(_match[1]) * _BANDWIDTH_UNITS[_match[2]])) < 1
+    ):
+        raise click.BadParameter(
+            f"expected a positive number of bytes per second, e.g. 500K or 10M, got '{value}'"
+        )
+    return _bandwidth
+
 
 @click.command("simvue-sender")
 @click.option(
@@ -20,6 +41,14 @@ _logger.setLevel(logging.INFO)
     required=False,
     help="The maximum number of worker threads to use in parallel, by default 5",
 )
+@click.option(
+    "-p",
+    "--processes",
+    type=click.IntRange(min=1),
+    default=1,
+    required=False,
+    help="The number of processes to use, cached runs being divided between them, by default 1",
+)
 @click.option(
     "-n",
     "--threading-threshold",
@@ -51,21 +80,91 @@ _logger.setLevel(logging.INFO)
     default=None,
     required=False,
 )
+@click.option(
+    "-f",
+    "--follow",
+    is_flag=True,
+    default=False,
+    help="Continuously upload objects as they are written to the cache, "
+    "failed uploads being retried with exponential backoff rather than "
+    "terminating the sender",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=FOLLOW_INTERVAL,
+    required=False,
+    help="In follow mode, the minimum time in seconds between uploads, by default 1",
+)
+@click.option(
+    "--retry-failed-uploads",
+    is_flag=True,
+    default=False,
+    help="Immediately retry all objects which previously failed to upload, "
+    "including those which have reached the maximum number of attempts",
+)
+@click.option(
+    "--max-bandwidth",
+    type=str,
+    callback=_parse_bandwidth,
+    default=None,
+    required=False,
+    help="The maximum bytes per second sent to the server across all workers, "
+    "with an optional K, M or G suffix, e.g. 10M, by default no limit",
+)
+@click.option(
+    "--max-request-rate",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    required=False,
+    help="The maximum requests per second sent to the server across all workers, by default no limit",
+)
+@click.option(
+    "--monitor-uploads",
+    is_flag=True,
+    default=False,
+    help="Record upload progress and throughput as a Simvue run",
+)
+@click.option(
+    "--rebuild-manifest",
+    is_flag=True,
+    default=False,
+    help="Rebuild the index of cached objects from the files within the cache",
+)
 def sender_cli(
     cache_directory: pathlib.Path | None,
     objects_to_upload: list[UploadItem] | None,
     threading_threshold: int,
     max_workers: int,
+    processes: int,
+    follow: bool,
+    interval: float,
+    retry_failed_uploads: bool,
+    max_bandwidth: int | None,
+    max_request_rate: float | None,
+    monitor_uploads: bool,
+    rebuild_manifest: bool,
 ) -> None:
     try:
         _logger.info("Starting Simvue Sender")
         _sender = Sender(
             cache_directory=cache_directory,
             max_workers=max_workers,
+            processes=processes,
             threading_threshold=threading_threshold,
-            throw_exceptions=True,
+            throw_exceptions=not follow,
+            retry_failed_uploads=retry_failed_uploads,
+            max_bandwidth=max_bandwidth,
+            max_request_rate=max_request_rate,
+            monitor_uploads=monitor_uploads,
+            rebuild_manifest=rebuild_manifest,
         )
-        _sender.upload(objects_to_upload)
+        if follow:
+            _sender.follow(objects_to_upload, interval=interval)
+        else:
+            _sender.upload(objects_to_upload)
+    except KeyboardInterrupt:
+        _logger.info("Stopping Simvue Sender")
     except Exception as err:
         _logger.critical("Exception running sender: %s", str(err))
         raise click.Abort
@@ -0,0 +1,29 @@
+"""
+Simvue Offline Cache
+====================
+
+Formats used to store data locally in offline mode prior to being
+sent to the server.
+"""
+
+from .manifest import ArtifactIndex, CacheManifest, IdMapping
+from .segment import (
+    FsyncPolicy,
+    SegmentCodec,
+    SegmentReader,
+    SegmentWriter,
+    segment_files,
+    segment_path,
+)
+
+__all__ = [
+    "ArtifactIndex",
+    "CacheManifest",
+    "IdMapping",
+    "FsyncPolicy",
+    "SegmentCodec",
+    "SegmentReader",
+    "SegmentWriter",
+    "segment_files",
+    "segment_path",
+]
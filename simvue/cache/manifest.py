@@ -0,0 +1,958 @@
+"""
+Cache Manifest
+==============
+
+Index of the objects pending upload within the local cache, held as an
+SQLite database alongside the cached files.
+
+Offline writers register each file they create in the cache, and the
+sender queries the manifest for the objects of a given type rather than
+scanning the cache directories, which for large caches can take longer
+than the upload itself. Entries are removed by the sender prior to the
+corresponding file being deleted, so a file is never left in the cache
+without an entry.
+
+Objects which fail to upload are retried with exponential backoff, the
+number of attempts and time of the next attempt being recorded for each
+object, along with the position of the last uploaded record for segments,
+so that a restarted sender resumes from where the previous sender stopped.
+
+If the manifest does not exist when first opened, for example for a
+cache written by an earlier version of Simvue, it is built from a single
+scan of the cache.
+
+The same database holds the mapping from the offline identifiers of
+uploaded objects to their identifiers on the server, and an index of the
+artifacts uploaded to each server by content, see 'ArtifactIndex'.
+
+The manifest uses SQLite's write-ahead log where the cache is on a local
+disk. The write-ahead log relies on memory shared between the processes
+accessing the database, so is only safe where these are all on the same
+host. For a cache on a network filesystem, such as NFS or Lustre, shared
+between compute nodes and a sender on another node, the manifest falls
+back to a rollback journal, which requires only that the filesystem
+supports file locking.
+"""
+
+import contextlib
+import math
+import os
+import pathlib
+import random
+import sqlite3
+import threading
+import time
+import typing
+
+import psutil
+
+from collections.abc import Generator, Iterable, Iterator, Mapping, MutableMapping
+
+from .segment import SEGMENT_SUFFIX
+
+MANIFEST_FILE: str = "manifest.db"
+
+# Delays in seconds between attempts to upload an object
+RETRY_BASE_DELAY: float = 10.0
+RETRY_MAX_DELAY: float = 3600.0
+# Number of attempts after which an object is only retried if requested
+MAX_UPLOAD_ATTEMPTS: int = 10
+
+# Time in seconds after which unused artifact index entries expire
+ARTIFACT_INDEX_TTL: float = 7 * 24 * 60 * 60
+ARTIFACT_INDEX_SIZE: int = 10000
+ARTIFACT_INDEX_EVICT_INTERVAL: int = 100
+
+# Filesystems shared between hosts, on which the write-ahead log cannot be used
+NETWORK_FILESYSTEMS: frozenset[str] = frozenset(
+    {
+        "afpfs",
+        "afs",
+        "beegfs",
+        "ceph",
+        "cifs",
+        "fuse.sshfs",
+        "glusterfs",
+        "gpfs",
+        "lustre",
+        "nfs",
+        "nfs4",
+        "panfs",
+        "smb3",
+        "smbfs",
+        "wekafs",
+    }
+)
+
+ManifestKind = typing.Literal["json", "segment", "heartbeat"]
+ManifestState = typing.Literal["pending", "failed"]
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS objects (
+    object_type TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'json',
+    run TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    retry_at REAL NOT NULL DEFAULT 0,
+    checkpoint INTEGER,
+    PRIMARY KEY (object_type, kind, identifier)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS objects_run ON objects (object_type, kind, run);
+CREATE TABLE IF NOT EXISTS id_mapping (
+    offline_id TEXT PRIMARY KEY,
+    online_id TEXT NOT NULL,
+    retired INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS artifacts (
+    server TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    name TEXT NOT NULL,
+    artifact_id TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (server, checksum, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS artifacts_last_used ON artifacts (last_used);
+CREATE TABLE IF NOT EXISTS file_checksums (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    modified INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS file_checksums_last_used ON file_checksums (last_used);
+"""
+
+# Cached files for each kind of entry, relative to the cache directory
+_KIND_PATTERNS: dict[str, str] = {
+    "json": "*/*.json",
+    "segment": f"*/*{SEGMENT_SUFFIX}",
+    "heartbeat": "runs/*.heartbeat",
+}
+
+_manifest_cache: dict[pathlib.Path, "CacheManifest"] = {}
+_manifest_cache_lock: threading.Lock = threading.Lock()
+
+
+def retry_delay(attempts: int) -> float:
+    """Returns the time to wait before the next attempt to upload an object.
+
+    The delay doubles with each failed attempt up to a maximum, with a
+    random jitter of up to half the delay so that the retries of objects
+    which failed together are spread out.
+
+    Parameters
+    ----------
+    attempts : int
+        the number of failed attempts so far.
+
+    Returns
+    -------
+    float
+        delay in seconds.
+    """
+    _delay: float = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempts - 1))
+    return _delay * random.uniform(0.5, 1.0)
+
+
+def is_network_filesystem(path: pathlib.Path) -> bool:
+    """Returns whether a path is on a filesystem shared between hosts.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        an existing file or directory.
+
+    Returns
+    -------
+    bool
+        whether the filesystem containing the path is a network filesystem.
+    """
+    _path: str = f"{path.resolve()}"
+
+    try:
+        _partitions = psutil.disk_partitions(all=True)
+    except OSError:
+        return False
+
+    # The filesystem is that of the deepest mount point containing the path
+    _mounts = [
+        partition
+        for partition in _partitions
+        if _path == partition.mountpoint
+        or _path.startswith(partition.mountpoint.rstrip(os.sep) + os.sep)
+    ]
+
+    if not _mounts:
+        return False
+
+    _mount = max(_mounts, key=lambda partition: len(partition.mountpoint))
+
+    return (
+        _mount.fstype.lower() in NETWORK_FILESYSTEMS
+        or "remote" in _mount.opts.split(",")
+    )
+
+
+class CacheManifest:
+    """Index of the objects pending upload within a local cache."""
+
+    def __init__(self, cache_directory: pathlib.Path) -> None:
+        """Open the manifest for a cache, creating it if it does not exist.
+
+        Use 'CacheManifest.open' to share a single instance within the process.
+
+        Parameters
+        ----------
+        cache_directory : pathlib.Path
+            the local cache directory.
+        """
+        self._cache_directory: pathlib.Path = cache_directory
+        self._path: pathlib.Path = cache_directory.joinpath(MANIFEST_FILE)
+        self._pid: int = os.getpid()
+        self._lock: threading.Lock = threading.Lock()
+
+        cache_directory.mkdir(parents=True, exist_ok=True)
+        _created: bool = not self._path.exists()
+
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            self._path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        if is_network_filesystem(cache_directory):
+            self._connection.execute("PRAGMA journal_mode=DELETE")
+        else:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+        if _created:
+            self.rebuild()
+
+    @classmethod
+    def open(cls, cache_directory: pathlib.Path) -> "CacheManifest":
+        """Returns the manifest for a cache shared within this process.
+
+        Parameters
+        ----------
+        cache_directory : pathlib.Path
+            the local cache directory.
+
+        Returns
+        -------
+        CacheManifest
+            the manifest for the given cache
+        """
+        _key: pathlib.Path = pathlib.Path(cache_directory).absolute()
+
+        with _manifest_cache_lock:
+            _manifest = _manifest_cache.get(_key)
+
+            # Connections cannot be shared with a forked process, and the
+            # cache may have been removed since the manifest was opened
+            if (
+                not _manifest
+                or _manifest._pid != os.getpid()
+                or not _manifest.path.exists()
+            ):
+                _manifest = _manifest_cache[_key] = cls(_key)
+
+        return _manifest
+
+    @property
+    def path(self) -> pathlib.Path:
+        """Returns the path of the manifest database"""
+        return self._path
+
+    def _execute(
+        self, statement: str, parameters: Iterable[typing.Any] = ()
+    ) -> list[tuple[typing.Any, ...]]:
+        """Execute a single statement as a transaction, returning any rows"""
+        with self._lock:
+            return self._connection.execute(statement, tuple(parameters)).fetchall()
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Generator[sqlite3.Connection]:
+        """Execute several statements as a single transaction"""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def add(
+        self,
+        object_type: str,
+        identifier: str,
+        *,
+        run: str | None = None,
+        kind: ManifestKind = "json",
+    ) -> None:
+        """Register a file written to the cache, if not already registered.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'runs'.
+        identifier : str
+            the offline identifier of the object, or name of the segment.
+        run : str | None, optional
+            the run the object belongs to, if any.
+        kind : 'json' | 'segment' | 'heartbeat', optional
+            the kind of file written, by default 'json'.
+        """
+        self._execute(
+            "INSERT INTO objects (object_type, identifier, kind, run) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING",
+            (object_type, identifier, kind, run),
+        )
+
+    def remove(
+        self, object_type: str, identifier: str, *, kind: ManifestKind = "json"
+    ) -> None:
+        """Remove the entry for an object from the manifest.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'runs'.
+        identifier : str
+            the offline identifier of the object, or name of the segment.
+        kind : 'json' | 'segment' | 'heartbeat', optional
+            the kind of file, by default 'json'.
+        """
+        self._execute(
+            "DELETE FROM objects WHERE object_type = ? AND kind = ? AND identifier = ?",
+            (object_type, kind, identifier),
+        )
+
+    def remove_all(
+        self,
+        object_type: str,
+        identifiers: Iterable[str],
+        *,
+        kind: ManifestKind = "json",
+    ) -> None:
+        """Remove the entries for several objects as a single transaction.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'metrics'.
+        identifiers : Iterable[str]
+            the offline identifiers of the objects.
+        kind : 'json' | 'segment' | 'heartbeat', optional
+            the kind of file, by default 'json'.
+        """
+        with self._transaction() as connection:
+            connection.executemany(
+                "DELETE FROM objects "
+                "WHERE object_type = ? AND kind = ? AND identifier = ?",
+                ((object_type, kind, identifier) for identifier in identifiers),
+            )
+
+    def set_state(
+        self,
+        object_type: str,
+        identifier: str,
+        state: ManifestState,
+        *,
+        kind: ManifestKind = "json",
+    ) -> None:
+        """Set the upload state of an object.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'runs'.
+        identifier : str
+            the offline identifier of the object.
+        state : 'pending' | 'failed'
+            the new upload state.
+        kind : 'json' | 'segment' | 'heartbeat', optional
+            the kind of file, by default 'json'.
+        """
+        self._execute(
+            "UPDATE objects SET state = ? "
+            "WHERE object_type = ? AND kind = ? AND identifier = ?",
+            (state, object_type, kind, identifier),
+        )
+
+    def record_failure(
+        self, object_type: str, identifier: str, *, kind: ManifestKind = "json"
+    ) -> int:
+        """Mark an object as failed, scheduling the next attempt to upload it.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'runs'.
+        identifier : str
+            the offline identifier of the object, or name of the segment.
+        kind : 'json' | 'segment' | 'heartbeat', optional
+            the kind of file, by default 'json'.
+
+        Returns
+        -------
+        int
+            the number of failed attempts to upload the object.
+        """
+        with self._transaction() as connection:
+            if not (
+                _rows := connection.execute(
+                    "SELECT attempts FROM objects "
+                    "WHERE object_type = ? AND kind = ? AND identifier = ?",
+                    (object_type, kind, identifier),
+                ).fetchall()
+            ):
+                return 0
+            ((_attempts,),) = _rows
+            _attempts += 1
+            connection.execute(
+                "UPDATE objects SET state = 'failed', attempts = ?, retry_at = ? "
+                "WHERE object_type = ? AND kind = ? AND identifier = ?",
+                (
+                    _attempts,
+                    math.inf
+                    if _attempts >= MAX_UPLOAD_ATTEMPTS
+                    else time.time() + retry_delay(_attempts),
+                    object_type,
+                    kind,
+                    identifier,
+                ),
+            )
+        return _attempts
+
+    def checkpoint(
+        self, object_type: str, identifier: str, *, kind: ManifestKind = "segment"
+    ) -> int | None:
+        """Returns the position up to which an object has been uploaded.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'metrics'.
+        identifier : str
+            the name of the segment.
+        kind : 'json' | 'segment' | 'heartbeat', optional
+            the kind of file, by default 'segment'.
+
+        Returns
+        -------
+        int | None
+            the recorded position, if any.
+        """
+        _rows = self._execute(
+            "SELECT checkpoint FROM objects "
+            "WHERE object_type = ? AND kind = ? AND identifier = ?",
+            (object_type, kind, identifier),
+        )
+        return _rows[0][0] if _rows else None
+
+    def set_checkpoint(
+        self,
+        object_type: str,
+        identifier: str,
+        checkpoint: int,
+        *,
+        kind: ManifestKind = "segment",
+    ) -> None:
+        """Record the position up to which an object has been uploaded.
+
+        Any failed attempts to upload the object are cleared.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'metrics'.
+        identifier : str
+            the name of the segment.
+        checkpoint : int
+            the position after the last uploaded record.
+        kind : 'json' | 'segment' | 'heartbeat', optional
+            the kind of file, by default 'segment'.
+        """
+        self._execute(
+            "UPDATE objects SET checkpoint = ?, state = 'pending', attempts = 0, "
+            "retry_at = 0 WHERE object_type = ? AND kind = ? AND identifier = ?",
+            (checkpoint, object_type, kind, identifier),
+        )
+
+    def identifiers(
+        self,
+        object_type: str,
+        *,
+        kind: ManifestKind = "json",
+        state: ManifestState | None = None,
+        retry_before: float | None = None,
+    ) -> list[str]:
+        """Returns the identifiers of objects of a given type.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'runs'.
+        kind : 'json' | 'segment' | 'heartbeat', optional
+            the kind of file, by default 'json'.
+        state : 'pending' | 'failed' | None, optional
+            only return objects in this state, by default all objects.
+        retry_before : float | None, optional
+            only return objects which have not failed, or are due to be
+            retried by this time, by default all objects.
+
+        Returns
+        -------
+        list[str]
+            identifiers of the matching objects.
+        """
+        return [
+            identifier
+            for identifier, _ in self.entries(
+                object_type, kind=kind, state=state, retry_before=retry_before
+            )
+        ]
+
+    def entries(
+        self,
+        object_type: str,
+        *,
+        kind: ManifestKind = "json",
+        state: ManifestState | None = None,
+        retry_before: float | None = None,
+    ) -> list[tuple[str, str | None]]:
+        """Returns the identifiers of objects of a given type with their run.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'metrics'.
+        kind : 'json' | 'segment' | 'heartbeat', optional
+            the kind of file, by default 'json'.
+        state : 'pending' | 'failed' | None, optional
+            only return objects in this state, by default all objects.
+        retry_before : float | None, optional
+            only return objects which have not failed, or are due to be
+            retried by this time, by default all objects.
+
+        Returns
+        -------
+        list[tuple[str, str | None]]
+            identifier of each matching object and the run it belongs to,
+            if known.
+        """
+        _statement: str = (
+            "SELECT identifier, run FROM objects WHERE object_type = ? AND kind = ?"
+        )
+        _parameters: tuple[typing.Any, ...] = (object_type, kind)
+
+        if state:
+            _statement += " AND state = ?"
+            _parameters += (state,)
+        if retry_before is not None:
+            _statement += " AND retry_at <= ?"
+            _parameters += (retry_before,)
+
+        return [
+            (identifier, run)
+            for identifier, run in self._execute(_statement, _parameters)
+        ]
+
+    def segments(
+        self, object_type: str, *, retry_before: float | None = None
+    ) -> dict[str, list[pathlib.Path]]:
+        """Returns the segment files for an object type grouped by run.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object held within the segments.
+        retry_before : float | None, optional
+            only return the segments for runs whose segments have not
+            failed, or are due to be retried by this time, by default
+            segments for all runs.
+
+        Returns
+        -------
+        dict[str, list[pathlib.Path]]
+            segment files for each run in the order they were written.
+        """
+        _segments: dict[str, list[pathlib.Path]] = {}
+        _excluded: set[str] = set()
+        for run, identifier, retry_at in self._execute(
+            "SELECT run, identifier, retry_at FROM objects "
+            "WHERE object_type = ? AND kind = 'segment' ORDER BY identifier",
+            (object_type,),
+        ):
+            if retry_before is not None and retry_at > retry_before:
+                # Segments for a run must be uploaded in order
+                _excluded.add(run)
+            _segments.setdefault(run, []).append(
+                self._cache_directory.joinpath(
+                    object_type, f"{identifier}{SEGMENT_SUFFIX}"
+                )
+            )
+        return {
+            run: segments for run, segments in _segments.items() if run not in _excluded
+        }
+
+    def count(self, object_type: str, *, kind: ManifestKind | None = None) -> int:
+        """Returns the number of objects of a given type.
+
+        Parameters
+        ----------
+        object_type : str
+            the type of object, e.g. 'runs'.
+        kind : 'json' | 'segment' | 'heartbeat' | None, optional
+            only count files of this kind, by default all kinds.
+
+        Returns
+        -------
+        int
+            number of entries within the manifest.
+        """
+        ((_count,),) = self._execute(
+            "SELECT COUNT(*) FROM objects WHERE object_type = ?"
+            + (" AND kind = ?" if kind else ""),
+            (object_type,) + ((kind,) if kind else ()),
+        )
+        return _count
+
+    def rebuild(self) -> None:
+        """Replace the contents of the manifest from a scan of the cache.
+
+        Used when the manifest is created for an existing cache, or to
+        recover files written by a process which did not update it. The
+        upload progress of objects already within the manifest is retained.
+        """
+        _entries: list[tuple[str, str, str, str | None]] = []
+
+        for kind, pattern in _KIND_PATTERNS.items():
+            for file in self._cache_directory.glob(pattern):
+                if kind == "heartbeat":
+                    _entries.append(("heartbeat", file.stem, kind, file.stem))
+                elif kind == "segment":
+                    _run, _ = file.stem.rsplit(".", 1)
+                    _entries.append((file.parent.name, file.stem, kind, _run))
+                else:
+                    _entries.append((file.parent.name, file.stem, kind, None))
+
+        _found: set[tuple[str, str, str]] = {
+            (object_type, kind, identifier)
+            for object_type, identifier, kind, _ in _entries
+        }
+
+        with self._transaction() as connection:
+            connection.executemany(
+                "DELETE FROM objects "
+                "WHERE object_type = ? AND kind = ? AND identifier = ?",
+                [
+                    key
+                    for key in connection.execute(
+                        "SELECT object_type, kind, identifier FROM objects"
+                    ).fetchall()
+                    if key not in _found
+                ],
+            )
+            connection.executemany(
+                "INSERT INTO objects (object_type, identifier, kind, run) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING",
+                _entries,
+            )
+
+
+class IdMapping(MutableMapping[str, str]):
+    """Mapping from offline to online identifiers persisted in the manifest.
+
+    Each instance is a session over the stored mapping, identifiers added
+    or retrieved within the session remaining available after they have
+    been forgotten by the store, e.g. once a run has been closed. As the
+    store may be shared by several sender processes, forgotten identifiers
+    are retired and only removed once the store is purged.
+    """
+
+    def __init__(self, manifest: CacheManifest) -> None:
+        """Initialise a session over the mapping stored in a cache manifest.
+
+        Parameters
+        ----------
+        manifest : CacheManifest
+            the manifest of the cache.
+        """
+        self._manifest: CacheManifest = manifest
+        self._session: dict[str, str] = {}
+
+    def __getitem__(self, offline_id: str) -> str:
+        if (_online_id := self._session.get(offline_id)) is not None:
+            return _online_id
+        if not (
+            _rows := self._manifest._execute(
+                "SELECT online_id FROM id_mapping WHERE offline_id = ?", (offline_id,)
+            )
+        ):
+            raise KeyError(offline_id)
+        ((_online_id,),) = _rows
+        self._session[offline_id] = _online_id
+        return _online_id
+
+    def __setitem__(self, offline_id: str, online_id: str) -> None:
+        self.update({offline_id: online_id})
+
+    def __delitem__(self, offline_id: str) -> None:
+        _ = self[offline_id]
+        self._manifest._execute(
+            "DELETE FROM id_mapping WHERE offline_id = ?", (offline_id,)
+        )
+        self._session.pop(offline_id, None)
+
+    def __iter__(self) -> Iterator[str]:
+        _stored: list[str] = [
+            offline_id
+            for (offline_id,) in self._manifest._execute(
+                "SELECT offline_id FROM id_mapping WHERE NOT retired"
+            )
+        ]
+        return iter(dict.fromkeys(_stored + list(self._session)))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def update(
+        self, mapping: Mapping[str, str] | Iterable[tuple[str, str]] = (), /, **kwargs
+    ) -> None:
+        """Add or replace several identifiers as a single transaction"""
+        _entries: dict[str, str] = dict(mapping, **kwargs)
+        with self._manifest._transaction() as connection:
+            connection.executemany(
+                "INSERT INTO id_mapping (offline_id, online_id) VALUES (?, ?) "
+                "ON CONFLICT (offline_id) DO UPDATE "
+                "SET online_id = excluded.online_id, retired = 0",
+                _entries.items(),
+            )
+        self._session |= _entries
+
+    def forget(self, offline_ids: Iterable[str]) -> None:
+        """Retire identifiers, retaining them for this session.
+
+        Retired identifiers are no longer listed, but can still be retrieved
+        by other sessions until the store is purged.
+
+        Parameters
+        ----------
+        offline_ids : Iterable[str]
+            the offline identifiers to retire.
+        """
+        with self._manifest._transaction() as connection:
+            connection.executemany(
+                "UPDATE id_mapping SET retired = 1 WHERE offline_id = ?",
+                ((offline_id,) for offline_id in offline_ids),
+            )
+
+    def purge(self) -> None:
+        """Remove all retired identifiers from the store"""
+        self._manifest._execute("DELETE FROM id_mapping WHERE retired")
+
+    def migrate(self, directory: pathlib.Path) -> None:
+        """Move identifiers stored as individual files into the store.
+
+        Earlier versions of Simvue stored each online identifier within a
+        file '<offline_id>.txt', these files being removed once read.
+
+        Parameters
+        ----------
+        directory : pathlib.Path
+            the directory containing the identifier files.
+        """
+        _files: list[pathlib.Path] = list(directory.glob("*.txt"))
+        self.update({file.stem: file.read_text() for file in _files})
+        for file in _files:
+            file.unlink()
+        with contextlib.suppress(OSError):
+            directory.rmdir()
+
+
+class ArtifactIndex:
+    """Content addressed index of the artifacts uploaded to a server.
+
+    Records the identifier of the artifact holding each file uploaded to a
+    server by checksum and name, such that an identical file saved by a
+    later run can be attached to the existing artifact rather than being
+    uploaded again. Entries which have not been used within a time to live
+    are expired, the least recently used entries being evicted once the
+    index exceeds a maximum size. Eviction runs periodically rather than on
+    every insertion, so the index may briefly exceed this size by up to a
+    tenth, or 100 entries, whichever is smaller.
+
+    The checksum of each indexed file is recorded along with its size and
+    modification time so that unchanged files need not be read again.
+    """
+
+    def __init__(
+        self,
+        manifest: CacheManifest,
+        server: str,
+        *,
+        ttl: float = ARTIFACT_INDEX_TTL,
+        max_entries: int = ARTIFACT_INDEX_SIZE,
+    ) -> None:
+        """Initialise the index of artifacts uploaded to a server.
+
+        Parameters
+        ----------
+        manifest : CacheManifest
+            the manifest of the cache holding the index.
+        server : str
+            the URL of the server the artifacts were uploaded to.
+        ttl : float, optional
+            time in seconds after which unused entries expire, default 7 days.
+        max_entries : int, optional
+            maximum number of artifacts and of file checksums retained,
+            default 10000.
+        """
+        self._manifest: CacheManifest = manifest
+        self._server: str = server
+        self._ttl: float = ttl
+        self._max_entries: int = max_entries
+        self._evict_interval: int = max(
+            1, min(ARTIFACT_INDEX_EVICT_INTERVAL, max_entries // 10)
+        )
+        self._inserts: dict[str, int] = {"artifacts": 0, "file_checksums": 0}
+
+    def get(self, checksum: str, name: str) -> str | None:
+        """Returns the identifier of the artifact for the given content, if known.
+
+        Parameters
+        ----------
+        checksum : str
+            the SHA-256 checksum of the artifact content.
+        name : str
+            the name of the artifact.
+
+        Returns
+        -------
+        str | None
+            the artifact identifier, or None if not indexed or expired.
+        """
+        _now: float = time.time()
+        with self._manifest._transaction() as connection:
+            if not (
+                _rows := connection.execute(
+                    "SELECT artifact_id FROM artifacts "
+                    "WHERE server = ? AND checksum = ? AND name = ? AND last_used >= ?",
+                    (self._server, checksum, name, _now - self._ttl),
+                ).fetchall()
+            ):
+                return None
+            connection.execute(
+                "UPDATE artifacts SET last_used = ? "
+                "WHERE server = ? AND checksum = ? AND name = ?",
+                (_now, self._server, checksum, name),
+            )
+        ((_artifact_id,),) = _rows
+        return _artifact_id
+
+    def add(self, checksum: str, name: str, artifact_id: str) -> None:
+        """Record the artifact holding the given content, evicting old entries.
+
+        Parameters
+        ----------
+        checksum : str
+            the SHA-256 checksum of the artifact content.
+        name : str
+            the name of the artifact.
+        artifact_id : str
+            the identifier of the artifact on the server.
+        """
+        with self._manifest._transaction() as connection:
+            connection.execute(
+                "INSERT INTO artifacts (server, checksum, name, artifact_id, last_used) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT DO UPDATE "
+                "SET artifact_id = excluded.artifact_id, last_used = excluded.last_used",
+                (self._server, checksum, name, artifact_id, time.time()),
+            )
+            self._evict(connection, "artifacts")
+
+    def discard(self, checksum: str, name: str) -> None:
+        """Remove the entry for content no longer held by the server"""
+        self._manifest._execute(
+            "DELETE FROM artifacts WHERE server = ? AND checksum = ? AND name = ?",
+            (self._server, checksum, name),
+        )
+
+    def file_checksum(self, file_path: pathlib.Path) -> str | None:
+        """Returns the recorded checksum of a file, if it is unchanged.
+
+        Parameters
+        ----------
+        file_path : pathlib.Path
+            the file to retrieve the checksum of.
+
+        Returns
+        -------
+        str | None
+            the checksum, or None if not recorded or the file has changed.
+        """
+        _stat: os.stat_result = file_path.stat()
+        _path: str = f"{file_path.absolute()}"
+        _now: float = time.time()
+        with self._manifest._transaction() as connection:
+            if not (
+                _rows := connection.execute(
+                    "SELECT checksum FROM file_checksums "
+                    "WHERE path = ? AND size = ? AND modified = ? AND last_used >= ?",
+                    (_path, _stat.st_size, _stat.st_mtime_ns, _now - self._ttl),
+                ).fetchall()
+            ):
+                return None
+            connection.execute(
+                "UPDATE file_checksums SET last_used = ? WHERE path = ?",
+                (_now, _path),
+            )
+        ((_checksum,),) = _rows
+        return _checksum
+
+    def add_file(self, file_path: pathlib.Path, checksum: str) -> None:
+        """Record the checksum of a file, evicting old entries.
+
+        Parameters
+        ----------
+        file_path : pathlib.Path
+            the file the checksum was calculated for.
+        checksum : str
+            the SHA-256 checksum of the file.
+        """
+        _stat: os.stat_result = file_path.stat()
+        with self._manifest._transaction() as connection:
+            connection.execute(
+                "INSERT INTO file_checksums (path, size, modified, checksum, last_used) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT DO UPDATE "
+                "SET size = excluded.size, modified = excluded.modified, "
+                "checksum = excluded.checksum, last_used = excluded.last_used",
+                (
+                    f"{file_path.absolute()}",
+                    _stat.st_size,
+                    _stat.st_mtime_ns,
+                    checksum,
+                    time.time(),
+                ),
+            )
+            self._evict(connection, "file_checksums")
+
+    def _evict(self, connection: sqlite3.Connection, table: str) -> None:
+        """Periodically remove expired entries and those least recently used"""
+        self._inserts[table] += 1
+        if self._inserts[table] < self._evict_interval:
+            return
+        self._inserts[table] = 0
+
+        # Both deletions use the index on the time of last use
+        connection.execute(
+            f"DELETE FROM {table} WHERE last_used < ?", (time.time() - self._ttl,)
+        )
+        connection.execute(
+            f"DELETE FROM {table} WHERE last_used < "
+            f"(SELECT last_used FROM {table} ORDER BY last_used DESC LIMIT 1 OFFSET ?)",
+            (self._max_entries - 1,),
+        )
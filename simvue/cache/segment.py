@@ -0,0 +1,366 @@
+"""
+Segmented Cache Log
+===================
+
+Append-only, length prefixed log files used to cache the high frequency
+data of a run, namely metrics, tensor metrics and events, in offline mode.
+
+Rather than a new JSON file being written for every dispatch, the data for
+each run and object type is appended as records to a rolling segment file,
+a new segment being started once the current one exceeds the maximum size.
+Each segment begins with a magic number and a header record identifying the
+run and object type, followed by records of the form:
+
+    <length: uint32> <crc32: uint32> <payload: MessagePack>
+
+A record of zero length marks the segment as sealed, no further records
+being written to it. A record which is incomplete, or whose checksum does
+not match, is treated as the end of the segment as it may still be in the
+process of being written.
+
+The payload of each record after the header may be compressed, the codec
+used being given within the header. Compression using zstd requires the
+'zstandard' package to be installed.
+"""
+
+import gzip
+import os
+import pathlib
+import struct
+import threading
+import typing
+import zlib
+
+from collections.abc import Callable, Generator
+
+import msgpack
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+if typing.TYPE_CHECKING:
+    from .manifest import CacheManifest
+
+SEGMENT_MAGIC: bytes = b"SVSG\x01"
+SEGMENT_SUFFIX: str = ".seg"
+RECORD_PREFIX: struct.Struct = struct.Struct("<II")
+
+FsyncPolicy = typing.Literal["never", "close", "always"]
+SegmentCodec = typing.Literal["none", "gzip", "zstd"]
+
+
+def _compressor(codec: SegmentCodec, level: int | None) -> Callable[[bytes], bytes]:
+    """Returns the function compressing record payloads using a codec"""
+    if codec == "gzip":
+        return lambda data: gzip.compress(
+            data, compresslevel=6 if level is None else level, mtime=0
+        )
+    if codec == "zstd":
+        if not zstandard:
+            raise ImportError(
+                "Compression of segments using zstd requires the 'zstandard' package"
+            )
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress
+    return lambda data: data
+
+
+def _decompressor(codec: SegmentCodec) -> Callable[[bytes], bytes]:
+    """Returns the function decompressing record payloads using a codec"""
+    if codec == "gzip":
+        return gzip.decompress
+    if codec == "zstd":
+        if not zstandard:
+            raise ValueError(
+                "Reading segments compressed using zstd requires "
+                "the 'zstandard' package"
+            )
+        return zstandard.ZstdDecompressor().decompress
+    if codec != "none":
+        raise ValueError(f"Unsupported segment codec '{codec}'")
+    return lambda data: data
+
+
+def segment_path(
+    directory: pathlib.Path, object_type: str, run: str, index: int
+) -> pathlib.Path:
+    """Returns the path of a segment file within the cache.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        the local cache directory.
+    object_type : str
+        the type of object held within the segment, e.g. 'metrics'.
+    run : str
+        the identifier of the run the data belongs to.
+    index : int
+        position of the segment within the log for this run.
+
+    Returns
+    -------
+    pathlib.Path
+        path of the segment file
+    """
+    return directory.joinpath(object_type, f"{run}.{index:06d}{SEGMENT_SUFFIX}")
+
+
+def segment_files(
+    directory: pathlib.Path, object_type: str
+) -> dict[str, list[pathlib.Path]]:
+    """Returns the segment files for an object type grouped by run.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        the local cache directory.
+    object_type : str
+        the type of object held within the segments.
+
+    Returns
+    -------
+    dict[str, list[pathlib.Path]]
+        segment files for each run in the order they were written.
+    """
+    _segments: dict[str, list[pathlib.Path]] = {}
+    for file in sorted(directory.glob(f"{object_type}/*{SEGMENT_SUFFIX}")):
+        _run, _ = file.stem.rsplit(".", 1)
+        _segments.setdefault(_run, []).append(file)
+    return _segments
+
+
+class SegmentReader:
+    """Reads the records from a single segment file."""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        """Open a segment for reading.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            path of the segment file.
+
+        Raises
+        ------
+        ValueError
+            if the file is not a valid segment, or its codec is unsupported.
+        """
+        self._path: pathlib.Path = path
+        self._sealed: bool = False
+        self._header: dict[str, typing.Any] = {}
+        self._data_offset: int = 0
+
+        with path.open("rb") as in_f:
+            if in_f.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+                raise ValueError(f"File '{path}' is not a Simvue cache segment")
+            if not (_payload := self._read_record(in_f)):
+                raise ValueError(f"Segment '{path}' has no header")
+            self._header = msgpack.unpackb(_payload, raw=False)
+            self._data_offset = in_f.tell()
+
+        self._decompress: Callable[[bytes], bytes] = _decompressor(
+            self._header.get("codec", "none")
+        )
+
+    @property
+    def path(self) -> pathlib.Path:
+        """Returns the path of the segment file"""
+        return self._path
+
+    @property
+    def run(self) -> str:
+        """Returns the identifier of the run the segment belongs to"""
+        return self._header["run"]
+
+    @property
+    def object_type(self) -> str:
+        """Returns the type of object held within the segment"""
+        return self._header["object_type"]
+
+    @property
+    def sealed(self) -> bool:
+        """Returns whether the end of a sealed segment has been read"""
+        return self._sealed
+
+    @property
+    def data_offset(self) -> int:
+        """Returns the position of the first record after the header"""
+        return self._data_offset
+
+    @staticmethod
+    def _read_record(in_f: typing.BinaryIO) -> bytes | None:
+        """Read the payload of a record, returning None if incomplete or corrupt.
+
+        An empty payload is returned for the record sealing the segment.
+        """
+        _prefix = in_f.read(RECORD_PREFIX.size)
+        if len(_prefix) < RECORD_PREFIX.size:
+            return None
+        _length, _checksum = RECORD_PREFIX.unpack(_prefix)
+        _payload = in_f.read(_length)
+        if len(_payload) < _length or zlib.crc32(_payload) != _checksum:
+            return None
+        return _payload
+
+    def records(
+        self, offset: int | None = None
+    ) -> Generator[tuple[dict[str, typing.Any], int]]:
+        """Iterate through the complete records within the segment.
+
+        Parameters
+        ----------
+        offset : int | None, optional
+            position to start reading from, as returned with a previous
+            record, by default the first record after the header.
+
+        Yields
+        ------
+        tuple[dict[str, Any], int]
+            the record and the position immediately after it.
+        """
+        with self._path.open("rb") as in_f:
+            in_f.seek(offset or self._data_offset)
+            while (_payload := self._read_record(in_f)) is not None:
+                if not _payload:
+                    self._sealed = True
+                    return
+                yield (
+                    msgpack.unpackb(self._decompress(_payload), raw=False),
+                    in_f.tell(),
+                )
+
+
+class SegmentWriter:
+    """Appends records to the rolling segment log of a run and object type."""
+
+    def __init__(
+        self,
+        *,
+        directory: pathlib.Path,
+        run: str,
+        object_type: str,
+        max_segment_size: int,
+        fsync: FsyncPolicy = "close",
+        codec: SegmentCodec = "none",
+        level: int | None = None,
+        manifest: "CacheManifest | None" = None,
+    ) -> None:
+        """Initialise a writer, segment files are created when first written.
+
+        Parameters
+        ----------
+        directory : pathlib.Path
+            the local cache directory.
+        run : str
+            the identifier of the run the data belongs to.
+        object_type : str
+            the type of object to be written, e.g. 'metrics'.
+        max_segment_size : int
+            size in bytes above which a new segment is started.
+        fsync : 'never' | 'close' | 'always', optional
+            when to force data to disk
+                * never - leave flushing to the operating system.
+                * close - when each segment is sealed (default).
+                * always - after every record.
+        codec : 'none' | 'gzip' | 'zstd', optional
+            compression applied to each record, by default 'none'.
+        level : int | None, optional
+            compression level, by default the default for the codec.
+        manifest : CacheManifest | None, optional
+            manifest of the cache in which to register each new segment.
+        """
+        self._directory: pathlib.Path = directory
+        self._run: str = run
+        self._object_type: str = object_type
+        self._max_segment_size: int = max_segment_size
+        self._fsync: FsyncPolicy = fsync
+        self._codec: SegmentCodec = codec
+        self._compress: Callable[[bytes], bytes] = _compressor(codec, level)
+        self._manifest: "CacheManifest | None" = manifest
+        self._lock: threading.Lock = threading.Lock()
+        self._file: typing.BinaryIO | None = None
+        self._size: int = 0
+        self._index: int = max(
+            (
+                int(file.stem.rsplit(".", 1)[1]) + 1
+                for file in segment_files(directory, object_type).get(run, [])
+            ),
+            default=0,
+        )
+
+    @property
+    def path(self) -> pathlib.Path:
+        """Returns the path of the segment currently being written"""
+        return segment_path(self._directory, self._object_type, self._run, self._index)
+
+    def _write(self, payload: bytes) -> None:
+        """Write a single record to the current segment"""
+        self._file.write(RECORD_PREFIX.pack(len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._size += RECORD_PREFIX.size + len(payload)
+
+    def _open(self) -> None:
+        """Start a new segment beginning with the header record"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("xb")
+        self._file.write(SEGMENT_MAGIC)
+        self._size = len(SEGMENT_MAGIC)
+        self._write(
+            msgpack.packb(
+                {
+                    "run": self._run,
+                    "object_type": self._object_type,
+                    "codec": self._codec,
+                },
+                use_bin_type=True,
+            )
+        )
+        self._file.flush()
+        if self._manifest:
+            self._manifest.add(
+                self._object_type, self.path.stem, run=self._run, kind="segment"
+            )
+
+    def _seal(self) -> None:
+        """Mark the current segment as complete and close it"""
+        self._file.write(RECORD_PREFIX.pack(0, 0))
+        self._file.flush()
+        if self._fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self._index += 1
+
+    def append(self, record: dict[str, typing.Any]) -> None:
+        """Append a record to the log.
+
+        Parameters
+        ----------
+        record : dict[str, Any]
+            MessagePack serialisable content to write.
+        """
+        _payload = msgpack.packb(record, use_bin_type=True)
+
+        with self._lock:
+            # Compressors are not safe for concurrent use
+            _payload = self._compress(_payload)
+            if (
+                self._file
+                and self._size + RECORD_PREFIX.size + len(_payload)
+                > self._max_segment_size
+            ):
+                self._seal()
+            if not self._file:
+                self._open()
+            self._write(_payload)
+            # Records must be visible to a sender reading the segment
+            self._file.flush()
+            if self._fsync == "always":
+                os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Seal the current segment, further records start a new segment"""
+        with self._lock:
+            if self._file:
+                self._seal()
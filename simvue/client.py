@@ -32,7 +32,11 @@ from .simvue_types import DeserializedContent
 from .utilities import check_extra, prettify_pydantic
 from .models import FOLDER_REGEX, NAME_REGEX
 from .config.user import SimvueConfiguration
-from .api.request import get_json_from_response
+from .api.request import (
+    configure_connection_pool,
+    get_json_from_response,
+    get_session,
+)
 from .api.objects import (
     Run,
     Folder,
@@ -85,6 +89,9 @@ class Client:
         self._user_config = SimvueConfiguration.fetch(
             server_token=server_token, server_url=server_url, mode="online"
         )
+        configure_connection_pool(
+            pool_size=self._user_config.client.connection_pool_size
+        )
 
         for label, value in zip(
             ("URL", "API token"),
@@ -761,7 +768,9 @@ class Client:
             "max_points": max_points,
         }
 
-        metrics_response: requests.Response = requests.get(
+        metrics_response: requests.Response = get_session(
+            f"{self._user_config.server.url}"
+        ).get(
             f"{self._user_config.server.url}/metrics",
             headers=self._headers,
             params=params,
@@ -1004,7 +1013,7 @@ class Client:
             "count": count_limit or 0,
         }
 
-        response = requests.get(
+        response = get_session(f"{self._user_config.server.url}").get(
             f"{self._user_config.server.url}/events",
             headers=self._headers,
             params=params,
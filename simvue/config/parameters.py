@@ -6,6 +6,7 @@ Pydantic models for elements of the Simvue configuration file
 
 """
 
+import importlib.util
 import logging
 import os
 import time
@@ -53,6 +54,10 @@ class ServerSpecifications(pydantic.BaseModel):
 
 class OfflineSpecifications(pydantic.BaseModel):
     cache: pathlib.Path | None = None
+    segment_size: pydantic.PositiveInt = 16 * 1024 * 1024
+    segment_fsync: typing.Literal["never", "close", "always"] = "close"
+    segment_compression: typing.Literal["none", "gzip", "zstd"] = "none"
+    segment_compression_level: int | None = None
 
     @pydantic.field_validator("cache")
     @classmethod
@@ -65,6 +70,13 @@ class OfflineSpecifications(pydantic.BaseModel):
             raise AssertionError(f"'{cache.parent}' is not a writable location.")
         return cache
 
+    @pydantic.field_validator("segment_compression")
+    @classmethod
+    def check_compression_available(cls, codec: str) -> str:
+        if codec == "zstd" and not importlib.util.find_spec("zstandard"):
+            raise ValueError("Compression using zstd requires the 'zstandard' package.")
+        return codec
+
 
 class MetricsSpecifications(pydantic.BaseModel):
     system_metrics_interval: pydantic.PositiveInt | None = -1
@@ -83,3 +95,9 @@ class DefaultRunSpecifications(pydantic.BaseModel):
 
 class ClientGeneralOptions(pydantic.BaseModel):
     debug: bool = False
+    connection_pool_size: pydantic.PositiveInt = 10
+    artifact_deduplication: bool = True
+    artifact_index_ttl: pydantic.PositiveInt = 7 * 24 * 60 * 60
+    artifact_index_size: pydantic.PositiveInt = 10000
+    artifact_upload_workers: pydantic.PositiveInt = 4
+    artifact_queue_bytes: pydantic.PositiveInt = 512 * 1024 * 1024
@@ -9,6 +9,7 @@ Pydantic model for the Simvue TOML configuration file
 import functools
 import logging
 import os
+import threading
 import typing
 import http
 import pathlib
@@ -45,6 +46,21 @@ logger = logging.getLogger(__name__)
 SIMVUE_SERVER_UPPER_CONSTRAINT: semver.Version | None = semver.Version.parse("2.0.0")
 SIMVUE_SERVER_LOWER_CONSTRAINT: semver.Version | None = semver.Version.parse("1.1.0")
 
+# Environment variables which affect the result of SimvueConfiguration.fetch
+CONFIG_ENVIRONMENT_VARIABLES: tuple[str, ...] = (
+    "SIMVUE_SERVER_PROFILE",
+    "SIMVUE_OFFLINE_DIRECTORY",
+    "SIMVUE_URL",
+    "SIMVUE_TOKEN",
+    "SIMVUE_NO_SERVER_CHECK",
+)
+
+_configuration_cache: dict[
+    tuple[typing.Any, ...],
+    tuple[tuple[tuple[str, int] | None, ...], "SimvueConfiguration"],
+] = {}
+_configuration_cache_lock: threading.Lock = threading.Lock()
+
 
 class SimvueConfiguration(pydantic.BaseModel):
     # Hide values as they contain token and URL
@@ -172,6 +188,34 @@ class SimvueConfiguration(pydantic.BaseModel):
 
         return self
 
+    @classmethod
+    def _source_files(cls) -> tuple[tuple[str, int] | None, ...]:
+        """Returns the path and modification time of each configuration file used"""
+        _pyproject_toml: pathlib.Path | None = sv_util.find_first_instance_of_file(
+            file_names=["pyproject.toml"], check_user_space=False
+        )
+        try:
+            _config_file: pathlib.Path | None = cls.config_file()
+        except FileNotFoundError:
+            _config_file = None
+
+        _sources: list[tuple[str, int] | None] = []
+        for _file in (_pyproject_toml, _config_file):
+            try:
+                _sources.append(
+                    (f"{_file}", os.stat(_file).st_mtime_ns) if _file else None
+                )
+            except FileNotFoundError:
+                _sources.append(None)
+        return tuple(_sources)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Discard all configurations cached by 'fetch'"""
+        with _configuration_cache_lock:
+            _configuration_cache.clear()
+        cls.config_file.cache_clear()
+
     @classmethod
     @sv_util.prettify_pydantic
     def fetch(
@@ -186,6 +230,12 @@ class SimvueConfiguration(pydantic.BaseModel):
         Will retrieve the configuration options set for this project either using
         local or global configurations.
 
+        Configurations are cached for the process keyed on the arguments,
+        relevant environment variables and working directory. A cached
+        configuration is reloaded if a configuration file has since been
+        created, modified or removed, or the offline cache directory no
+        longer exists. Each call returns a separate copy of the configuration.
+
         Parameters
         ----------
         server_url : str | URL, optional
@@ -206,6 +256,56 @@ class SimvueConfiguration(pydantic.BaseModel):
             object containing configurations
 
         """
+        _key: tuple[typing.Any, ...] = (
+            mode,
+            f"{server_url}" if server_url else None,
+            server_token.get_secret_value()
+            if isinstance(server_token, pydantic.SecretStr)
+            else server_token,
+            profile,
+            tuple(
+                os.environ.get(variable) for variable in CONFIG_ENVIRONMENT_VARIABLES
+            ),
+            os.getcwd(),
+        )
+        _sources = cls._source_files()
+
+        with _configuration_cache_lock:
+            _cached_sources, _config = _configuration_cache.get(_key, (None, None))
+
+        if (
+            not _config
+            or _cached_sources != _sources
+            or not pathlib.Path(_config.offline.cache).is_dir()
+        ):
+            _config = cls._load(
+                mode=mode,
+                server_url=server_url,
+                server_token=server_token,
+                profile=profile,
+            )
+            with _configuration_cache_lock:
+                _configuration_cache[_key] = (_sources, _config)
+
+        # Callers may modify the options within each section, so each
+        # receives its own copy of every section
+        return _config.model_copy(
+            update={
+                name: getattr(_config, name).model_copy()
+                for name, value in _config
+                if isinstance(value, pydantic.BaseModel)
+            }
+        )
+
+    @classmethod
+    def _load(
+        cls,
+        mode: typing.Literal["offline", "online", "disabled"],
+        server_url: str | None = None,
+        server_token: str | None = None,
+        profile: str | None = None,
+    ) -> "SimvueConfiguration":
+        """Load the Simvue configuration from files and environment, see 'fetch'"""
         _config_dict: dict[str, dict[str, str]] = cls._load_pyproject_configs() or {}
 
         profile = os.environ.get("SIMVUE_SERVER_PROFILE", profile)
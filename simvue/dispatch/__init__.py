@@ -10,8 +10,23 @@ if typing.TYPE_CHECKING:
     from .base import DispatcherBaseClass
     from threading import Event
 
+from .artifact import ArtifactQueue
 from .queued import QueuedDispatcher
 from .direct import DirectDispatcher
+from .rate import AdaptiveRateController
+from .scheduled import ScheduledDispatcher
+from .shared import shared_dispatch_loop, shared_heartbeat_loop
+
+__all__ = [
+    "AdaptiveRateController",
+    "ArtifactQueue",
+    "DirectDispatcher",
+    "Dispatcher",
+    "QueuedDispatcher",
+    "ScheduledDispatcher",
+    "shared_dispatch_loop",
+    "shared_heartbeat_loop",
+]
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +38,9 @@ def Dispatcher(
     termination_trigger: "Event",
     name: str | None = None,
     thresholds: dict[str, int | float] | None = None,
+    latency_targets: dict[str, float] | None = None,
+    columnar_types: list[str] | None = None,
+    rate_controller: AdaptiveRateController | None = None,
 ) -> "DispatcherBaseClass":
     """Returns instance of dispatcher based on configuration
 
@@ -48,6 +66,15 @@ def Dispatcher(
         if metadata is provided during item addition, specify
         thresholds under which dispatch of an item is permitted,
         default is None
+    latency_targets : dict[str, float] | None, default None
+        for a QueuedDispatcher, the maximum time in seconds items in
+        each queue should wait before being dispatched, default is None
+    columnar_types : list[str] | None, default None
+        for a QueuedDispatcher, the categories of scalar metrics to hold
+        in a columnar ring buffer, default is None
+    rate_controller : AdaptiveRateController | None, default None
+        for a QueuedDispatcher, controller used to tune the flush interval
+        and buffer size of each queue, default is None
 
     Returns
     -------
@@ -70,4 +97,7 @@ def Dispatcher(
             termination_trigger=termination_trigger,
             name=name,
             thresholds=thresholds,
+            latency_targets=latency_targets,
+            columnar_types=columnar_types,
+            rate_controller=rate_controller,
         )
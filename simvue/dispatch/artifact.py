@@ -0,0 +1,159 @@
+"""
+Artifact Queue
+==============
+
+The ArtifactQueue uploads artifacts on background threads such that saving
+a file or object does not block the caller for the duration of the transfer.
+
+The total size of the artifacts which have been queued but not yet uploaded
+is limited, a caller adding an artifact waiting until sufficient uploads have
+completed. An artifact larger than this limit is accepted once the queue is
+empty.
+"""
+
+import concurrent.futures
+import logging
+import threading
+import typing
+
+ARTIFACT_QUEUE_BYTES: int = 512 * 1024 * 1024
+ARTIFACT_QUEUE_WORKERS: int = 4
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactQueue:
+    """Upload artifacts in the background with a limit on the bytes in flight.
+
+    Each item is a callable performing the registration and upload of a
+    single artifact. Failures are recorded rather than raised, being
+    retrieved via 'pop_errors' once the queue has been drained.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = ARTIFACT_QUEUE_BYTES,
+        max_workers: int = ARTIFACT_QUEUE_WORKERS,
+        name: str | None = None,
+    ) -> None:
+        """Initialise a new artifact queue
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            maximum total size of artifacts queued or being uploaded,
+            default is 512MiB.
+        max_workers : int, optional
+            maximum number of artifacts uploaded concurrently, default 4.
+        name : str | None, optional
+            prefix for the names of the upload threads, default None
+        """
+        self._max_bytes: int = max_bytes
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name or "artifact_queue"
+        )
+        self._condition: threading.Condition = threading.Condition()
+        self._in_flight_bytes: int = 0
+        self._pending: int = 0
+        self._errors: list[str] = []
+        self._closed: bool = False
+
+    @property
+    def in_flight_bytes(self) -> int:
+        """Returns the total size of artifacts queued or being uploaded"""
+        with self._condition:
+            return self._in_flight_bytes
+
+    @property
+    def pending(self) -> int:
+        """Returns the number of artifacts queued or being uploaded"""
+        with self._condition:
+            return self._pending
+
+    def pop_errors(self) -> list[str]:
+        """Returns a description of each failed upload since last called"""
+        with self._condition:
+            _errors, self._errors = self._errors, []
+        return _errors
+
+    def put(self, upload: typing.Callable[[], None], *, label: str, size: int) -> None:
+        """Queue an artifact for upload.
+
+        Blocks whilst adding the artifact would exceed the limit on the
+        total size of artifacts in flight.
+
+        Parameters
+        ----------
+        upload : Callable[[], None]
+            performs the registration and upload of the artifact
+        label : str
+            name of the artifact, used when reporting failures
+        size : int
+            size of the artifact in bytes
+
+        Raises
+        ------
+        RuntimeError
+            if the queue has been closed
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"Cannot queue artifact '{label}', queue is closed")
+            if self._pending and self._in_flight_bytes + size > self._max_bytes:
+                logger.debug(
+                    "Waiting for %d bytes of artifacts to upload before queuing '%s'",
+                    self._in_flight_bytes,
+                    label,
+                )
+            self._condition.wait_for(
+                lambda: (
+                    not self._pending or self._in_flight_bytes + size <= self._max_bytes
+                )
+            )
+            self._in_flight_bytes += size
+            self._pending += 1
+
+        self._executor.submit(self._upload, upload, label, size)
+
+    def _upload(self, upload: typing.Callable[[], None], label: str, size: int) -> None:
+        """Upload an artifact, recording any failure"""
+        try:
+            upload()
+        except Exception as e:
+            logger.error("Failed to upload artifact '%s': %s", label, e)
+            with self._condition:
+                self._errors.append(f"'{label}': {e}")
+        finally:
+            with self._condition:
+                self._in_flight_bytes -= size
+                self._pending -= 1
+                self._condition.notify_all()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for all queued artifacts to be uploaded.
+
+        Parameters
+        ----------
+        timeout : float | None, optional
+            maximum time in seconds to wait, by default wait indefinitely
+
+        Returns
+        -------
+        bool
+            whether the queue was drained within the timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending, timeout)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting artifacts, stopping the upload threads once all are uploaded.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            whether to wait for queued artifacts to be uploaded, default True.
+        """
+        with self._condition:
+            self._closed = True
+        self._executor.shutdown(wait=wait)
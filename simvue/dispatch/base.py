@@ -3,6 +3,10 @@ import abc
 import typing
 
 from simvue.exception import ObjectDispatchError
+from .columnar import format_timestamp
+
+if typing.TYPE_CHECKING:
+    import numpy
 
 
 class DispatcherBaseClass(abc.ABC):
@@ -71,6 +75,99 @@ class DispatcherBaseClass(abc.ABC):
                     label=key, threshold=threshold, value=metadata[key]
                 )
 
+    def add_metrics(
+        self,
+        values: dict[str, int | float],
+        *,
+        object_type: str,
+        step: int,
+        time: float,
+        timestamp: float,
+        metadata: dict[str, int | float] | None = None,
+        **kwargs,
+    ) -> None:
+        """Add a set of scalar metric values to the dispatcher.
+
+        By default the values are combined into a single item, dispatchers
+        supporting columnar queues can store them without this conversion.
+
+        Parameters
+        ----------
+        values : dict[str, int | float]
+            metric values keyed by metric name
+        object_type : str
+            category of item
+        step : int
+            step for these values
+        time : float
+            time in seconds for these values
+        timestamp : float
+            UTC time since the epoch in seconds for these values
+        metadata : dict[str, int | float] | None, optional
+            additional metadata relating to the item to be
+            used for threshold comparisons
+        """
+        self.add_item(
+            {
+                "values": values,
+                "time": time,
+                "timestamp": format_timestamp(timestamp),
+                "step": step,
+            },
+            object_type=object_type,
+            metadata=metadata,
+            **kwargs,
+        )
+
+    def add_metrics_batch(
+        self,
+        values: dict[str, "numpy.ndarray"],
+        *,
+        object_type: str,
+        step: "numpy.ndarray",
+        time: "numpy.ndarray",
+        timestamp: "numpy.ndarray",
+        metadata: dict[str, int | float] | None = None,
+        **kwargs,
+    ) -> None:
+        """Add many sets of scalar metric values to the dispatcher.
+
+        By default each index of the arrays is added as a separate set
+        of metric values.
+
+        Parameters
+        ----------
+        values : dict[str, numpy.ndarray]
+            one dimensional arrays of metric values keyed by metric name
+        object_type : str
+            category of item
+        step : numpy.ndarray
+            step for each set of values
+        time : numpy.ndarray
+            time in seconds for each set of values
+        timestamp : numpy.ndarray
+            UTC time since the epoch in seconds for each set of values
+        metadata : dict[str, int | float] | None, optional
+            additional metadata relating to each set of values to be
+            used for threshold comparisons
+        """
+        _names: list[str] = list(values)
+        for _step, _time, _timestamp, *_values in zip(
+            step.tolist(),
+            time.tolist(),
+            timestamp.tolist(),
+            *(array.tolist() for array in values.values()),
+        ):
+            self.add_metrics(
+                dict(zip(_names, _values)),
+                object_type=object_type,
+                step=_step,
+                time=_time,
+                timestamp=_timestamp,
+                metadata=metadata,
+                **kwargs,
+            )
+
     @abc.abstractmethod
     def run(self) -> None:
         """Start the dispatcher."""
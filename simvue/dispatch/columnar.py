@@ -0,0 +1,379 @@
+"""
+Columnar Metric Queue
+=====================
+
+Provides a preallocated, NumPy backed ring buffer for scalar metrics. Rather
+than building a dictionary for every call to log metrics and pushing it into
+a ``queue.Queue``, each metric value is written as a row into a set of
+columns (entry, step, time, timestamp, metric identifier and value). The
+dispatcher then removes all pending rows in a single slice operation.
+
+Producers and the consumer never share a lock, the consumer only ever reads
+rows which have been published by advancing the head counter, and producers
+only overwrite rows which have been released by advancing the tail counter.
+"""
+
+import datetime
+import threading
+import typing
+
+import numpy
+
+from simvue.exception import ObjectDispatchError
+from simvue.models import DATETIME_FORMAT
+
+QUEUE_CAPACITY: int = 2**16
+FULL_QUEUE_POLL_INTERVAL: float = 0.1
+
+
+class MetricBatch:
+    """A contiguous set of rows removed from a ``ColumnarMetricQueue``.
+
+    Each column is a NumPy array of equal length, with rows which were
+    added in the same call sharing the same entry index.
+    """
+
+    def __init__(
+        self,
+        *,
+        entry: numpy.ndarray,
+        step: numpy.ndarray,
+        time: numpy.ndarray,
+        timestamp: numpy.ndarray,
+        metric_id: numpy.ndarray,
+        value: numpy.ndarray,
+        metric_names: list[str],
+    ) -> None:
+        """Initialise a batch from column arrays.
+
+        Parameters
+        ----------
+        entry : numpy.ndarray
+            index of the addition each row belongs to
+        step : numpy.ndarray
+            step for each row
+        time : numpy.ndarray
+            time in seconds for each row
+        timestamp : numpy.ndarray
+            UTC time since the epoch in seconds for each row
+        metric_id : numpy.ndarray
+            index of the metric name within 'metric_names' for each row
+        value : numpy.ndarray
+            metric value for each row
+        metric_names : list[str]
+            lookup table of metric names
+        """
+        self.entry = entry
+        self.step = step
+        self.time = time
+        self.timestamp = timestamp
+        self.metric_id = metric_id
+        self.value = value
+        self.metric_names = metric_names
+
+    def __len__(self) -> int:
+        """Returns the number of rows in the batch"""
+        return len(self.value)
+
+    def __repr__(self) -> str:
+        """Returns a summary of the batch"""
+        return f"{self.__class__.__name__}(rows={len(self)})"
+
+    def entry_bounds(self) -> numpy.ndarray:
+        """Returns the row index at which each entry starts, plus the total row count"""
+        _boundaries = numpy.flatnonzero(numpy.diff(self.entry)) + 1
+        return numpy.concatenate(([0], _boundaries, [len(self)]))
+
+    def to_metric_sets(self) -> list[dict[str, typing.Any]]:
+        """Convert the batch into metric set dictionaries.
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            one dictionary per entry containing 'values', 'time',
+            'timestamp' and 'step' as expected by the server
+        """
+        _bounds = self.entry_bounds().tolist()
+        _starts = _bounds[:-1]
+        _names = self.metric_names
+        _pairs = [
+            (_names[i], value)
+            for i, value in zip(self.metric_id.tolist(), self.value.tolist())
+        ]
+
+        return [
+            {
+                "values": dict(_pairs[start:end]),
+                "time": time,
+                "timestamp": timestamp,
+                "step": step,
+            }
+            for start, end, step, time, timestamp in zip(
+                _starts,
+                _bounds[1:],
+                self.step[_starts].tolist(),
+                self.time[_starts].tolist(),
+                format_timestamps(self.timestamp[_starts]).tolist(),
+            )
+        ]
+
+
+def format_timestamp(timestamp: float) -> str:
+    """Convert a UTC time since the epoch into a Simvue timestamp string"""
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime(
+        DATETIME_FORMAT
+    )
+
+
+def format_timestamps(timestamps: numpy.ndarray) -> numpy.ndarray:
+    """Convert an array of UTC times since the epoch into Simvue timestamp strings"""
+    return numpy.datetime_as_string(
+        numpy.rint(timestamps * 1e6).astype("datetime64[us]"), unit="us"
+    )
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """Convert a Simvue timestamp string into UTC time since the epoch"""
+    return (
+        datetime.datetime.strptime(timestamp, DATETIME_FORMAT)
+        .replace(tzinfo=datetime.timezone.utc)
+        .timestamp()
+    )
+
+
+class ColumnarMetricQueue:
+    """Ring buffer of scalar metric rows stored in NumPy columns.
+
+    Rows are written at the head of the buffer and removed from the tail,
+    both being monotonically increasing counters whose positions within the
+    arrays are found by masking with the capacity.
+    """
+
+    def __init__(self, capacity: int = QUEUE_CAPACITY) -> None:
+        """Initialise a new columnar queue.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            maximum number of rows held, rounded up to a power of two,
+            default is 65536.
+        """
+        self._capacity: int = 1 << max(capacity - 1, 1).bit_length()
+        self._mask: int = self._capacity - 1
+        self._entry: numpy.ndarray = numpy.zeros(self._capacity, dtype=numpy.int64)
+        self._step: numpy.ndarray = numpy.zeros(self._capacity, dtype=numpy.int64)
+        self._time: numpy.ndarray = numpy.zeros(self._capacity, dtype=numpy.float64)
+        self._timestamp: numpy.ndarray = numpy.zeros(
+            self._capacity, dtype=numpy.float64
+        )
+        self._metric_id: numpy.ndarray = numpy.zeros(self._capacity, dtype=numpy.int32)
+        self._value: numpy.ndarray = numpy.zeros(self._capacity, dtype=numpy.float64)
+        self._metric_names: list[str] = []
+        self._metric_ids: dict[str, int] = {}
+        self._head: int = 0
+        self._tail: int = 0
+        self._entry_count: int = 0
+
+        # Producers serialise with each other (a run logs both from the user
+        # thread and the heartbeat thread), the consumer never takes this lock
+        self._producer_lock: threading.Lock = threading.Lock()
+        self._consumer_lock: threading.Lock = threading.Lock()
+        self._space_available: threading.Event = threading.Event()
+
+    @property
+    def capacity(self) -> int:
+        """Returns the maximum number of rows the queue can hold"""
+        return self._capacity
+
+    def qsize(self) -> int:
+        """Returns the number of rows currently held"""
+        return self._head - self._tail
+
+    def empty(self) -> bool:
+        """Returns if the queue holds no rows"""
+        return self._head == self._tail
+
+    def _metric_index(self, name: str) -> int:
+        """Returns the identifier for a metric name, registering it if new"""
+        if (_index := self._metric_ids.get(name)) is None:
+            _index = len(self._metric_names)
+            self._metric_names.append(name)
+            self._metric_ids[name] = _index
+        return _index
+
+    def _row_index(self, counter: int, n_rows: int) -> slice | numpy.ndarray:
+        """Returns the array positions of rows starting from the given counter"""
+        _start: int = counter & self._mask
+        _end: int = _start + n_rows
+        if _end <= self._capacity:
+            return slice(_start, _end)
+        return numpy.arange(_start, _end) & self._mask
+
+    def _wait_for_space(self, n_rows: int, block: bool) -> None:
+        """Wait until the given number of rows can be written"""
+        while self._capacity - self.qsize() < n_rows:
+            if not block:
+                raise ObjectDispatchError(
+                    label="queued rows",
+                    threshold=self._capacity,
+                    value=self.qsize() + n_rows,
+                )
+            self._space_available.clear()
+            if self._capacity - self.qsize() < n_rows:
+                self._space_available.wait(timeout=FULL_QUEUE_POLL_INTERVAL)
+
+    def append(
+        self,
+        values: dict[str, int | float],
+        *,
+        step: int,
+        time: float,
+        timestamp: float,
+        block: bool = True,
+    ) -> None:
+        """Append a set of metric values sharing the same step and time.
+
+        Parameters
+        ----------
+        values : dict[str, int | float]
+            metric values keyed by metric name
+        step : int
+            step for these values
+        time : float
+            time in seconds for these values
+        timestamp : float
+            UTC time since the epoch in seconds for these values
+        block : bool, optional
+            if the queue is full wait for space rather than raising
+            an ObjectDispatchError, default is True
+        """
+        if (_n_rows := len(values)) > self._capacity:
+            raise ObjectDispatchError(
+                label="row count", threshold=self._capacity, value=_n_rows
+            )
+
+        with self._producer_lock:
+            self._wait_for_space(_n_rows, block)
+
+            _rows = self._row_index(self._head, _n_rows)
+            self._metric_id[_rows] = [self._metric_index(name) for name in values]
+            self._value[_rows] = list(values.values())
+            self._entry[_rows] = self._entry_count
+            self._step[_rows] = step
+            self._time[_rows] = time
+            self._timestamp[_rows] = timestamp
+
+            # Publish the rows only once they have been fully written
+            self._entry_count += 1
+            self._head += _n_rows
+
+    def extend(
+        self,
+        values: dict[str, numpy.ndarray],
+        *,
+        step: numpy.ndarray,
+        time: numpy.ndarray,
+        timestamp: numpy.ndarray,
+        block: bool = True,
+    ) -> None:
+        """Append many sets of metric values in a single operation.
+
+        Each index of the arrays forms one entry, equivalent to a call
+        to 'append' with the values of every metric at that index.
+
+        Parameters
+        ----------
+        values : dict[str, numpy.ndarray]
+            one dimensional arrays of metric values keyed by metric name,
+            all arrays must have the same length as 'step'
+        step : numpy.ndarray
+            step for each entry
+        time : numpy.ndarray
+            time in seconds for each entry
+        timestamp : numpy.ndarray
+            UTC time since the epoch in seconds for each entry
+        block : bool, optional
+            if the queue is full wait for space rather than raising
+            an ObjectDispatchError, default is True
+        """
+        _n_metrics: int = len(values)
+        _n_entries: int = len(step)
+
+        if (_n_rows := _n_metrics * _n_entries) > self._capacity:
+            raise ObjectDispatchError(
+                label="row count", threshold=self._capacity, value=_n_rows
+            )
+
+        with self._producer_lock:
+            self._wait_for_space(_n_rows, block)
+
+            # Rows are ordered by entry, then by metric within each entry
+            _rows = self._row_index(self._head, _n_rows)
+            self._metric_id[_rows] = numpy.tile(
+                [self._metric_index(name) for name in values], _n_entries
+            )
+            self._value[_rows] = numpy.column_stack(list(values.values())).ravel()
+            self._entry[_rows] = numpy.repeat(
+                numpy.arange(self._entry_count, self._entry_count + _n_entries),
+                _n_metrics,
+            )
+            self._step[_rows] = numpy.repeat(step, _n_metrics)
+            self._time[_rows] = numpy.repeat(time, _n_metrics)
+            self._timestamp[_rows] = numpy.repeat(timestamp, _n_metrics)
+
+            self._entry_count += _n_entries
+            self._head += _n_rows
+
+    def drain(self, max_rows: int | None = None) -> MetricBatch:
+        """Remove rows from the queue in a single operation.
+
+        Parameters
+        ----------
+        max_rows : int | None, optional
+            maximum number of rows to remove, default is all rows.
+
+        Returns
+        -------
+        MetricBatch
+            copy of the removed rows
+        """
+        with self._consumer_lock:
+            _n_rows: int = self.qsize()
+            if max_rows is not None:
+                _n_rows = min(_n_rows, max_rows)
+
+            _rows = self._row_index(self._tail, _n_rows)
+
+            # Avoid splitting the values of a single entry across batches
+            # unless that entry alone exceeds the maximum
+            if (
+                _n_rows < self.qsize()
+                and self._entry[(self._tail + _n_rows) & self._mask]
+                == self._entry[_rows][-1]
+            ):
+                _entries: numpy.ndarray = self._entry[_rows]
+                if _cut := int(numpy.argmax(_entries == _entries[-1])):
+                    _n_rows = _cut
+                    _rows = self._row_index(self._tail, _n_rows)
+
+            # Basic slices are views, copy before the rows are released
+            _batch = MetricBatch(
+                entry=self._entry[_rows].copy(),
+                step=self._step[_rows].copy(),
+                time=self._time[_rows].copy(),
+                timestamp=self._timestamp[_rows].copy(),
+                metric_id=self._metric_id[_rows].copy(),
+                value=self._value[_rows].copy(),
+                metric_names=self._metric_names,
+            )
+            self._tail += _n_rows
+
+        self._space_available.set()
+
+        return _batch
+
+    def purge(self) -> None:
+        """Discard all rows currently held"""
+        with self._consumer_lock:
+            self._tail = self._head
+        self._space_available.set()
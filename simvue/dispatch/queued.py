@@ -5,6 +5,13 @@ Queue Dispatcher
 The QueueDispatcher provides a queue based system for execution of a callback on
 a list of parameters. The purpose of the class is to apply constraints to how
 often the callback can be executed, and the number of items it is called on.
+
+Rather than polling the queues at a fixed interval, the dispatcher thread sleeps
+on a condition variable and is only woken when an item arrives in an idle queue,
+a queue fills its buffer, or the flush deadline for a queue expires.
+
+The flush interval and buffer size can optionally be tuned during execution
+by an AdaptiveRateController.
 """
 
 import logging
@@ -15,10 +22,17 @@ import typing
 import contextlib
 
 from .base import DispatcherBaseClass
+from .columnar import ColumnarMetricQueue, MetricBatch
+from .rate import AdaptiveRateController
+
+if typing.TYPE_CHECKING:
+    import numpy
 
 MAX_REQUESTS_PER_SECOND: float = 1.0
 MAX_BUFFER_SIZE: int = 16000
 QUEUE_SIZE = 10000
+LINGER_TIME: float = 0.1
+MAX_IDLE_WAIT: float = 5.0
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +43,17 @@ class QueuedDispatcher(threading.Thread, DispatcherBaseClass):
     on items within a queue. Multiple queues can be defined with the dispatch
     of each being executed in series. Items are added to a buffer which is handed
     to the callback.
+
+    Each queue has a latency target, the maximum time an item should wait
+    before being dispatched, which also acts as the minimum interval between
+    consecutive dispatches of a partially filled buffer. A queue whose buffer
+    is full is dispatched immediately.
+
+    Queues for scalar metrics can be columnar, in which case values are
+    added via 'add_metrics' and the callback receives a MetricBatch.
+
+    If a rate controller is assigned it sets the buffer size of every queue
+    and the latency target of any queue without an explicit target.
     """
 
     def __init__(
@@ -41,6 +66,10 @@ class QueuedDispatcher(threading.Thread, DispatcherBaseClass):
         max_buffer_size: int = MAX_BUFFER_SIZE,
         max_read_rate: float = MAX_REQUESTS_PER_SECOND,
         thresholds: dict[str, int | float] | None = None,
+        latency_targets: dict[str, float] | None = None,
+        linger: float = LINGER_TIME,
+        columnar_types: list[str] | None = None,
+        rate_controller: AdaptiveRateController | None = None,
     ) -> None:
         """
         Initialise a new queue based dispatcher
@@ -59,11 +88,28 @@ class QueuedDispatcher(threading.Thread, DispatcherBaseClass):
         max_buffer_size : int
             maximum number of items allowed in created buffer.
         max_read_rate : float
-            maximum rate at which the callback can be executed
+            maximum rate at which the callback can be executed for a
+            queue which has not filled its buffer, this defines the
+            latency target for any queue not specified in 'latency_targets'.
         thresholds: dict[str, int | float] | None, optional
             if metadata is provided during item addition, specify
             thresholds within which a single dispatch is permitted,
             default is None
+        latency_targets : dict[str, float] | None, optional
+            maximum time in seconds an item in a given queue should wait
+            before being dispatched, default is None (use 1 / max_read_rate).
+        linger : float, optional
+            time in seconds to wait after an item arrives in an idle queue
+            before dispatching so that items logged together are sent together,
+            default is 0.1s.
+        columnar_types : list[str] | None, optional
+            labels of queues which hold scalar metrics in a columnar
+            ring buffer, the size of these queues is the number of metric
+            values rather than the number of items, default is None.
+        rate_controller : AdaptiveRateController | None, optional
+            controller used to tune the buffer size and latency target of
+            each queue from the outcome of each dispatch, default is None
+            (use the fixed 'max_buffer_size' and 'max_read_rate').
         """
         DispatcherBaseClass.__init__(
             self,
@@ -74,14 +120,29 @@ class QueuedDispatcher(threading.Thread, DispatcherBaseClass):
         )
         super().__init__(name=name, daemon=True)
 
+        if _unknown := (set(latency_targets or {}) | set(columnar_types or [])) - set(
+            object_types
+        ):
+            raise KeyError(f"No queue(s) {', '.join(sorted(_unknown))} found")
+
         self._termination_trigger: threading.Event = termination_trigger
         self._callback: typing.Callable[[list[typing.Any], str], None] = callback
-        self._queues: dict[str, queue.Queue[typing.Any]] = {
-            label: queue.Queue() for label in object_types
+        self._queues: dict[str, queue.Queue[typing.Any] | ColumnarMetricQueue] = {
+            label: ColumnarMetricQueue()
+            if label in (columnar_types or [])
+            else queue.Queue()
+            for label in object_types
         }
         self._max_read_rate: float = max_read_rate
         self._max_buffer_size: int = max_buffer_size
-        self._send_timer: int = 0
+        self._latency_targets: dict[str, float] = latency_targets or {}
+        self._linger: float = linger
+        self._rate_controller: AdaptiveRateController | None = rate_controller
+        self._condition: threading.Condition = threading.Condition()
+        self._last_dispatch: dict[str, float] = {label: 0 for label in object_types}
+        self._first_enqueued: dict[str, float | None] = {
+            label: None for label in object_types
+        }
 
     def add_item(
         self,
@@ -93,6 +154,99 @@ class QueuedDispatcher(threading.Thread, DispatcherBaseClass):
     ) -> None:
         """Add an item to the specified queue with/without blocking"""
         super().add_item(item, object_type=object_type, metadata=metadata)
+        self._check_can_add(item, object_type)
+
+        if isinstance(self._queues[object_type], ColumnarMetricQueue):
+            raise TypeError(
+                f"Queue '{object_type}' is columnar, use 'add_metrics' instead"
+            )
+
+        with self._condition:
+            self._queues[object_type].put((item, metadata or {}), block=blocking)
+            self._notify_added(object_type)
+
+    def add_metrics(
+        self,
+        values: dict[str, int | float],
+        *,
+        object_type: str,
+        step: int,
+        time: float,
+        timestamp: float,
+        blocking: bool = True,
+        metadata: dict[str, int | float] | None = None,
+    ) -> None:
+        """Add scalar metric values to the specified queue with/without blocking"""
+        if not isinstance(_queue := self._queues.get(object_type), ColumnarMetricQueue):
+            return super().add_metrics(
+                values,
+                object_type=object_type,
+                step=step,
+                time=time,
+                timestamp=timestamp,
+                blocking=blocking,
+                metadata=metadata,
+            )
+
+        DispatcherBaseClass.add_item(
+            self, values, object_type=object_type, metadata=metadata
+        )
+        self._check_can_add(values, object_type)
+
+        # Rows are written outside of the condition lock so that producers
+        # never wait on the dispatcher, only notification requires it
+        _queue.append(values, step=step, time=time, timestamp=timestamp, block=blocking)
+
+        with self._condition:
+            self._notify_added(object_type)
+
+    def add_metrics_batch(
+        self,
+        values: dict[str, "numpy.ndarray"],
+        *,
+        object_type: str,
+        step: "numpy.ndarray",
+        time: "numpy.ndarray",
+        timestamp: "numpy.ndarray",
+        blocking: bool = True,
+        metadata: dict[str, int | float] | None = None,
+    ) -> None:
+        """Add many sets of scalar metric values to the specified queue.
+
+        For a columnar queue the values are written in chunks of at most half
+        the queue capacity, the dispatcher being woken after each chunk.
+        """
+        if not isinstance(_queue := self._queues.get(object_type), ColumnarMetricQueue):
+            return super().add_metrics_batch(
+                values,
+                object_type=object_type,
+                step=step,
+                time=time,
+                timestamp=timestamp,
+                blocking=blocking,
+                metadata=metadata,
+            )
+
+        DispatcherBaseClass.add_item(
+            self, values, object_type=object_type, metadata=metadata
+        )
+        self._check_can_add(list(values), object_type)
+
+        _chunk_size: int = max(1, _queue.capacity // (2 * max(1, len(values))))
+
+        for i in range(0, len(step), _chunk_size):
+            _queue.extend(
+                {name: array[i : i + _chunk_size] for name, array in values.items()},
+                step=step[i : i + _chunk_size],
+                time=time[i : i + _chunk_size],
+                timestamp=timestamp[i : i + _chunk_size],
+                block=blocking,
+            )
+            with self._condition:
+                self._notify_added(object_type)
+
+    def _check_can_add(self, item: typing.Any, object_type: str) -> None:
+        """Raise an exception if items can no longer be added to the given queue"""
         if self._termination_trigger.is_set():
             raise RuntimeError(
                 f"Cannot append item '{item}' to queue '{object_type}', "
@@ -100,7 +254,21 @@ class QueuedDispatcher(threading.Thread, DispatcherBaseClass):
             )
         if object_type not in self._queues:
             raise KeyError(f"No queue '{object_type}' found")
-        self._queues[object_type].put((item, metadata or {}), block=blocking)
+
+    def _notify_added(self, object_type: str) -> None:
+        """Wake the dispatcher if an addition changes when it next needs to run.
+
+        This is the case if the queue was idle or its buffer is now full.
+        """
+        if self._first_enqueued[object_type] is None:
+            self._first_enqueued[object_type] = time.time()
+            self._wake()
+        elif self._queues[object_type].qsize() >= self.buffer_size(object_type):
+            self._wake()
+
+    def _wake(self) -> None:
+        """Wake the dispatcher, must be called holding the condition lock"""
+        self._condition.notify()
 
     @property
     def empty(self) -> bool:
@@ -109,29 +277,127 @@ class QueuedDispatcher(threading.Thread, DispatcherBaseClass):
 
     def purge(self) -> None:
         """Purge all queues"""
-        for q in self._queues.values():
-            while not q.empty():
-                with contextlib.suppress(queue.Empty):
-                    q.get(block=False)
-                q.task_done()
+        with self._condition:
+            for label, q in self._queues.items():
+                if isinstance(q, ColumnarMetricQueue):
+                    q.purge()
+                else:
+                    while not q.empty():
+                        with contextlib.suppress(queue.Empty):
+                            q.get(block=False)
+                        q.task_done()
+                self._first_enqueued[label] = None
+            self._condition.notify()
+
+    def join(self, timeout: float | None = None) -> None:
+        """Wake the dispatcher so termination is handled, then wait for it."""
+        with self._condition:
+            self._condition.notify()
+        super().join(timeout)
 
     @property
-    def _can_send(self) -> bool:
-        """Returns if time constraints are satisfied, hence the callback can be executed"""
-        return time.time() - self._send_timer >= 1 / self._max_read_rate
+    def rate_controller(self) -> AdaptiveRateController | None:
+        """Returns the controller tuning dispatch, if any"""
+        return self._rate_controller
+
+    @rate_controller.setter
+    def rate_controller(self, rate_controller: AdaptiveRateController | None) -> None:
+        """Set the controller tuning dispatch, None to use fixed values"""
+        with self._condition:
+            self._rate_controller = rate_controller
+            self._condition.notify()
+
+    def buffer_size(self, queue_label: str) -> int:
+        """Returns the maximum number of items dispatched at once for a queue.
+
+        Parameters
+        ----------
+        queue_label : str
+            label of the queue
+
+        Returns
+        -------
+        int
+            maximum buffer size
+        """
+        if self._rate_controller:
+            return self._rate_controller.batch_size(queue_label)
+        return self._max_buffer_size
+
+    def latency_target(self, queue_label: str) -> float:
+        """Returns the maximum time items in the given queue should wait.
+
+        Parameters
+        ----------
+        queue_label : str
+            label of the queue
+
+        Returns
+        -------
+        float
+            latency target in seconds
+        """
+        if queue_label in self._latency_targets:
+            return self._latency_targets[queue_label]
+        if self._rate_controller:
+            return self._rate_controller.interval(queue_label)
+        return 1 / self._max_read_rate
 
-    def _create_buffer(self, queue_label: str) -> list[typing.Any]:
+    def _dispatch_time(self, queue_label: str) -> float | None:
+        """Returns the time at which the given queue is next due for dispatch"""
+        if self._queues[queue_label].empty():
+            return None
+
+        _first_enqueued: float = self._first_enqueued[queue_label] or time.time()
+
+        if self._termination_trigger.is_set() or self._queues[
+            queue_label
+        ].qsize() >= self.buffer_size(queue_label):
+            return _first_enqueued
+
+        return max(
+            self._last_dispatch[queue_label] + self.latency_target(queue_label),
+            _first_enqueued + self._linger,
+        )
+
+    def _ready_queues(self) -> list[str]:
+        """Returns the labels of all queues currently due for dispatch"""
+        _now: float = time.time()
+        return [
+            label
+            for label in self._queues
+            if (_dispatch_time := self._dispatch_time(label)) is not None
+            and _dispatch_time <= _now
+        ]
+
+    def _wait_timeout(self) -> float:
+        """Returns how long the dispatcher can sleep before a queue is due"""
+        _dispatch_times: list[float] = [
+            _dispatch_time
+            for label in self._queues
+            if (_dispatch_time := self._dispatch_time(label)) is not None
+        ]
+        if not _dispatch_times:
+            return MAX_IDLE_WAIT
+        return max(0.0, min(min(_dispatch_times) - time.time(), MAX_IDLE_WAIT))
+
+    def _create_buffer(self, queue_label: str) -> list[typing.Any] | MetricBatch:
         """Assemble queue items into a list as an argument to the callback
 
-        The length of the buffer is constrained.
+        The length of the buffer is constrained. For columnar queues the
+        rows are removed in a single operation.
         """
+        if isinstance(_queue := self._queues[queue_label], ColumnarMetricQueue):
+            return _queue.drain(self.buffer_size(queue_label))
+
         _buffer: list[typing.Any] = []
+        _buffer_size: int = self.buffer_size(queue_label)
         _criteria: dict[str, int | float] = {}
         _threshold_totals: dict[str, float] = {k: 0 for k in self._thresholds}
 
         while (
             not self._queues[queue_label].empty()
-            and len(_buffer) < self._max_buffer_size
+            and len(_buffer) < _buffer_size
             and all(
                 _threshold_totals[key] < self._thresholds[key]
                 for key in _threshold_totals
@@ -148,26 +414,68 @@ class QueuedDispatcher(threading.Thread, DispatcherBaseClass):
 
         return _buffer
 
+    def _execute(
+        self, buffer: list[typing.Any] | MetricBatch, queue_label: str
+    ) -> None:
+        """Execute the callback on a buffer, reporting the outcome to any controller"""
+        if not (_controller := self._rate_controller):
+            self._callback(buffer, queue_label)
+            return
+
+        _throttled: int = _controller.throttle_count()
+        _start: float = time.monotonic()
+        self._callback(buffer, queue_label)
+        _controller.record(
+            queue_label,
+            latency=time.monotonic() - _start,
+            queue_depth=self._queues[queue_label].qsize(),
+            throttled=_controller.throttle_count() - _throttled,
+        )
+        logger.debug(
+            "Rate controller set '%s' flush interval to %ss and buffer size to %s",
+            queue_label,
+            _controller.interval(queue_label),
+            _controller.batch_size(queue_label),
+        )
+
+    def _dispatch(self, queue_label: str) -> None:
+        """Execute the callback on the contents of the given queue.
+
+        Buffers are created until the queue no longer holds a full buffer,
+        any remainder waits for the next dispatch window.
+        """
+        while _buffer := self._create_buffer(queue_label):
+            logger.debug("Executing '%s' callback on buffer %s", queue_label, _buffer)
+            self._execute(_buffer, queue_label)
+            if (
+                self._queues[queue_label].qsize() < self.buffer_size(queue_label)
+                and not self._termination_trigger.is_set()
+            ):
+                break
+
+        with self._condition:
+            self._last_dispatch[queue_label] = time.time()
+            self._first_enqueued[queue_label] = (
+                None
+                if self._queues[queue_label].empty()
+                else self._last_dispatch[queue_label]
+            )
+
     def run(self) -> None:
         """Execute the dispatcher action
 
-        The action consists of a loop in which each queue is processed to
+        The action consists of a loop in which the dispatcher sleeps until
+        at least one queue is due for dispatch. Each due queue is processed to
         create a buffer with number of entries equal or less than the maximum
         size. These are then passed into the assigned callback.
 
-        Depending on whether the user has specified to abort on trigger either
-        the loop will continue after termination until all queues are empty,
-        or abort immediately.
+        Once termination is triggered all queues are dispatched immediately
+        until they are empty.
         """
         while not self._termination_trigger.is_set() or not self.empty:
-            time.sleep(0.1)
-            if not self._can_send:
-                continue
-
-            for queue_label in self._queues:
-                if _buffer := self._create_buffer(queue_label):
-                    logger.debug(
-                        f"Executing '{queue_label}' callback on buffer {_buffer}"
-                    )
-                    self._callback(_buffer, queue_label)
-            self._send_timer = time.time()
+            with self._condition:
+                if not self._termination_trigger.is_set() and not self._ready_queues():
+                    self._condition.wait(timeout=self._wait_timeout())
+
+            for queue_label in self._ready_queues():
+                self._dispatch(queue_label)
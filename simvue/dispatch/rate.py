@@ -0,0 +1,210 @@
+"""
+Adaptive Rate Control
+=====================
+
+Provides an additive increase, multiplicative decrease (AIMD) controller which
+sets the flush interval and batch size of each queue in a QueuedDispatcher
+from the outcome of previous dispatches.
+
+After each dispatch the controller is given the time taken by the callback,
+the number of responses in which the server asked the client to slow down
+(HTTP 429 or 503) and the number of items still waiting in the queue:
+
+* if the server throttled the client the flush rate is halved and the batch
+  size increased, sending the same data in fewer requests.
+* if the dispatch exceeded the latency target both the flush rate and the
+  batch size are halved.
+* otherwise the flush rate is increased by a fixed amount, and if items were
+  left waiting in the queue so is the batch size.
+"""
+
+import threading
+import typing
+
+MIN_FLUSH_INTERVAL: float = 0.1
+MAX_FLUSH_INTERVAL: float = 30.0
+MIN_BATCH_SIZE: int = 100
+MAX_BATCH_SIZE: int = 64000
+TARGET_LATENCY: float = 1.0
+RATE_INCREMENT: float = 0.1
+BATCH_INCREMENT: int = 1000
+DECREASE_FACTOR: float = 0.5
+
+
+class AdaptiveRateController:
+    """Tunes the flush interval and batch size for each dispatcher queue.
+
+    All values are held per queue label, a queue not yet seen by the
+    controller uses the initial interval and batch size.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_interval: float = 1.0,
+        initial_batch_size: int = 16000,
+        min_interval: float = MIN_FLUSH_INTERVAL,
+        max_interval: float = MAX_FLUSH_INTERVAL,
+        min_batch_size: int = MIN_BATCH_SIZE,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        target_latency: float = TARGET_LATENCY,
+        rate_increment: float = RATE_INCREMENT,
+        batch_increment: int = BATCH_INCREMENT,
+        decrease_factor: float = DECREASE_FACTOR,
+        throttle_counter: typing.Callable[[], int] | None = None,
+    ) -> None:
+        """Initialise a new rate controller.
+
+        Parameters
+        ----------
+        initial_interval : float, optional
+            flush interval in seconds before any dispatch has been observed,
+            default is 1s.
+        initial_batch_size : int, optional
+            batch size before any dispatch has been observed, default is 16000.
+        min_interval : float, optional
+            shortest flush interval in seconds, default is 0.1s.
+        max_interval : float, optional
+            longest flush interval in seconds, default is 30s.
+        min_batch_size : int, optional
+            smallest batch size, default is 100.
+        max_batch_size : int, optional
+            largest batch size, default is 64000.
+        target_latency : float, optional
+            time in seconds within which a single dispatch is expected
+            to complete, default is 1s.
+        rate_increment : float, optional
+            flushes per second added to the flush rate after a successful
+            dispatch, default is 0.1.
+        batch_increment : int, optional
+            items added to the batch size after a successful dispatch which
+            left items in the queue, default is 1000.
+        decrease_factor : float, optional
+            factor applied to the flush rate or batch size on a decrease,
+            default is 0.5.
+        throttle_counter : Callable[[], int] | None, optional
+            function returning the number of throttling responses received
+            so far by the calling thread, default is None (throttling is
+            not monitored).
+        """
+        if not 0 < decrease_factor < 1:
+            raise ValueError("Decrease factor must be between 0 and 1")
+        if min_interval > max_interval or min_batch_size > max_batch_size:
+            raise ValueError("Minimum values cannot exceed maximum values")
+
+        self._initial_interval: float = min(
+            max(initial_interval, min_interval), max_interval
+        )
+        self._initial_batch_size: int = min(
+            max(initial_batch_size, min_batch_size), max_batch_size
+        )
+        self._min_interval: float = min_interval
+        self._max_interval: float = max_interval
+        self._min_batch_size: int = min_batch_size
+        self._max_batch_size: int = max_batch_size
+        self._target_latency: float = target_latency
+        self._rate_increment: float = rate_increment
+        self._batch_increment: int = batch_increment
+        self._decrease_factor: float = decrease_factor
+        self._throttle_counter: typing.Callable[[], int] | None = throttle_counter
+
+        self._lock: threading.Lock = threading.Lock()
+        self._intervals: dict[str, float] = {}
+        self._batch_sizes: dict[str, int] = {}
+        self._latencies: dict[str, float] = {}
+        self._throttled: dict[str, int] = {}
+        self._increases: dict[str, int] = {}
+        self._decreases: dict[str, int] = {}
+
+    def interval(self, queue_label: str) -> float:
+        """Returns the current flush interval in seconds for a queue"""
+        return self._intervals.get(queue_label, self._initial_interval)
+
+    def batch_size(self, queue_label: str) -> int:
+        """Returns the current batch size for a queue"""
+        return self._batch_sizes.get(queue_label, self._initial_batch_size)
+
+    def throttle_count(self) -> int:
+        """Returns the number of throttling responses seen by the calling thread"""
+        return self._throttle_counter() if self._throttle_counter else 0
+
+    def record(
+        self,
+        queue_label: str,
+        *,
+        latency: float,
+        queue_depth: int,
+        throttled: int = 0,
+    ) -> None:
+        """Update the flush interval and batch size after a dispatch.
+
+        Parameters
+        ----------
+        queue_label : str
+            label of the queue which was dispatched
+        latency : float
+            time in seconds taken to execute the callback
+        queue_depth : int
+            number of items left in the queue after the dispatch
+        throttled : int, optional
+            number of throttling responses received during the dispatch,
+            default is 0.
+        """
+        with self._lock:
+            _rate: float = 1 / self.interval(queue_label)
+            _batch_size: int = self.batch_size(queue_label)
+
+            _decrease: bool = bool(throttled) or latency > self._target_latency
+
+            if throttled:
+                _rate *= self._decrease_factor
+                _batch_size += self._batch_increment
+                self._throttled[queue_label] = (
+                    self._throttled.get(queue_label, 0) + throttled
+                )
+            elif latency > self._target_latency:
+                _rate *= self._decrease_factor
+                _batch_size = int(_batch_size * self._decrease_factor)
+            else:
+                _rate += self._rate_increment
+                if queue_depth > 0:
+                    _batch_size += self._batch_increment
+
+            _interval: float = min(
+                max(1 / _rate, self._min_interval), self._max_interval
+            )
+            _batch_size = min(
+                max(_batch_size, self._min_batch_size), self._max_batch_size
+            )
+
+            _decisions = self._decreases if _decrease else self._increases
+            _decisions[queue_label] = _decisions.get(queue_label, 0) + 1
+
+            self._intervals[queue_label] = _interval
+            self._batch_sizes[queue_label] = _batch_size
+            self._latencies[queue_label] = latency
+
+    def metrics(self) -> dict[str, int | float]:
+        """Returns metrics describing the decisions made for each queue.
+
+        Returns
+        -------
+        dict[str, int | float]
+            for each dispatched queue the current flush interval and batch
+            size, the latency of the last dispatch, the total number of
+            throttling responses, and the number of times the flush rate
+            was increased and decreased.
+        """
+        with self._lock:
+            return {
+                f"dispatch/{label}.{key}": value
+                for label in self._latencies
+                for key, value in (
+                    ("flush_interval", self._intervals[label]),
+                    ("batch_size", self._batch_sizes[label]),
+                    ("latency", self._latencies[label]),
+                    ("throttled", self._throttled.get(label, 0)),
+                    ("increases", self._increases.get(label, 0)),
+                    ("decreases", self._decreases.get(label, 0)),
+                )
+            }
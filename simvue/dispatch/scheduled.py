@@ -0,0 +1,92 @@
+"""
+Scheduled Dispatcher
+====================
+
+A QueuedDispatcher which does not run its own thread, dispatch instead being
+performed by an external scheduler, such as an asyncio event loop, calling
+'dispatch_ready' whenever it is woken or the wait timeout expires. This allows
+many dispatchers to be driven by a small, shared set of workers.
+"""
+
+import threading
+import typing
+
+from .queued import QueuedDispatcher
+
+
+class ScheduledDispatcher(QueuedDispatcher):
+    """Queued dispatcher driven by an external scheduler.
+
+    The queues, buffer sizes and latency targets behave as for a
+    QueuedDispatcher, but the scheduler is notified via the 'wake'
+    callback rather than a condition variable.
+    """
+
+    def __init__(
+        self,
+        *,
+        wake: typing.Callable[[], None],
+        **kwargs: typing.Any,
+    ) -> None:
+        """Initialise a new scheduled dispatcher.
+
+        Parameters
+        ----------
+        wake : Callable[[], None]
+            thread safe function called when the scheduler should
+            check the dispatcher before its wait timeout expires.
+        **kwargs
+            arguments passed to QueuedDispatcher.
+        """
+        super().__init__(**kwargs)
+        self._wake_callback: typing.Callable[[], None] = wake
+        self._dispatch_lock: threading.Lock = threading.Lock()
+        self._scheduled: bool = False
+
+    def _wake(self) -> None:
+        """Notify the scheduler"""
+        self._wake_callback()
+
+    def start(self) -> None:
+        """Mark the dispatcher as active, no thread is created"""
+        self._scheduled = True
+
+    def is_alive(self) -> bool:
+        """Returns if the dispatcher is active"""
+        return self._scheduled
+
+    @property
+    def finished(self) -> bool:
+        """Returns if termination was triggered and all items dispatched"""
+        return self._termination_trigger.is_set() and self.empty
+
+    def run(self) -> None:
+        """Dispatch is performed by the scheduler, not a thread"""
+        raise RuntimeError("Scheduled dispatchers are not executed as a thread")
+
+    def wait_timeout(self) -> float:
+        """Returns how long the scheduler can wait before a queue is due"""
+        with self._condition:
+            return self._wait_timeout()
+
+    def dispatch_ready(self) -> None:
+        """Execute the callback on all queues currently due for dispatch"""
+        with self._dispatch_lock:
+            for queue_label in self._ready_queues():
+                self._dispatch(queue_label)
+
+    def join(self, timeout: float | None = None) -> None:
+        """Dispatch all remaining items in the calling thread if terminating.
+
+        Parameters
+        ----------
+        timeout : float | None, optional
+            unused, present for compatibility with QueuedDispatcher.
+        """
+        with self._dispatch_lock:
+            while self._termination_trigger.is_set() and not self.empty:
+                for queue_label in self._ready_queues():
+                    self._dispatch(queue_label)
+        if self._termination_trigger.is_set():
+            self._scheduled = False
+            self._wake()
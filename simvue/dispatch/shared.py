@@ -0,0 +1,217 @@
+"""
+Shared Dispatch
+===============
+
+Process wide loops which serve many runs from a fixed number of threads.
+
+The SharedDispatchLoop drives any number of ScheduledDispatchers from a single
+thread, sleeping until one of them is woken by a new item or a queue is due
+for dispatch. The SharedHeartbeatLoop executes the heartbeat of every
+registered run from a single scheduling thread, handing each heartbeat to a
+small pool of workers so that slow resource measurements for one run do not
+delay the others.
+
+Both loops exit once nothing remains registered, and are restarted by the
+next registration.
+"""
+
+import logging
+import threading
+import time
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .queued import MAX_IDLE_WAIT
+from .scheduled import ScheduledDispatcher
+
+HEARTBEAT_POLL_INTERVAL: float = 1.0
+HEARTBEAT_WORKERS: int = 4
+
+logger = logging.getLogger(__name__)
+
+
+class SharedDispatchLoop:
+    """Single thread dispatching the queues of many ScheduledDispatchers"""
+
+    def __init__(self) -> None:
+        """Initialise a new shared dispatch loop"""
+        self._dispatchers: list[ScheduledDispatcher] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._wake_event: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def dispatchers(self) -> list[ScheduledDispatcher]:
+        """Returns the dispatchers currently served by the loop"""
+        with self._lock:
+            return list(self._dispatchers)
+
+    def wake(self) -> None:
+        """Wake the loop, called by dispatchers when an item is added"""
+        self._wake_event.set()
+
+    def register(self, dispatcher: ScheduledDispatcher) -> ScheduledDispatcher:
+        """Serve a dispatcher until it has been terminated and emptied.
+
+        Parameters
+        ----------
+        dispatcher : ScheduledDispatcher
+            dispatcher to serve, created with this loop's 'wake' method.
+
+        Returns
+        -------
+        ScheduledDispatcher
+            the registered dispatcher
+        """
+        with self._lock:
+            self._dispatchers.append(dispatcher)
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name="simvue_shared_dispatch"
+                )
+                self._thread.start()
+        self.wake()
+        return dispatcher
+
+    def _active_dispatchers(self) -> list[ScheduledDispatcher]:
+        """Remove finished dispatchers, returning those remaining"""
+        with self._lock:
+            self._dispatchers = [
+                dispatcher
+                for dispatcher in self._dispatchers
+                if not dispatcher.finished
+            ]
+            if not self._dispatchers:
+                self._thread = None
+            return list(self._dispatchers)
+
+    def _run(self) -> None:
+        """Dispatch all due queues then sleep until the next is due"""
+        while _dispatchers := self._active_dispatchers():
+            self._wake_event.clear()
+
+            for dispatcher in _dispatchers:
+                try:
+                    dispatcher.dispatch_ready()
+                except Exception:
+                    logger.exception("Error during shared dispatch")
+
+            self._wake_event.wait(
+                timeout=min(
+                    [MAX_IDLE_WAIT]
+                    + [dispatcher.wait_timeout() for dispatcher in _dispatchers]
+                )
+            )
+
+
+class SharedHeartbeatLoop:
+    """Single thread scheduling the heartbeats of many runs"""
+
+    def __init__(
+        self,
+        poll_interval: float = HEARTBEAT_POLL_INTERVAL,
+        max_workers: int = HEARTBEAT_WORKERS,
+    ) -> None:
+        """Initialise a new shared heartbeat loop.
+
+        Parameters
+        ----------
+        poll_interval : float, optional
+            interval in seconds between calls to each heartbeat,
+            default is 1s.
+        max_workers : int, optional
+            maximum number of heartbeats executed at once, default is 4.
+        """
+        self._poll_interval: float = poll_interval
+        self._max_workers: int = max_workers
+        self._heartbeats: dict[
+            typing.Callable[[], None], tuple[threading.Event, Future | None]
+        ] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def size(self) -> int:
+        """Returns the number of heartbeats currently scheduled"""
+        with self._lock:
+            return len(self._heartbeats)
+
+    def register(
+        self,
+        heartbeat: typing.Callable[[], None],
+        termination_trigger: threading.Event,
+    ) -> None:
+        """Call a heartbeat at the poll interval until its trigger is set.
+
+        Parameters
+        ----------
+        heartbeat : Callable[[], None]
+            function to call, a call is skipped if the previous call
+            has not yet completed.
+        termination_trigger : threading.Event
+            event which when set removes the heartbeat from the loop.
+        """
+        with self._lock:
+            self._heartbeats[heartbeat] = (termination_trigger, None)
+            if not self._thread or not self._thread.is_alive():
+                self._executor = self._executor or ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="simvue_shared_heartbeat",
+                )
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name="simvue_shared_heartbeat"
+                )
+                self._thread.start()
+
+    @staticmethod
+    def _execute(heartbeat: typing.Callable[[], None]) -> None:
+        """Call a heartbeat logging any exception"""
+        try:
+            heartbeat()
+        except Exception:
+            logger.exception("Error during shared heartbeat")
+
+    def _run(self) -> None:
+        """Submit each heartbeat which is not already executing"""
+        while True:
+            with self._lock:
+                self._heartbeats = {
+                    heartbeat: (trigger, future)
+                    for heartbeat, (trigger, future) in self._heartbeats.items()
+                    if not trigger.is_set()
+                }
+                if not self._heartbeats:
+                    self._thread = None
+                    return
+
+                try:
+                    self._heartbeats = {
+                        heartbeat: (
+                            trigger,
+                            future
+                            if future and not future.done()
+                            else self._executor.submit(self._execute, heartbeat),
+                        )
+                        for heartbeat, (trigger, future) in self._heartbeats.items()
+                    }
+                except RuntimeError:
+                    # No new work is accepted once the interpreter is exiting
+                    self._thread = None
+                    return
+
+            time.sleep(self._poll_interval)
+
+
+_dispatch_loop: SharedDispatchLoop = SharedDispatchLoop()
+_heartbeat_loop: SharedHeartbeatLoop = SharedHeartbeatLoop()
+
+
+def shared_dispatch_loop() -> SharedDispatchLoop:
+    """Returns the dispatch loop shared by all runs in the process"""
+    return _dispatch_loop
+
+
+def shared_heartbeat_loop() -> SharedHeartbeatLoop:
+    """Returns the heartbeat loop shared by all runs in the process"""
+    return _heartbeat_loop
@@ -6,12 +6,16 @@ Main class for recording metrics and information to Simvue during code execution
 This forms the central API for users.
 """
 
+import concurrent.futures
 import contextlib
+import gzip
 import logging
 import pathlib
 import mimetypes
 import multiprocessing.synchronize
 import shlex
+import tarfile
+import tempfile
 import threading
 import warnings
 import humanfriendly
@@ -38,14 +42,24 @@ import psutil
 from simvue.api.objects.alert.base import AlertBase
 from simvue.api.objects.alert.fetch import Alert
 from simvue.api.objects.folder import Folder
-from simvue.api.objects.grids import GridMetrics
+from simvue.api.objects.sink import RunDataSink
 from simvue.exception import ObjectNotFoundError, SimvueRunError, ObjectDispatchError
 from simvue.utilities import prettify_pydantic
 
 
 from .config.user import SimvueConfiguration
-
-from .dispatch import Dispatcher
+from .api.request import configure_connection_pool, throttled_responses
+
+from .dispatch import (
+    Dispatcher,
+    AdaptiveRateController,
+    ArtifactQueue,
+    QueuedDispatcher,
+    ScheduledDispatcher,
+    shared_dispatch_loop,
+    shared_heartbeat_loop,
+)
+from .dispatch.columnar import MetricBatch, parse_timestamp
 from .executor import Executor, get_current_shell
 from .metrics import SystemResourceMeasurement
 from .models import (
@@ -60,18 +74,22 @@ from .system import get_system
 from .metadata import git_info, environment
 from .eco import CO2Monitor
 from .utilities import (
+    calculate_file_sha256,
+    calculate_sha256,
+    get_mimetype_for_file,
+    get_mimetypes,
     skip_if_failed,
 )
+from .cache import ArtifactIndex, CacheManifest
 from .api.objects import (
     Run as RunObject,
+    Artifact,
     FileArtifact,
     ObjectArtifact,
     MetricsThresholdAlert,
     MetricsRangeAlert,
     UserAlert,
     EventsAlert,
-    Events,
-    Metrics,
     Grid,
 )
 
@@ -182,9 +200,12 @@ class Run:
         self._abort_on_alert: typing.Literal["run", "terminate", "ignore"] = "terminate"
         self._abort_callback: typing.Callable[[Self], None] | None = abort_callback
         self._dispatch_mode: typing.Literal["direct", "queued"] = "queued"
+        self._shared_dispatch: bool = False
 
         self._executor = Executor(self)
         self._dispatcher: DispatcherBaseClass | None = None
+        self._data_sink: RunDataSink | None = None
+        self._rate_controller: AdaptiveRateController | None = None
 
         self._meta_cache: dict[str, typing.Any] = {}
 
@@ -209,6 +230,9 @@ class Run:
             mode=mode,
             profile=server_profile,
         )
+        configure_connection_pool(
+            pool_size=self._user_config.client.connection_pool_size
+        )
 
         logging.getLogger(self.__class__.__module__).setLevel(
             logging.DEBUG
@@ -232,9 +256,15 @@ class Run:
         self._configuration_lock = threading.Lock()
         self._heartbeat_termination_trigger: threading.Event | None = None
         self._storage_id: str | None = None
+        self._artifact_index: ArtifactIndex | None = None
+        self._artifact_queue: ArtifactQueue | None = None
+        self._background_artifacts: bool = False
         self._heartbeat_thread: threading.Thread | None = None
 
         self._heartbeat_interval: int = HEARTBEAT_INTERVAL
+        self._last_heartbeat: float = 0
+        self._last_sys_metric_call: float = 0
+        self._sys_step: int = 0
         self._emissions_monitor: CO2Monitor | None = None
 
     def __enter__(self) -> Self:
@@ -416,6 +446,18 @@ class Run:
                     step=system_metrics_step,
                 )
 
+        if (
+            self._rate_controller
+            and (_dispatch_metrics := self._rate_controller.metrics())
+            and self.status == "running"
+            and (self._shutdown_event and not self._shutdown_event.is_set())
+        ):
+            self._add_metrics_to_dispatch(
+                _dispatch_metrics,
+                join_on_fail=False,
+                step=system_metrics_step,
+            )
+
     def _create_heartbeat_callback(
         self,
     ) -> typing.Callable[[threading.Event], None]:
@@ -429,54 +471,46 @@ class Run:
         def _heartbeat(
             heartbeat_trigger: threading.Event
             | None = self._heartbeat_termination_trigger,
-            abort_callback: typing.Callable[[Self], None] | None = self._abort_callback,
         ) -> None:
             if not heartbeat_trigger:
                 raise RuntimeError("Expected initialisation of heartbeat")
 
-            last_heartbeat: float = 0
-            last_sys_metric_call: float = 0
-
-            sys_step: int = 0
-
             while not heartbeat_trigger.is_set():
-                with self._configuration_lock:
-                    _current_time: float = time.time()
-
-                    _update_system_metrics: bool = (
-                        self._system_metrics_interval is not None
-                        and _current_time - last_sys_metric_call
-                        > self._system_metrics_interval
-                        and self._status == "running"
-                    )
-
-                    if _update_system_metrics:
-                        self._get_internal_metrics(system_metrics_step=sys_step)
-                        sys_step += 1
-
-                    last_sys_metric_call = (
-                        _current_time
-                        if _update_system_metrics
-                        else last_sys_metric_call
-                    )
+                self._heartbeat_step()
+                time.sleep(1)
 
-                if time.time() - last_heartbeat < self._heartbeat_interval:
-                    time.sleep(1)
-                    continue
+        return _heartbeat
 
-                last_heartbeat = time.time()
+    def _heartbeat_step(self) -> None:
+        """Collect resource metrics and send a heartbeat if either is due.
 
-                # Check if the user has aborted the run
-                with self._configuration_lock:
-                    if self._sv_obj and self._sv_obj.abort_trigger:
-                        self._terminate_run(abort_callback=abort_callback)
+        Called by the heartbeat approximately every second.
+        """
+        with self._configuration_lock:
+            _current_time: float = time.time()
+
+            if (
+                self._system_metrics_interval is not None
+                and _current_time - self._last_sys_metric_call
+                > self._system_metrics_interval
+                and self._status == "running"
+            ):
+                self._get_internal_metrics(system_metrics_step=self._sys_step)
+                self._sys_step += 1
+                self._last_sys_metric_call = _current_time
+
+        if time.time() - self._last_heartbeat < self._heartbeat_interval:
+            return
 
-                if self._sv_obj:
-                    self._sv_obj.send_heartbeat()
+        self._last_heartbeat = time.time()
 
-                time.sleep(1)
+        # Check if the user has aborted the run
+        with self._configuration_lock:
+            if self._sv_obj and self._sv_obj.abort_trigger:
+                self._terminate_run(abort_callback=self._abort_callback)
 
-        return _heartbeat
+        if self._sv_obj:
+            self._sv_obj.send_heartbeat()
 
     def _create_dispatch_callback(
         self,
@@ -484,7 +518,8 @@ class Run:
         """Generates the relevant callback for posting of metrics and events
 
         The generated callback is assigned to the dispatcher instance and is
-        executed on metrics and events objects held in a buffer.
+        executed on metrics and events objects held in a buffer. A single
+        sink is created for the run and reused for every dispatch.
         """
 
         if self._user_config.run.mode == "online" and not self.id:
@@ -495,31 +530,21 @@ class Run:
         ) or not self._sv_obj:
             raise RuntimeError("Cannot commence dispatch, run not initialised")
 
+        _sink = self._data_sink = RunDataSink(
+            run=self.id,
+            offline=self._user_config.run.mode == "offline",
+            user_config=self._user_config,
+        )
+
         def _dispatch_callback(
-            buffer: list[typing.Any],
+            buffer: list[typing.Any] | MetricBatch,
             category: typing.Literal["events", "metrics_tensor", "metrics_regular"],
         ) -> None:
             if category == "events":
-                _events = Events.new(
-                    run=self.id,
-                    offline=self._user_config.run.mode == "offline",
-                    events=buffer,
-                )
-                return _events.commit()
+                return _sink.events(buffer)
             elif category == "metrics_tensor":
-                _grid_metrics = GridMetrics.new(
-                    run=self.id,
-                    data=buffer,
-                    offline=self._user_config.run.mode == "offline",
-                )
-                return _grid_metrics.commit()
-            else:
-                _metrics = Metrics.new(
-                    run=self.id,
-                    offline=self._user_config.run.mode == "offline",
-                    metrics=buffer,
-                )
-                return _metrics.commit()
+                return _sink.grid_metrics(buffer)
+            return _sink.metrics(buffer)
 
         return _dispatch_callback
 
@@ -565,20 +590,8 @@ class Run:
         self._alert_raised_trigger = threading.Event()
 
         try:
-            self._dispatcher = Dispatcher(
-                mode=self._dispatch_mode,
-                termination_trigger=self._shutdown_event,
-                object_types=["events", "metrics_regular", "metrics_tensor"],
-                thresholds=dict(object_size=TOTAL_GRID_METRIC_SIZE),
-                callback=self._create_dispatch_callback(),
-            )
-
-            self._heartbeat_thread = threading.Thread(
-                target=self._create_heartbeat_callback(),
-                daemon=True,
-                name=f"{self.id}_heartbeat",
-            )
-
+            self._dispatcher = self._create_dispatcher()
+            self._heartbeat_thread = self._create_heartbeat_thread()
         except RuntimeError as e:
             self._error(e.args[0])
             return False
@@ -586,10 +599,61 @@ class Run:
         self._active = True
 
         self._dispatcher.start()
-        self._heartbeat_thread.start()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.start()
 
         return True
 
+    def _dispatcher_arguments(self) -> dict[str, typing.Any]:
+        """Returns the queues and callback for a dispatcher serving this run"""
+        return dict(
+            termination_trigger=self._shutdown_event,
+            object_types=["events", "metrics_regular", "metrics_tensor"],
+            thresholds=dict(object_size=TOTAL_GRID_METRIC_SIZE),
+            columnar_types=["metrics_regular"],
+            rate_controller=self._rate_controller,
+            callback=self._create_dispatch_callback(),
+        )
+
+    def _create_dispatcher(self) -> "DispatcherBaseClass":
+        """Create the dispatcher used to send metrics and events"""
+        if self._shared_dispatch:
+            _loop = shared_dispatch_loop()
+            return _loop.register(
+                ScheduledDispatcher(wake=_loop.wake, **self._dispatcher_arguments())
+            )
+        return Dispatcher(mode=self._dispatch_mode, **self._dispatcher_arguments())
+
+    def _create_heartbeat_thread(self) -> threading.Thread | None:
+        """Create the thread sending heartbeats and collecting resource metrics.
+
+        If dispatch is shared the heartbeat is instead added to the shared
+        heartbeat loop and no thread is returned.
+        """
+        if self._shared_dispatch:
+            shared_heartbeat_loop().register(
+                self._heartbeat_step, self._heartbeat_termination_trigger
+            )
+            return None
+        return threading.Thread(
+            target=self._create_heartbeat_callback(),
+            daemon=True,
+            name=f"{self.id}_heartbeat",
+        )
+
+    def _close_artifact_queue(self, wait: bool = True) -> None:
+        """Stop the background upload of artifacts, reporting any failures"""
+        if not self._artifact_queue:
+            return
+        self._artifact_queue.close(wait=wait)
+        if _errors := self._artifact_queue.pop_errors():
+            click.secho(
+                f"[simvue] Run completed with {len(_errors)} failed artifact "
+                "uploads:\n" + "\n".join(_errors),
+                fg="red" if self._term_color else None,
+                bold=self._term_color,
+            )
+
     def _error(self, message: str, join_threads: bool = True) -> None:
         """Raise an exception if necessary and log error
 
@@ -615,12 +679,13 @@ class Run:
             self._dispatcher.purge()
             if join_threads:
                 self._dispatcher.join()
+                if self._data_sink:
+                    self._data_sink.close()
 
-        # Stop heartbeat
-        if self._heartbeat_termination_trigger and self._heartbeat_thread:
-            self._heartbeat_termination_trigger.set()
-            if join_threads:
-                self._heartbeat_thread.join()
+        # Stop background artifact uploads, those already queued completing
+        self._close_artifact_queue(wait=join_threads)
+
+        self._stop_heartbeat(join=join_threads)
 
         if not self._suppress_errors:
             raise SimvueRunError(message)
@@ -635,6 +700,13 @@ class Run:
 
         self._aborted = True
 
+    def _stop_heartbeat(self, join: bool = True) -> None:
+        """Stop the heartbeat, which may be registered with the shared heartbeat loop"""
+        if self._heartbeat_termination_trigger:
+            self._heartbeat_termination_trigger.set()
+        if self._heartbeat_thread and join:
+            self._heartbeat_thread.join()
+
     @skip_if_failed("_aborted", "_suppress_errors", False)
     @pydantic.validate_call
     def init(
@@ -1148,6 +1220,9 @@ class Run:
         disable_resources_metrics: bool | None = None,
         storage_id: str | None = None,
         abort_on_alert: typing.Literal["run", "terminate", "ignore"] | None = None,
+        adaptive_dispatch: bool | None = None,
+        shared_dispatch: bool | None = None,
+        background_artifacts: bool | None = None,
     ) -> bool:
         """Optional configuration
 
@@ -1171,6 +1246,20 @@ class Run:
                 * run - current run is aborted.
                 * terminate - (default) script itself is terminated.
                 * ignore - alerts do not affect this run.
+        adaptive_dispatch : bool, optional
+            tune the rate and size of metric and event uploads from server
+            latency, throttling responses and queue depth rather than using
+            fixed limits. Decisions are recorded as 'dispatch/*' metrics
+            alongside resource metrics.
+        shared_dispatch : bool, optional
+            dispatch metrics and events, and send heartbeats, from threads
+            shared by all runs in this process which set this option rather
+            than creating threads for this run. Must be set before 'init'.
+        background_artifacts : bool, optional
+            upload files and objects on background threads, 'save_file'
+            and 'save_object' returning once the file has been copied or
+            the object serialized. Queued uploads complete before the run
+            is closed.
 
         Returns
         -------
@@ -1185,53 +1274,15 @@ class Run:
             if queue_blocking is not None:
                 self._queue_blocking = queue_blocking
 
-            if system_metrics_interval and disable_resources_metrics:
-                self._error(
-                    "Setting of resource metric interval and disabling resource metrics is ambiguous"
-                )
+            if not self._configure_resource_metrics(
+                system_metrics_interval, disable_resources_metrics
+            ):
                 return False
 
-            if system_metrics_interval:
-                self._system_metrics_interval = system_metrics_interval
-
-            if disable_resources_metrics:
-                if self._emissions_monitor:
-                    self._error(
-                        "Emissions metrics require resource metrics collection."
-                    )
-                    return False
-                self._pid = None
-                self._system_metrics_interval = None
-
-            if enable_emission_metrics:
-                if not self._system_metrics_interval:
-                    self._error(
-                        "Emissions metrics require resource metrics collection - make sure resource metrics are enabled!"
-                    )
-                    return False
-                if self._user_config.run.mode == "offline":
-                    # Create an emissions monitor with no API calls
-                    self._emissions_monitor = CO2Monitor(
-                        intensity_refresh_interval=None,
-                        co2_intensity=self._user_config.eco.co2_intensity,
-                        local_data_directory=self._user_config.offline.cache,
-                        co2_signal_api_token=None,
-                        thermal_design_power_per_cpu=self._user_config.eco.cpu_thermal_design_power,
-                        thermal_design_power_per_gpu=self._user_config.eco.gpu_thermal_design_power,
-                        offline=True,
-                    )
-                else:
-                    self._emissions_monitor = CO2Monitor(
-                        intensity_refresh_interval=self._user_config.eco.intensity_refresh_interval,
-                        local_data_directory=self._user_config.offline.cache,
-                        co2_signal_api_token=self._user_config.eco.co2_signal_api_token,
-                        co2_intensity=self._user_config.eco.co2_intensity,
-                        thermal_design_power_per_cpu=self._user_config.eco.cpu_thermal_design_power,
-                        thermal_design_power_per_gpu=self._user_config.eco.gpu_thermal_design_power,
-                    )
-
-            elif enable_emission_metrics is False and self._emissions_monitor:
-                self._error("Cannot disable emissions monitor once it has been started")
+            if enable_emission_metrics is not None and not (
+                self._configure_emission_metrics(enable_emission_metrics)
+            ):
+                return False
 
             if abort_on_alert is not None:
                 if isinstance(abort_on_alert, bool):
@@ -1246,8 +1297,108 @@ class Run:
             if storage_id:
                 self._storage_id = storage_id
 
+            if adaptive_dispatch is not None:
+                self._configure_adaptive_dispatch(adaptive_dispatch)
+
+            if shared_dispatch is not None and not (
+                self._configure_shared_dispatch(shared_dispatch)
+            ):
+                return False
+
+            if background_artifacts is not None:
+                self._configure_background_artifacts(background_artifacts)
+
+        return True
+
+    def _configure_resource_metrics(
+        self,
+        system_metrics_interval: int | None,
+        disable_resources_metrics: bool | None,
+    ) -> bool:
+        """Set the interval of resource metrics collection, or disable it"""
+        if system_metrics_interval and disable_resources_metrics:
+            self._error(
+                "Setting of resource metric interval and disabling resource metrics is ambiguous"
+            )
+            return False
+
+        if system_metrics_interval:
+            self._system_metrics_interval = system_metrics_interval
+
+        if disable_resources_metrics:
+            if self._emissions_monitor:
+                self._error("Emissions metrics require resource metrics collection.")
+                return False
+            self._pid = None
+            self._system_metrics_interval = None
+
+        return True
+
+    def _configure_emission_metrics(self, enable_emission_metrics: bool) -> bool:
+        """Create the emissions monitor if emission metrics are enabled"""
+        if not enable_emission_metrics:
+            if self._emissions_monitor:
+                self._error("Cannot disable emissions monitor once it has been started")
+            return True
+
+        if not self._system_metrics_interval:
+            self._error(
+                "Emissions metrics require resource metrics collection - make sure resource metrics are enabled!"
+            )
+            return False
+
+        if self._user_config.run.mode == "offline":
+            # Create an emissions monitor with no API calls
+            self._emissions_monitor = CO2Monitor(
+                intensity_refresh_interval=None,
+                co2_intensity=self._user_config.eco.co2_intensity,
+                local_data_directory=self._user_config.offline.cache,
+                co2_signal_api_token=None,
+                thermal_design_power_per_cpu=self._user_config.eco.cpu_thermal_design_power,
+                thermal_design_power_per_gpu=self._user_config.eco.gpu_thermal_design_power,
+                offline=True,
+            )
+        else:
+            self._emissions_monitor = CO2Monitor(
+                intensity_refresh_interval=self._user_config.eco.intensity_refresh_interval,
+                local_data_directory=self._user_config.offline.cache,
+                co2_signal_api_token=self._user_config.eco.co2_signal_api_token,
+                co2_intensity=self._user_config.eco.co2_intensity,
+                thermal_design_power_per_cpu=self._user_config.eco.cpu_thermal_design_power,
+                thermal_design_power_per_gpu=self._user_config.eco.gpu_thermal_design_power,
+            )
+
+        return True
+
+    def _configure_adaptive_dispatch(self, adaptive_dispatch: bool) -> None:
+        """Create or remove the rate controller used by the dispatcher"""
+        if not adaptive_dispatch:
+            self._rate_controller = None
+        elif not self._rate_controller:
+            self._rate_controller = AdaptiveRateController(
+                throttle_counter=throttled_responses
+            )
+        if isinstance(self._dispatcher, QueuedDispatcher):
+            self._dispatcher.rate_controller = self._rate_controller
+
+    def _configure_shared_dispatch(self, shared_dispatch: bool) -> bool:
+        """Set whether to use the dispatch threads shared within the process"""
+        if self._dispatcher:
+            self._error("Shared dispatch must be configured before 'init'")
+            return False
+        self._shared_dispatch = shared_dispatch
         return True
 
+    def _configure_background_artifacts(self, background_artifacts: bool) -> None:
+        """Create the queue for artifacts uploaded in the background if enabled"""
+        self._background_artifacts = background_artifacts
+        if background_artifacts and not self._artifact_queue:
+            self._artifact_queue = ArtifactQueue(
+                max_bytes=self._user_config.client.artifact_queue_bytes,
+                max_workers=self._user_config.client.artifact_upload_workers,
+                name="simvue_artifacts",
+            )
+
     @skip_if_failed("_aborted", "_suppress_errors", False)
     @check_run_initialised
     @pydantic.validate_call
@@ -1473,22 +1624,22 @@ class Run:
             self._error("Invalid timestamp format", join_on_fail)
             return False
 
-        _data: dict[str, typing.Any] = {
-            "values": metrics,
-            "time": time if time is not None else self.duration,
-            "timestamp": simvue_timestamp(timestamp),
-            "step": step if step is not None else self._step,
-        }
-
         try:
-            self._dispatcher.add_item(
-                _data,
+            self._dispatcher.add_metrics(
+                metrics,
                 object_type="metrics_regular",
+                step=step if step is not None else self._step,
+                time=time if time is not None else self.duration,
+                # Avoid formatting a timestamp string for every log call,
+                # this is deferred until the metrics are dispatched
+                timestamp=parse_timestamp(simvue_timestamp(timestamp))
+                if timestamp
+                else datetime.datetime.now(datetime.timezone.utc).timestamp(),
                 blocking=self._queue_blocking,
                 metadata=dict(object_size=len(metrics)),
             )
         except ObjectDispatchError as e:
-            logger.warning(f"Failed to log metric {id(_data)}: {e.msg}")
+            logger.warning(f"Failed to log metric {id(metrics)}: {e.msg}")
             self._failed_metric_counter += 1
 
         return True
@@ -1708,10 +1859,7 @@ class Run:
         ```
         """
 
-        # If there are any metric units to be uploaded do so now
-        if _units := self._meta_cache.get("metrics"):
-            self.update_metadata({"simvue": {"metrics": _units}})
-            del self._meta_cache["metrics"]
+        self._send_metric_units()
 
         # TODO: When metrics and grids are combined into a single entity
         # this can be removed. For now need to separate tensor based metrics
@@ -1785,6 +1933,168 @@ class Run:
         self._step += 1
         return _tensor_add_dispatch and _regular_dispatch
 
+    def _send_metric_units(self) -> None:
+        """Upload any metric units defined since metrics were last logged"""
+        if _units := self._meta_cache.get("metrics"):
+            self.update_metadata({"simvue": {"metrics": _units}})
+            del self._meta_cache["metrics"]
+
+    def _metric_batch_arrays(
+        self,
+        metrics: dict[str, numpy.ndarray | list[int | float]],
+        steps: numpy.ndarray | list[int] | None,
+        times: numpy.ndarray | list[float] | None,
+        timestamps: numpy.ndarray | list[float] | None,
+    ) -> tuple[dict[str, numpy.ndarray], numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """Convert a batch of metrics to arrays, filling in any defaults.
+
+        Raises
+        ------
+        ValueError
+            if the arrays are not all one dimensional and of equal length,
+            or any step is negative
+        """
+        _values: dict[str, numpy.ndarray] = {
+            name: numpy.asarray(array, dtype=numpy.float64)
+            for name, array in metrics.items()
+        }
+        _shapes: set[tuple[int, ...]] = {array.shape for array in _values.values()}
+
+        if len(_shapes) != 1 or len(_shape := _shapes.pop()) != 1:
+            raise ValueError(
+                "Metric arrays must be one dimensional and of equal length"
+            )
+
+        (_n_entries,) = _shape
+
+        _steps: numpy.ndarray = (
+            numpy.asarray(steps, dtype=numpy.int64)
+            if steps is not None
+            else numpy.arange(self._step, self._step + _n_entries)
+        )
+        _times: numpy.ndarray = (
+            numpy.asarray(times, dtype=numpy.float64)
+            if times is not None
+            else numpy.full(_n_entries, self.duration)
+        )
+        _timestamps: numpy.ndarray = numpy.asarray(
+            timestamps
+            if timestamps is not None
+            else numpy.full(
+                _n_entries, datetime.datetime.now(datetime.timezone.utc).timestamp()
+            )
+        )
+        if numpy.issubdtype(_timestamps.dtype, numpy.datetime64):
+            _timestamps = _timestamps.astype("datetime64[us]").astype(numpy.int64) / 1e6
+
+        if any(array.shape != _shape for array in (_steps, _times, _timestamps)):
+            raise ValueError("Steps, times and timestamps must match length of metrics")
+
+        if (_steps < 0).any():
+            raise ValueError("Metric steps must be non-negative")
+
+        return _values, _steps, _times, _timestamps.astype(numpy.float64)
+
+    @skip_if_failed("_aborted", "_suppress_errors", False)
+    @check_run_initialised
+    @pydantic.validate_call(config={"arbitrary_types_allowed": True})
+    def log_metrics_batch(
+        self,
+        metrics: dict[MetricKeyString, numpy.ndarray | list[int | float]],
+        steps: numpy.ndarray | list[int] | None = None,
+        times: numpy.ndarray | list[float] | None = None,
+        timestamps: numpy.ndarray | list[float] | None = None,
+    ) -> bool:
+        """Log the history of many scalar metrics in a single call.
+
+        Each index of the given arrays is recorded as if it were a separate
+        call to `log_metrics`, however validation is performed once for the
+        whole batch and values are added to the dispatch queue directly.
+        If the dispatch queue is full this method waits for space regardless
+        of the 'queue_blocking' setting.
+
+        Parameters
+        ----------
+        metrics : dict[str, numpy.ndarray | list[int | float]]
+            one dimensional arrays of values for each metric,
+            all of which must be the same length
+        steps : numpy.ndarray | list[int], optional
+            step index for each set of values, by default consecutive
+            steps starting from the current step
+        times : numpy.ndarray | list[float], optional
+            time for each set of values, by default the current run duration
+        timestamps : numpy.ndarray | list[float], optional
+            UTC time since the epoch in seconds, or numpy.datetime64 values,
+            for each set of values, by default the current time
+
+        Returns
+        -------
+        bool
+            if the metric log was successful
+
+        Examples
+        --------
+        ```python
+        with simvue.Run() as run:
+
+            run.log_metrics_batch(
+                metrics={
+                    "residual": numpy.logspace(0, -6, 10000),
+                    "iterations": numpy.arange(10000)
+                },
+                times=numpy.linspace(0, 100, 10000),
+            )
+        ```
+        """
+        if self._user_config.run.mode == "disabled":
+            return True
+
+        if not metrics:
+            return True
+
+        if not self._sv_obj or not self._dispatcher:
+            self._error("Cannot log metrics, run not initialised")
+            return False
+
+        if not self._active:
+            self._error("Run is not active")
+            return False
+
+        if self._status != "running":
+            self._error("Cannot log metrics when not in the running state")
+            return False
+
+        try:
+            _values, _steps, _times, _timestamps = self._metric_batch_arrays(
+                metrics, steps, times, timestamps
+            )
+        except ValueError as e:
+            self._error(f"{e}")
+            return False
+
+        if not _steps.size:
+            return True
+
+        self._send_metric_units()
+
+        try:
+            self._dispatcher.add_metrics_batch(
+                _values,
+                object_type="metrics_regular",
+                step=_steps,
+                time=_times,
+                timestamp=_timestamps,
+                blocking=True,
+                metadata=dict(object_size=len(_values)),
+            )
+        except ObjectDispatchError as e:
+            logger.warning(f"Failed to log metric batch: {e.msg}")
+            self._failed_metric_counter += _steps.size
+            return False
+
+        self._step = max(self._step, int(_steps.max()) + 1)
+        return True
+
     @skip_if_failed("_aborted", "_suppress_errors", False)
     @check_run_initialised
     @pydantic.validate_call
@@ -1840,6 +2150,20 @@ class Run:
 
         _name: str = name or f"{obj.__class__.__name__.lower()}_{id(obj)}"
 
+        if self._background_artifacts and self._user_config.run.mode != "offline":
+            try:
+                self._queue_object(
+                    obj,
+                    category=category,
+                    name=_name,
+                    allow_pickle=allow_pickle,
+                    metadata=metadata,
+                )
+            except (ValueError, RuntimeError) as e:
+                self._error(f"Failed to save object '{_name}' to run '{self.id}': {e}")
+                return False
+            return True
+
         try:
             _artifact = ObjectArtifact.new(
                 name=_name,
@@ -1856,6 +2180,34 @@ class Run:
 
         return True
 
+    def _queue_object(
+        self,
+        obj: typing.Any,
+        *,
+        category: typing.Literal["input", "output", "code"],
+        name: str,
+        allow_pickle: bool,
+        metadata: dict[str, typing.Any] | None,
+    ) -> None:
+        """Serialize an object and queue it for upload in the background"""
+        # Serialize now so later changes to the object are not uploaded
+        _serialized, _mime_type = ObjectArtifact.serialize(obj, allow_pickle)
+
+        def _upload() -> None:
+            ObjectArtifact.new(
+                name=name,
+                obj=None,
+                storage=self._storage_id,
+                metadata=metadata,
+                serialized=_serialized,
+                mime_type=_mime_type,
+                checksum=calculate_sha256(_serialized, is_file=False),
+                size=len(_serialized),
+                original_path="",
+            ).attach_to_run(self.id, category)
+
+        self._artifact_queue.put(_upload, label=name, size=len(_serialized))
+
     @skip_if_failed("_aborted", "_suppress_errors", False)
     @check_run_initialised
     @pydantic.validate_call
@@ -1887,7 +2239,8 @@ class Run:
         preserve_path : bool, optional
             whether to preserve the path during storage, by default False
         snapshot : bool, optional
-            whether to take a snapshot of the file before uploading, by default False
+            whether to take a snapshot of the file before uploading, by default False.
+            A snapshot is always taken if uploading in the background.
         name : str, optional
             name to associate with this file, by default None
         metadata : str | None, optional
@@ -1906,6 +2259,35 @@ class Run:
             self._error("Cannot upload output files for runs in the created state")
             return False
 
+        try:
+            if self._background_artifacts and self._user_config.run.mode != "offline":
+                self._queue_file(
+                    file_path,
+                    category=category,
+                    file_type=file_type,
+                    preserve_path=preserve_path,
+                    name=name,
+                    metadata=metadata,
+                )
+            else:
+                self._save_file(
+                    file_path,
+                    category=category,
+                    file_type=file_type,
+                    preserve_path=preserve_path,
+                    snapshot=snapshot,
+                    name=name,
+                    metadata=metadata,
+                )
+        except (ValueError, RuntimeError) as e:
+            self._error(f"Failed to save file: {e}")
+            return False
+
+        return True
+
+    @staticmethod
+    def _stored_file_name(file_path: pathlib.Path, preserve_path: bool) -> str:
+        """Returns the name under which a file is stored"""
         stored_file_name: str = f"{file_path}"
 
         if preserve_path and stored_file_name.startswith("./"):
@@ -1913,22 +2295,171 @@ class Run:
         elif not preserve_path:
             stored_file_name = os.path.basename(file_path)
 
+        return stored_file_name
+
+    def _queue_file(
+        self,
+        file_path: pathlib.Path,
+        *,
+        category: typing.Literal["input", "output", "code"],
+        file_type: str | None,
+        preserve_path: bool,
+        name: str | None = None,
+        metadata: dict[str, typing.Any] | None = None,
+    ) -> None:
+        """Snapshot a file and queue it for upload in the background"""
+        _name: str = name or self._stored_file_name(file_path, preserve_path)
+        # Determine the type from the original file name, not that of the snapshot
+        _mime_type: str = file_type or get_mimetype_for_file(file_path)
+
+        if _mime_type not in get_mimetypes():
+            raise ValueError(f"Invalid MIME type '{file_type}' specified")
+
+        _snapshot, _size, _checksum = FileArtifact.create_snapshot(
+            file_path, self._user_config.offline.cache
+        )
+
+        # Open the index before queuing so that it is shared by the workers
+        if (
+            self._user_config.run.mode != "offline"
+            and self._user_config.client.artifact_deduplication
+        ):
+            self._init_artifact_index()
+
+        def _upload() -> None:
+            try:
+                self._save_file(
+                    _snapshot,
+                    category=category,
+                    file_type=_mime_type,
+                    preserve_path=False,
+                    name=_name,
+                    metadata=metadata,
+                    checksum=_checksum,
+                )
+            finally:
+                _snapshot.unlink(missing_ok=True)
+
         try:
-            # Register file
-            _artifact = FileArtifact.new(
-                name=name or stored_file_name,
-                storage=self._storage_id,
-                file_path=file_path,
-                offline=self._user_config.run.mode == "offline",
-                mime_type=file_type,
-                metadata=metadata,
-                snapshot=snapshot,
+            self._artifact_queue.put(_upload, label=_name, size=_size)
+        except RuntimeError:
+            _snapshot.unlink(missing_ok=True)
+            raise
+
+    def _save_file(
+        self,
+        file_path: pathlib.Path,
+        *,
+        category: typing.Literal["input", "output", "code"],
+        file_type: str | None,
+        preserve_path: bool,
+        snapshot: bool = False,
+        name: str | None = None,
+        metadata: dict[str, typing.Any] | None = None,
+        checksum: str | None = None,
+    ) -> None:
+        """Register and upload a file, raising an exception on failure.
+
+        Raises
+        ------
+        ValueError
+            if the artifact definition is invalid
+        RuntimeError
+            if the artifact could not be created or uploaded
+        """
+        _name: str = name or self._stored_file_name(file_path, preserve_path)
+        _offline: bool = self._user_config.run.mode == "offline"
+        _known_file: dict[str, typing.Any] = {}
+
+        # Attach an existing artifact if this content has already been uploaded
+        if not _offline and self._user_config.client.artifact_deduplication:
+            checksum = checksum or self._file_checksum(file_path)
+            if self._attach_existing_artifact(checksum, _name, category):
+                return
+
+        # Avoid reading the file again, unless required for a snapshot
+        if checksum and not snapshot:
+            _known_file = {
+                "original_path": file_path.expanduser().absolute(),
+                "size": file_path.stat().st_size,
+                "checksum": checksum,
+            }
+
+        # Register file
+        _artifact = FileArtifact.new(
+            name=_name,
+            storage=self._storage_id,
+            file_path=file_path,
+            offline=_offline,
+            mime_type=file_type,
+            metadata=metadata,
+            snapshot=snapshot,
+            **_known_file,
+        )
+        _artifact.attach_to_run(self.id, category)
+
+        if self._artifact_index:
+            self._artifact_index.add(_artifact.checksum, _name, _artifact.id)
+
+    def _init_artifact_index(self) -> ArtifactIndex:
+        """Returns the index of uploaded artifacts, opening it if required"""
+        if not self._artifact_index:
+            self._artifact_index = ArtifactIndex(
+                CacheManifest.open(self._user_config.offline.cache),
+                f"{self._user_config.server.url}",
+                ttl=self._user_config.client.artifact_index_ttl,
+                max_entries=self._user_config.client.artifact_index_size,
             )
-            _artifact.attach_to_run(self.id, category)
-        except (ValueError, RuntimeError) as e:
-            self._error(f"Failed to save file: {e}")
+        return self._artifact_index
+
+    def _file_checksum(self, file_path: pathlib.Path) -> str:
+        """Returns the checksum of a file, read only if changed since last indexed"""
+        _index: ArtifactIndex = self._init_artifact_index()
+        if not (_checksum := _index.file_checksum(file_path)):
+            _checksum = calculate_file_sha256(file_path)
+            _index.add_file(file_path, _checksum)
+        return _checksum
+
+    def _attach_existing_artifact(
+        self,
+        checksum: str,
+        name: str,
+        category: typing.Literal["input", "output", "code"],
+    ) -> bool:
+        """Attach an uploaded artifact with the given content and name to this run.
+
+        The local index of uploaded artifacts is searched first, the server
+        being searched if the content is not indexed.
+
+        Returns
+        -------
+        bool
+            whether an existing artifact was attached.
+        """
+        _index: ArtifactIndex = self._init_artifact_index()
+
+        if _artifact_id := _index.get(checksum, name):
+            try:
+                FileArtifact(
+                    identifier=_artifact_id, _local=True, _read_only=True
+                ).attach_to_run(self.id, category)
+                return True
+            except RuntimeError as e:
+                # The artifact may have been deleted from the server
+                logger.debug(f"Failed to attach indexed artifact '{name}': {e}")
+                _index.discard(checksum, name)
+
+        try:
+            _artifact = Artifact.from_checksum(checksum, name=name)
+        except RuntimeError as e:
+            logger.debug(f"Failed to search for existing artifact '{name}': {e}")
+            return False
+
+        if not _artifact:
             return False
 
+        _artifact.attach_to_run(self.id, category)
+        _index.add(checksum, name, _artifact.id)
         return True
 
     @skip_if_failed("_aborted", "_suppress_errors", False)
@@ -1940,9 +2471,19 @@ class Run:
         category: typing.Literal["output", "input", "code"],
         file_type: str | None = None,
         preserve_path: bool = False,
+        *,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        max_workers: pydantic.PositiveInt | None = None,
+        pack_below: pydantic.NonNegativeInt | None = None,
+        progress_callback: typing.Callable[[pathlib.Path, int, int], None]
+        | None = None,
     ) -> bool:
         """Upload files from a whole directory
 
+        Files are uploaded concurrently, each worker registering and
+        uploading one file at a time.
+
         Parameters
         ----------
         directory : pydantic.DirectoryPath
@@ -1956,6 +2497,22 @@ class Run:
             manually specify the MIME type for items in the directory, by default None
         preserve_path : bool, optional
             preserve the full path, by default False
+        include : list[str], optional
+            only save files with a path relative to the directory matching
+            one of these glob patterns, by default all files are saved
+        exclude : list[str], optional
+            do not save files with a path relative to the directory matching
+            any of these glob patterns
+        max_workers : int, optional
+            maximum number of files uploaded concurrently, by default the
+            value of 'artifact_upload_workers' in the client configuration
+        pack_below : int, optional
+            if set, files smaller than this size in bytes are packed into a
+            single 'tar.gz' archive which is saved as one artifact named
+            after the directory, by default files are saved individually
+        progress_callback : Callable[[pathlib.Path, int, int], None], optional
+            called as each file or archive is saved with its path, the
+            number of files saved so far and the total number of files
 
         Returns
         -------
@@ -1966,6 +2523,10 @@ class Run:
             self._error("Cannot save directory, run not inirialised")
             return False
 
+        if self._status == "created" and category == "output":
+            self._error("Cannot upload output files for runs in the created state")
+            return False
+
         if file_type:
             mimetypes.init()
             mimetypes_valid = [value for _, value in mimetypes.types_map.items()]
@@ -1973,13 +2534,147 @@ class Run:
                 self._error("Invalid MIME type specified")
                 return False
 
-        for dirpath, _, filenames in os.walk(directory):
-            for filename in filenames:
-                if (full_path := pathlib.Path(dirpath).joinpath(filename)).is_file():
-                    self.save_file(full_path, category, file_type, preserve_path)
+        _files: list[pathlib.Path] = self._directory_files(directory, include, exclude)
+        _individual, _packed = self._partition_small_files(_files, pack_below)
+        _offline: bool = self._user_config.run.mode == "offline"
+
+        # Open the index before starting workers so that it is shared
+        if not _offline and self._user_config.client.artifact_deduplication:
+            self._init_artifact_index()
+
+        with (
+            tempfile.TemporaryDirectory() as temp_d,
+            concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers
+                or self._user_config.client.artifact_upload_workers,
+                thread_name_prefix="save_directory",
+            ) as executor,
+        ):
+            _save_file = functools.partial(
+                self._save_file,
+                category=category,
+                file_type=file_type,
+                preserve_path=preserve_path,
+            )
+            _futures: dict[concurrent.futures.Future, tuple[pathlib.Path, int]] = {
+                executor.submit(_save_file, file): (file, 1) for file in _individual
+            }
+
+            # Small files are packed whilst other files are uploading
+            if _packed:
+                _archive_name: str = (
+                    f"{directory if preserve_path else directory.name}.tar.gz"
+                )
+                _archive: pathlib.Path = pathlib.Path(temp_d).joinpath(
+                    os.path.basename(_archive_name)
+                )
+                self._pack_files(_packed, directory, _archive)
+                _future = executor.submit(
+                    _save_file,
+                    _archive,
+                    file_type="application/gzip",
+                    preserve_path=False,
+                    # Offline the archive must outlive this temporary directory
+                    snapshot=_offline,
+                    name=_archive_name,
+                    metadata={"packed_files": len(_packed)},
+                )
+                _futures[_future] = (_archive, len(_packed))
+
+            _failed: list[str] = self._wait_for_saved_files(
+                _futures, len(_files), progress_callback
+            )
+
+        if _failed:
+            self._error(
+                f"Failed to save {len(_failed)} of {len(_futures)} items from "
+                f"directory '{directory}': " + "; ".join(_failed)
+            )
+            return False
 
         return True
 
+    @staticmethod
+    def _wait_for_saved_files(
+        futures: dict[concurrent.futures.Future, tuple[pathlib.Path, int]],
+        n_files: int,
+        progress_callback: typing.Callable[[pathlib.Path, int, int], None] | None,
+    ) -> list[str]:
+        """Wait for files being saved, reporting progress and returning any failures"""
+        _failed: list[str] = []
+        _n_saved: int = 0
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                _file, _n_files = futures[future]
+                try:
+                    future.result()
+                except (ValueError, RuntimeError) as e:
+                    _failed.append(f"'{_file}': {e}")
+                _n_saved += _n_files
+                if progress_callback:
+                    progress_callback(_file, _n_saved, n_files)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return _failed
+
+    @staticmethod
+    def _matches_patterns(
+        path: pathlib.Path, include: list[str] | None, exclude: list[str] | None
+    ) -> bool:
+        """Returns whether a path matches any include and no exclude patterns"""
+        if include and not any(path.match(pattern) for pattern in include):
+            return False
+        return not exclude or not any(path.match(pattern) for pattern in exclude)
+
+    @classmethod
+    def _directory_files(
+        cls,
+        directory: pathlib.Path,
+        include: list[str] | None,
+        exclude: list[str] | None,
+    ) -> list[pathlib.Path]:
+        """Returns the files within a directory matching the given patterns"""
+        _paths: typing.Generator[pathlib.Path] = (
+            pathlib.Path(dirpath).joinpath(filename)
+            for dirpath, _, filenames in os.walk(directory)
+            for filename in filenames
+        )
+        return sorted(
+            path
+            for path in _paths
+            if cls._matches_patterns(path.relative_to(directory), include, exclude)
+            and path.is_file()
+        )
+
+    @staticmethod
+    def _partition_small_files(
+        files: list[pathlib.Path], pack_below: int | None
+    ) -> tuple[list[pathlib.Path], list[pathlib.Path]]:
+        """Separate files saved individually from those smaller than the size to pack"""
+        _packed: list[pathlib.Path] = [
+            file for file in files if pack_below and file.stat().st_size < pack_below
+        ]
+        # Packing is only worthwhile if it replaces multiple uploads
+        if len(_packed) < 2:
+            return files, []
+        _packed_set: set[pathlib.Path] = set(_packed)
+        return [file for file in files if file not in _packed_set], _packed
+
+    @staticmethod
+    def _pack_files(
+        files: list[pathlib.Path], directory: pathlib.Path, archive: pathlib.Path
+    ) -> None:
+        """Write files to a compressed archive, named relative to the directory"""
+        # Omit the timestamp from the header so identical content packs identically
+        with (
+            gzip.GzipFile(archive, mode="wb", mtime=0) as out_f,
+            tarfile.open(fileobj=out_f, mode="w") as out_tar,
+        ):
+            for file in files:
+                out_tar.add(file, arcname=file.relative_to(directory).as_posix())
+
     @skip_if_failed("_aborted", "_suppress_errors", False)
     @check_run_initialised
     @pydantic.validate_call
@@ -2026,6 +2721,38 @@ class Run:
 
         return True
 
+    @skip_if_failed("_aborted", "_suppress_errors", False)
+    @pydantic.validate_call
+    def wait_for_artifacts(self, timeout: pydantic.PositiveFloat | None = None) -> bool:
+        """Wait for files and objects being saved in the background to upload
+
+        Parameters
+        ----------
+        timeout : float, optional
+            maximum time in seconds to wait, by default wait indefinitely
+
+        Returns
+        -------
+        bool
+            whether all queued artifacts were uploaded successfully
+        """
+        if not self._artifact_queue:
+            return True
+
+        if not self._artifact_queue.wait(timeout):
+            self._error(
+                f"Timed out waiting for {self._artifact_queue.pending} artifacts to upload"
+            )
+            return False
+
+        if _errors := self._artifact_queue.pop_errors():
+            self._error(
+                f"Failed to upload {len(_errors)} artifacts: " + "; ".join(_errors)
+            )
+            return False
+
+        return True
+
     @skip_if_failed("_aborted", "_suppress_errors", False)
     @check_run_initialised
     @pydantic.validate_call
@@ -2066,6 +2793,9 @@ class Run:
     def _tidy_run(self) -> None:
         self._executor.wait_for_completion()
 
+        # Artifacts are attached before the run is marked as complete
+        self._close_artifact_queue()
+
         if self._shutdown_event:
             self._shutdown_event.set()
 
@@ -2078,9 +2808,10 @@ class Run:
             self._dispatcher.purge()
             self._dispatcher.join()
 
-        if self._heartbeat_thread and self._heartbeat_termination_trigger:
-            self._heartbeat_termination_trigger.set()
-            self._heartbeat_thread.join()
+        if self._data_sink:
+            self._data_sink.close()
+
+        self._stop_heartbeat()
 
         if (
             self._sv_obj
@@ -1,13 +1,16 @@
 """Upload actions for cached files."""
 
 import abc
-from collections.abc import Generator
+from collections.abc import Callable, Generator, MutableMapping
 from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+import functools
 import http
 import json
 import logging
 import pathlib
 import threading
+import time
 import typing
 
 import requests
@@ -38,6 +41,9 @@ from simvue.api.objects.alert.fetch import AlertType
 from simvue.api.objects.artifact.base import ArtifactBase
 from simvue.api.objects.base import SimvueObject
 from simvue.api.request import put as sv_put, get_json_from_response
+from simvue.cache import CacheManifest, IdMapping, SegmentReader
+from simvue.cache.manifest import MAX_UPLOAD_ATTEMPTS, ManifestKind
+from simvue.dispatch.queued import MAX_BUFFER_SIZE
 from simvue.models import ObjectID
 from simvue.config.user import SimvueConfiguration
 from simvue.eco import CO2Monitor
@@ -49,12 +55,39 @@ except ImportError:
     from typing_extensions import override  # noqa: UP035
 
 
+@dataclasses.dataclass(frozen=True)
+class UploadTask:
+    """A single upload performed by the sender.
+
+    Parameters
+    ----------
+    object_type : str
+        the type of object uploaded.
+    identifier : str
+        the offline identifier of the object, or run for a batch.
+    run : str | None
+        the offline identifier of the run the upload belongs to, if known.
+    upload : Callable[[], None]
+        performs the upload.
+    """
+
+    object_type: str
+    identifier: str
+    run: str | None
+    upload: Callable[[], None]
+
+
 class UploadAction:
     """Defines the tasks to execute during upload."""
 
     object_type: str = ""
     logger: logging.Logger = logging.getLogger(__name__)
     singular_object: bool = True
+    manifest_kind: ManifestKind = "json"
+    # Object types which must be uploaded before objects of this type
+    dependencies: tuple[str, ...] = ()
+    # Whether objects need only wait for their own run rather than all runs
+    run_scoped: bool = False
 
     @classmethod
     def json_file(cls, cache_directory: pathlib.Path, offline_id: str) -> pathlib.Path:
@@ -78,10 +111,62 @@ class UploadAction:
     def _log_upload_failed(
         cls, cache_directory: pathlib.Path, offline_id: str, data: dict[str, typing.Any]
     ) -> None:
-        """Log a failing upload to the local cache."""
+        """Log a failing upload to the local cache.
+
+        The upload is retried with exponential backoff, until the maximum
+        number of attempts is reached.
+        """
         data["upload_failed"] = True
         with cls.json_file(cache_directory, offline_id).open("w") as out_f:
             json.dump(data, out_f, indent=2)
+        if (
+            CacheManifest.open(cache_directory).record_failure(
+                cls.object_type, offline_id
+            )
+            >= MAX_UPLOAD_ATTEMPTS
+        ):
+            cls.logger.warning(
+                "Upload of %s '%s' failed %d times, not retrying",
+                cls.object_type,
+                offline_id,
+                MAX_UPLOAD_ATTEMPTS,
+            )
+
+    @classmethod
+    def _load_cached(
+        cls, cache_directory: pathlib.Path, offline_id: str
+    ) -> dict[str, typing.Any] | None:
+        """Returns the content of a cached JSON file, if it can be read.
+
+        Parameters
+        ----------
+        cache_directory : pathlib.Path
+            the cache directory to search
+        offline_id : str
+            the offline identifier for the upload
+
+        Returns
+        -------
+        dict[str, Any] | None
+            the content of the file, or None if the file no longer exists
+            or is incomplete.
+        """
+        try:
+            with cls.json_file(cache_directory, offline_id).open() as in_f:
+                _data = json.load(in_f)
+        except FileNotFoundError:
+            # Files are registered after being written, so the file has
+            # been removed since the manifest was read
+            CacheManifest.open(cache_directory).remove(cls.object_type, offline_id)
+            return None
+        except json.JSONDecodeError as e:
+            # File may be being written by an active run
+            cls.logger.debug("Skipping %s '%s': %s", cls.object_type, offline_id, e)
+            return None
+
+        # Whether failed uploads are retried is determined by the manifest
+        _data.pop("upload_failed", None)
+        return _data
 
     @classmethod
     def count(cls, cache_directory: pathlib.Path) -> int:
@@ -97,7 +182,9 @@ class UploadAction:
         int
             the number of objects of this type pending upload.
         """
-        return len(list(cls.uploadable_objects(cache_directory)))
+        return CacheManifest.open(cache_directory).count(
+            cls.object_type, kind=cls.manifest_kind
+        )
 
     @classmethod
     def pre_tasks(
@@ -148,6 +235,7 @@ class UploadAction:
         """
         _ = data
         _ = online_id
+        CacheManifest.open(cache_directory).remove(cls.object_type, offline_id)
         cls.json_file(cache_directory, offline_id).unlink(missing_ok=True)
 
     @classmethod
@@ -163,8 +251,8 @@ class UploadAction:
     def uploadable_objects(cls, cache_directory: pathlib.Path) -> Generator[str]:
         """Iterate through uploadables.
 
-        Returns the offline identifiers.f objects awaiting upload for this type.
-
+        Returns the offline identifiers of objects awaiting upload for this
+        type as recorded within the cache manifest.
 
         Parameters
         ----------
@@ -176,32 +264,28 @@ class UploadAction:
         str
             offline identifier
         """
-        for file in cache_directory.glob(f"{cls.object_type}/*.json"):
-            yield file.stem
+        yield from CacheManifest.open(cache_directory).identifiers(
+            cls.object_type, kind=cls.manifest_kind
+        )
 
     @classmethod
     def _single_item_upload(
         cls,
         identifier: str,
-        id_mapping: dict[str, str],
+        id_mapping: MutableMapping[str, str],
         cache_directory: pathlib.Path,
         thread_lock: threading.Lock,
         simvue_monitor_run: SimvueRun | None,
         *,
         throw_exceptions: bool = False,
-        retry_failed: bool = False,
         upload_status: dict[str, str | float] | None,
     ) -> None:
         """Upload a single item of this object type."""
         _label: str = cls.object_type[:-1] if cls.singular_object else cls.object_type
         if simvue_monitor_run:
             simvue_monitor_run.log_event(f"Uploading {_label} '{identifier}'")
-        _json_file = cache_directory.joinpath(f"{cls.object_type}/{identifier}.json")
-
-        with _json_file.open() as in_f:
-            _data = json.load(in_f)
 
-        if _data.pop("upload_failed", False) and not retry_failed:
+        if (_data := cls._load_cached(cache_directory, identifier)) is None:
             return
 
         try:
@@ -217,8 +301,7 @@ class UploadAction:
                 _out_msg: str = f"No initialiser defined for type '{cls.__name__}'"
                 raise RuntimeError(_out_msg)
 
-            with thread_lock:
-                _object.on_reconnect(id_mapping)
+            _object.on_reconnect(id_mapping)
 
             if not isinstance(_object, ArtifactBase):
                 _object.commit()
@@ -257,8 +340,7 @@ class UploadAction:
                 _object.id,
             )
 
-            with thread_lock:
-                id_mapping[identifier] = _object.id
+            id_mapping[identifier] = _object.id
         else:
             cls.logger.info(
                 "%s %s", "Updated" if id_mapping.get(identifier) else "Created", _label
@@ -280,10 +362,76 @@ class UploadAction:
             cache_directory=cache_directory,
         )
 
+    @classmethod
+    def tasks(
+        cls,
+        id_mapping: MutableMapping[str, str],
+        cache_directory: pathlib.Path,
+        thread_lock: threading.Lock,
+        simvue_monitor_run: SimvueRun | None,
+        *,
+        throw_exceptions: bool = False,
+        retry_failed: bool = False,
+        upload_status: dict[str, int | float] | None = None,
+        run_filter: Callable[[str | None], bool] | None = None,
+    ) -> Generator[UploadTask]:
+        """Iterate through the uploads for objects of this type.
+
+        Parameters
+        ----------
+        id_mapping : MutableMapping[str, str]
+            the offline-online mapping to update after upload.
+        cache_directory : pathlib.Path
+            the local cache directory to read from.
+        thread_lock : threading.Lock
+            the thread lock to use when uploading via multithreading
+            to ensure the upload status is modified correctly.
+        simvue_monitor_run : SimvueRun | None
+            run to track uploading
+        throw_exceptions : bool, optional
+            whether to throw exceptions and terminate, default False.
+        retry_failed : bool, optional
+            whether to retry all failed uploads immediately, by default
+            failed uploads are retried once due.
+        upload_status : dict[str, int | float] | None, optional
+            a mapping which will be updated with upload status, default None.
+        run_filter : Callable[[str | None], bool] | None, optional
+            if provided, only uploads belonging to runs for which this
+            returns True are included, None being passed if the run is
+            not known, by default all uploads are included.
+
+        Yields
+        ------
+        UploadTask
+            upload of a single object.
+        """
+        for identifier, run in CacheManifest.open(cache_directory).entries(
+            cls.object_type,
+            kind=cls.manifest_kind,
+            retry_before=None if retry_failed else time.time(),
+        ):
+            if run_filter and not run_filter(run):
+                continue
+            yield UploadTask(
+                object_type=cls.object_type,
+                identifier=identifier,
+                run=run,
+                upload=functools.partial(
+                    cls._single_item_upload,
+                    identifier=identifier,
+                    cache_directory=cache_directory,
+                    thread_lock=thread_lock,
+                    throw_exceptions=throw_exceptions,
+                    id_mapping=id_mapping,
+                    simvue_monitor_run=simvue_monitor_run,
+                    upload_status=upload_status,
+                ),
+            )
+
     @classmethod
     def upload(
         cls,
-        id_mapping: dict[str, str],
+        id_mapping: MutableMapping[str, str],
         cache_directory: pathlib.Path,
         thread_lock: threading.Lock,
         threading_threshold: int,
@@ -298,13 +446,13 @@ class UploadAction:
 
         Parameters
         ----------
-        id_mapping : dict[str, str]
+        id_mapping : MutableMapping[str, str]
             the offline-online mapping to update after upload.
         cache_directory : pathlib.Path
             the local cache directory to read from.
         thread_lock : threading.Lock
             the thread lock to use when uploading via multithreading
-            to ensure mappings are modified correctly.
+            to ensure the upload status is modified correctly.
         threading_threshold: int
             the number of cached files above which threading will be used.
         max_thread_workers : int
@@ -318,37 +466,24 @@ class UploadAction:
         upload_status : dict[str, int | float] | None, optional
             a mapping which will be updated with upload status, default None.
         """
-        _iterable = cls.uploadable_objects(cache_directory)
+        _tasks = cls.tasks(
+            id_mapping=id_mapping,
+            cache_directory=cache_directory,
+            thread_lock=thread_lock,
+            simvue_monitor_run=simvue_monitor_run,
+            throw_exceptions=throw_exceptions,
+            retry_failed=retry_failed,
+            upload_status=upload_status,
+        )
         if cls.count(cache_directory) < threading_threshold:
-            for identifier in _iterable:
-                cls._single_item_upload(
-                    identifier=identifier,
-                    cache_directory=cache_directory,
-                    thread_lock=thread_lock,
-                    throw_exceptions=throw_exceptions,
-                    retry_failed=retry_failed,
-                    id_mapping=id_mapping,
-                    simvue_monitor_run=simvue_monitor_run,
-                    upload_status=upload_status,
-                )
+            for task in _tasks:
+                task.upload()
         else:
             with ThreadPoolExecutor(
                 max_workers=max_thread_workers,
                 thread_name_prefix="sender_session_upload",
             ) as executor:
-                _results = executor.map(
-                    lambda identifier: cls._single_item_upload(
-                        identifier=identifier,
-                        cache_directory=cache_directory,
-                        thread_lock=thread_lock,
-                        throw_exceptions=throw_exceptions,
-                        retry_failed=retry_failed,
-                        id_mapping=id_mapping,
-                        simvue_monitor_run=simvue_monitor_run,
-                        upload_status=upload_status,
-                    ),
-                    _iterable,
-                )
+                _results = executor.map(lambda task: task.upload(), _tasks)
                 # This will raise any exceptions encountered during sending
                 for _ in _results:
                     pass
@@ -356,6 +491,7 @@ class UploadAction:
 
 class ArtifactUploadAction(UploadAction):
     object_type: str = "artifacts"
+    dependencies: tuple[str, ...] = ("storage", "runs")
 
     @override
     @classmethod
@@ -455,6 +591,8 @@ class ArtifactUploadAction(UploadAction):
 
 class RunUploadAction(UploadAction):
     object_type: str = "runs"
+    dependencies: tuple[str, ...] = ("folders", "tags", "alerts")
+    run_scoped: bool = True
 
     @override
     @classmethod
@@ -478,6 +616,20 @@ class RunUploadAction(UploadAction):
 
         return Run(identifier=online_id, _read_only=False, **data)
 
+    @override
+    @classmethod
+    def tasks(
+        cls,
+        *args,
+        run_filter: Callable[[str | None], bool] | None = None,
+        **kwargs,
+    ) -> Generator[UploadTask]:
+        """Iterate through the uploads for runs, each belonging to itself."""
+        for task in super().tasks(*args, **kwargs):
+            if run_filter and not run_filter(task.identifier):
+                continue
+            yield dataclasses.replace(task, run=task.identifier)
+
     @override
     @classmethod
     def post_tasks(
@@ -489,8 +641,8 @@ class RunUploadAction(UploadAction):
     ) -> None:
         """Post-upload actions.
 
-        Removes local JSON data on successful upload, also handles removal
-        of additional files defining related identifiers.
+        Removes local JSON data on successful upload, and once the run has
+        been closed the stored identifiers of the run, its folder and alerts.
 
         Parameters
         -----------
@@ -510,24 +662,17 @@ class RunUploadAction(UploadAction):
             cache_directory=cache_directory,
         )
 
-        _ = cache_directory.joinpath("server_ids", f"{offline_id}.txt").write_text(
-            online_id
-        )
-
         if not cache_directory.joinpath(
             cls.object_type, f"{offline_id}.closed"
         ).exists():
             return
 
         _alerts_list: list[str] = typing.cast("list[str]", data.get("alerts", []))
+        _folder_id: str | None = data.get("folder_id")
 
-        for _id in _alerts_list:
-            cache_directory.joinpath("server_ids", f"{_id}.txt").unlink()
-
-        if _folder_id := data.get("folder_id"):
-            cache_directory.joinpath("server_ids", f"{_folder_id}.txt").unlink()
-
-        cache_directory.joinpath("server_ids", f"{offline_id}.txt").unlink()
+        IdMapping(CacheManifest.open(cache_directory)).forget(
+            [*_alerts_list, *([_folder_id] if _folder_id else []), offline_id]
+        )
         cache_directory.joinpath(cls.object_type, f"{offline_id}.closed").unlink()
         cls.logger.info("Run '%s' closed - deleting cached copies...", offline_id)
 
@@ -557,42 +702,6 @@ class FolderUploadAction(UploadAction):
 
         return Folder(identifier=online_id, _read_only=False, **data)
 
-    @classmethod
-    @override
-    def post_tasks(
-        cls,
-        offline_id: str,
-        online_id: str,
-        data: dict[str, typing.Any],
-        cache_directory: pathlib.Path,
-    ) -> None:
-        """Post-upload actions.
-
-        Removes local JSON data on successful upload, also handles removal
-        of additional files defining related identifiers.
-
-        Parameters
-        -----------
-        offline_id : str
-            the offline identifier for the upload.
-        online_id : str
-            the recorded online identifier after upload.
-        data : dict[str, Any]
-            the data sent during upload.
-        cache_directory : pathlib.Path
-            the local cache directory to read from.
-        """
-        super().post_tasks(
-            offline_id=offline_id,
-            online_id=online_id,
-            data=data,
-            cache_directory=cache_directory,
-        )
-
-        _ = cache_directory.joinpath("server_ids", f"{offline_id}.txt").write_text(
-            online_id
-        )
-
 
 class TenantUploadAction(UploadAction):
     object_type: str = "tenants"
@@ -622,6 +731,7 @@ class TenantUploadAction(UploadAction):
 
 class UserUploadAction(UploadAction):
     object_type: str = "users"
+    dependencies: tuple[str, ...] = ("tenants",)
 
     @classmethod
     @override
@@ -671,36 +781,6 @@ class TagUploadAction(UploadAction):
 
         return Tag(identifier=online_id, _read_only=False, **data)
 
-    @classmethod
-    @override
-    def post_tasks(
-        cls,
-        offline_id: str,
-        online_id: str,
-        data: dict[str, typing.Any],
-        cache_directory: pathlib.Path,
-    ) -> None:
-        """Post-upload actions.
-
-        Removes local JSON data on successful upload, also handles removal
-        of additional files defining related identifiers.
-
-        Parameters
-        -----------
-        offline_id : str
-            the offline identifier for the upload.
-        online_id : str
-            the recorded online identifier after upload.
-        data : dict[str, Any]
-            the data sent during upload.
-        cache_directory : pathlib.Path
-            the local cache directory to read from.
-        """
-        super().post_tasks(offline_id, online_id, data, cache_directory)
-        _ = cache_directory.joinpath("server_ids", f"{offline_id}.txt").write_text(
-            online_id
-        )
-
 
 class AlertUploadAction(UploadAction):
     object_type: str = "alerts"
@@ -736,36 +816,6 @@ class AlertUploadAction(UploadAction):
 
         return Alert(identifier=online_id, _read_only=False, **data)
 
-    @classmethod
-    @override
-    def post_tasks(
-        cls,
-        offline_id: str,
-        online_id: str,
-        data: dict[str, typing.Any],
-        cache_directory: pathlib.Path,
-    ) -> None:
-        """Post-upload actions.
-
-        Removes local JSON data on successful upload, also handles removal
-        of additional files defining related identifiers.
-
-        Parameters
-        -----------
-        offline_id : str
-            the offline identifier for the upload.
-        online_id : str
-            the recorded online identifier after upload.
-        data : dict[str, Any]
-            the data sent during upload.
-        cache_directory : pathlib.Path
-            the local cache directory to read from.
-        """
-        super().post_tasks(offline_id, online_id, data, cache_directory)
-        _ = cache_directory.joinpath("server_ids", f"{offline_id}.txt").write_text(
-            online_id
-        )
-
 
 class StorageUploadAction(UploadAction):
     object_type: str = "storage"
@@ -800,6 +850,7 @@ class StorageUploadAction(UploadAction):
 
 class GridUploadAction(UploadAction):
     object_type: str = "grids"
+    dependencies: tuple[str, ...] = ("runs",)
 
     @classmethod
     @override
@@ -824,9 +875,473 @@ class GridUploadAction(UploadAction):
         return Grid(identifier=online_id, _read_only=False, **data)
 
 
-class MetricsUploadAction(UploadAction):
-    object_type: str = "metrics"
+class SegmentUploadAction(UploadAction):
+    """Upload action for run data cached within segmented logs.
+
+    Rather than a request being made for each cached JSON file or segment
+    record, the entries for each run are combined into batches of at most
+    'max_batch_entries' entries and approximately 'max_batch_size' bytes,
+    each batch being sent as a single request.
+
+    Cached JSON files are uploaded first, followed by the records within
+    the segments for each run. The position of the last uploaded record
+    is recorded for each segment within the cache manifest so that upload
+    can resume from it, segments being removed once sealed and uploaded.
+    """
+
     singular_object: bool = False
+    dependencies: tuple[str, ...] = ("runs",)
+    run_scoped: bool = True
+    batch_key: str = ""
+    max_batch_entries: int = MAX_BUFFER_SIZE
+    max_batch_size: int = 8 * 1024 * 1024
+
+    @override
+    @classmethod
+    def count(cls, cache_directory: pathlib.Path) -> int:
+        """Return number of files to upload of this type.
+
+        Parameters
+        ----------
+        cache_directory : pathlib.Path
+            the local cache directory to read from.
+
+        Returns
+        -------
+        int
+            the number of JSON files and segments pending upload.
+        """
+        return CacheManifest.open(cache_directory).count(cls.object_type)
+
+    @staticmethod
+    def offset_file(segment: pathlib.Path) -> pathlib.Path:
+        """Returns the file recording upload progress for a segment.
+
+        Used by earlier versions of Simvue, progress now being recorded
+        within the cache manifest.
+
+        Parameters
+        ----------
+        segment : pathlib.Path
+            path of the segment file.
+
+        Returns
+        -------
+        pathlib.Path
+            path of the offset file
+        """
+        return segment.with_suffix(".offset")
+
+    @classmethod
+    def _upload_batch(
+        cls,
+        run: str,
+        entries: list[dict[str, typing.Any]],
+        n_items: int,
+        id_mapping: MutableMapping[str, str],
+        thread_lock: threading.Lock,
+        simvue_monitor_run: SimvueRun | None,
+        *,
+        throw_exceptions: bool = False,
+        upload_status: dict[str, str | float] | None,
+    ) -> bool:
+        """Send the combined entries of cached items for a run as one object.
+
+        Returns
+        -------
+        bool
+            whether the upload was successful
+        """
+        try:
+            _object = cls.initialise_object(
+                online_id=None, run=run, **{cls.batch_key: entries}
+            )
+
+            _object.on_reconnect(id_mapping)
+
+            _object.commit()
+        except Exception as err:
+            if throw_exceptions:
+                raise err
+            _exception_msg: str = (
+                f"Error while committing {cls.object_type} for run '{run}': {err}"
+            )
+            if simvue_monitor_run:
+                simvue_monitor_run.log_event(_exception_msg)
+                simvue_monitor_run.log_alert(
+                    name="sender_object_upload_failure", state="critical"
+                )
+            cls.logger.error(_exception_msg)
+            return False
+
+        cls.logger.info(
+            "Created %s for run '%s' from %d cached items",
+            cls.object_type,
+            run,
+            n_items,
+        )
+
+        if upload_status is not None:
+            with thread_lock:
+                upload_status.setdefault(cls.object_type, 0)
+                upload_status[cls.object_type] += n_items
+                if simvue_monitor_run:
+                    simvue_monitor_run.log_metrics(
+                        {f"uploads.{cls.object_type}": upload_status[cls.object_type]}
+                    )
+
+        return True
+
+    @classmethod
+    def _file_run(
+        cls, cache_directory: pathlib.Path, offline_id: str, run: str | None
+    ) -> str | None:
+        """Returns the run a cached file belongs to, read from the file if not known"""
+        if run:
+            return run
+        if (_data := cls._load_cached(cache_directory, offline_id)) is None:
+            return None
+        return _data["run"]
+
+    @classmethod
+    def _file_batches(
+        cls,
+        cache_directory: pathlib.Path,
+        retry_failed: bool,
+        run_filter: Callable[[str | None], bool] | None = None,
+    ) -> Generator[tuple[str, list[str]]]:
+        """Group cached JSON files into batches for each run.
+
+        Files are only read here if the manifest does not record their
+        run, their content being read when the batch is uploaded. Each
+        batch has at most 'max_batch_entries' files, and approximately
+        'max_batch_size' bytes.
+
+        Yields
+        ------
+        tuple[str, list[str]]
+            the run identifier, and the offline identifier of each file
+            within the batch.
+        """
+        # Pending batch for each run, with its size
+        _pending: dict[str, tuple[list[str], int]] = {}
+
+        _manifest = CacheManifest.open(cache_directory)
+
+        for identifier, run in _manifest.entries(
+            cls.object_type, retry_before=None if retry_failed else time.time()
+        ):
+            if run and run_filter and not run_filter(run):
+                continue
+
+            if not (_run := cls._file_run(cache_directory, identifier, run)):
+                continue
+
+            if run_filter and not run_filter(_run):
+                continue
+
+            try:
+                _size = cls.json_file(cache_directory, identifier).stat().st_size
+            except FileNotFoundError:
+                _manifest.remove(cls.object_type, identifier)
+                continue
+
+            _batch, _batch_size = _pending.get(_run, ([], 0))
+
+            if _batch and (
+                len(_batch) >= cls.max_batch_entries
+                or _batch_size + _size > cls.max_batch_size
+            ):
+                yield _run, _batch
+                _batch, _batch_size = [], 0
+
+            _batch.append(identifier)
+            _pending[_run] = (_batch, _batch_size + _size)
+
+        for run, (batch, _) in _pending.items():
+            yield run, batch
+
+    @classmethod
+    def _upload_files(
+        cls,
+        run: str,
+        batch: list[str],
+        id_mapping: MutableMapping[str, str],
+        cache_directory: pathlib.Path,
+        thread_lock: threading.Lock,
+        simvue_monitor_run: SimvueRun | None,
+        *,
+        throw_exceptions: bool = False,
+        upload_status: dict[str, str | float] | None,
+    ) -> None:
+        """Upload a batch of cached JSON files for a single run.
+
+        The files are read as they are uploaded, in requests of at most
+        'max_batch_entries' entries. On failure every file within the
+        request is marked as failed. On success the entries for these
+        files are removed from the manifest together, so an interrupted
+        upload is never partially repeated.
+        """
+        _manifest = CacheManifest.open(cache_directory)
+
+        for files in cls._file_requests(cache_directory, batch):
+            if not cls._upload_batch(
+                run,
+                [
+                    entry
+                    for data in files.values()
+                    for entry in data.get(cls.batch_key, [])
+                ],
+                len(files),
+                id_mapping=id_mapping,
+                thread_lock=thread_lock,
+                simvue_monitor_run=simvue_monitor_run,
+                throw_exceptions=throw_exceptions,
+                upload_status=upload_status,
+            ):
+                for identifier, data in files.items():
+                    cls._log_upload_failed(cache_directory, identifier, data)
+                return
+
+            _manifest.remove_all(cls.object_type, list(files))
+            for identifier in files:
+                cls.json_file(cache_directory, identifier).unlink(missing_ok=True)
+
+    @classmethod
+    def _file_requests(
+        cls, cache_directory: pathlib.Path, batch: list[str]
+    ) -> Generator[dict[str, dict[str, typing.Any]]]:
+        """Read the files of a batch, grouped into requests.
+
+        Yields
+        ------
+        dict[str, dict[str, Any]]
+            the content of each file within a request of at most
+            'max_batch_entries' entries.
+        """
+        _files: dict[str, dict[str, typing.Any]] = {}
+        _n_entries: int = 0
+
+        for identifier in batch:
+            if (_data := cls._load_cached(cache_directory, identifier)) is None:
+                continue
+
+            _n_file_entries: int = len(_data.get(cls.batch_key, []))
+
+            if _files and _n_entries + _n_file_entries > cls.max_batch_entries:
+                yield _files
+                _files, _n_entries = {}, 0
+
+            _files[identifier] = _data
+            _n_entries += _n_file_entries
+
+        if _files:
+            yield _files
+
+    @classmethod
+    def _upload_segments(
+        cls,
+        segments: list[pathlib.Path],
+        id_mapping: MutableMapping[str, str],
+        cache_directory: pathlib.Path,
+        thread_lock: threading.Lock,
+        simvue_monitor_run: SimvueRun | None,
+        *,
+        throw_exceptions: bool = False,
+        upload_status: dict[str, str | float] | None,
+    ) -> None:
+        """Upload the records within the segments of a single run in order.
+
+        Upload stops at the first failure, or at the end of a segment which
+        has not been sealed, to be resumed from that record next time.
+        """
+        _manifest = CacheManifest.open(cache_directory)
+        _upload_batch = functools.partial(
+            cls._upload_batch,
+            id_mapping=id_mapping,
+            thread_lock=thread_lock,
+            simvue_monitor_run=simvue_monitor_run,
+            throw_exceptions=throw_exceptions,
+            upload_status=upload_status,
+        )
+
+        for segment in segments:
+            if not cls._upload_segment(
+                segment, _manifest, _upload_batch, simvue_monitor_run
+            ):
+                return
+
+    @classmethod
+    def _upload_segment(
+        cls,
+        segment: pathlib.Path,
+        manifest: CacheManifest,
+        upload_batch: Callable[[str, list[dict[str, typing.Any]], int], bool],
+        simvue_monitor_run: SimvueRun | None,
+    ) -> bool:
+        """Upload the records of a segment from the last checkpoint.
+
+        Returns
+        -------
+        bool
+            whether the segment was uploaded in full and removed, such
+            that the next segment for the run can be uploaded.
+        """
+        _offset_file = cls.offset_file(segment)
+
+        try:
+            _reader = SegmentReader(segment)
+        except FileNotFoundError:
+            manifest.remove(cls.object_type, segment.stem, kind="segment")
+            return True
+        except ValueError as err:
+            # Segment header may not yet have been written
+            cls.logger.warning("Skipping segment '%s': %s", segment, err)
+            return False
+
+        if simvue_monitor_run:
+            simvue_monitor_run.log_event(
+                f"Uploading {cls.object_type} for run '{_reader.run}'"
+            )
+
+        _start: int | None = manifest.checkpoint(cls.object_type, segment.stem)
+        if _start is None:
+            _start = (
+                int(_offset_file.read_text())
+                if _offset_file.exists()
+                else _reader.data_offset
+            )
+
+        for batch, n_records, end in cls._segment_batches(_reader, _start):
+            if batch and not upload_batch(_reader.run, batch, n_records):
+                manifest.record_failure(cls.object_type, segment.stem, kind="segment")
+                return False
+            manifest.set_checkpoint(cls.object_type, segment.stem, end)
+
+        if not _reader.sealed:
+            # Further records may still be written to this segment
+            return False
+
+        manifest.remove(cls.object_type, segment.stem, kind="segment")
+        segment.unlink()
+        _offset_file.unlink(missing_ok=True)
+        return True
+
+    @classmethod
+    def _segment_batches(
+        cls, reader: SegmentReader, offset: int
+    ) -> Generator[tuple[list[dict[str, typing.Any]], int, int]]:
+        """Group the records of a segment following an offset into batches.
+
+        Yields the entries of each batch, the number of records combined
+        and the offset following the last of these records.
+        """
+        _batch: list[dict[str, typing.Any]] = []
+        _batch_records: int = 0
+        _batch_size: int = 0
+
+        for record, record_end in reader.records(offset):
+            _entries = record.get(cls.batch_key, [])
+
+            if _batch and (
+                len(_batch) + len(_entries) > cls.max_batch_entries
+                or _batch_size + record_end - offset > cls.max_batch_size
+            ):
+                yield _batch, _batch_records, offset
+                _batch, _batch_records, _batch_size = [], 0, 0
+
+            _batch += _entries
+            _batch_records += 1
+            _batch_size += record_end - offset
+            offset = record_end
+
+        if _batch_records:
+            yield _batch, _batch_records, offset
+
+    @override
+    @classmethod
+    def tasks(
+        cls,
+        id_mapping: MutableMapping[str, str],
+        cache_directory: pathlib.Path,
+        thread_lock: threading.Lock,
+        simvue_monitor_run: SimvueRun | None,
+        *,
+        throw_exceptions: bool = False,
+        retry_failed: bool = False,
+        upload_status: dict[str, int | float] | None = None,
+        run_filter: Callable[[str | None], bool] | None = None,
+    ) -> Generator[UploadTask]:
+        """Iterate through the uploads of cached files and segments.
+
+        Each batch of cached files is a separate upload, whereas the
+        segments for a given run are uploaded in order as a single task.
+
+        Parameters
+        ----------
+        id_mapping : MutableMapping[str, str]
+            the offline-online mapping to update after upload.
+        cache_directory : pathlib.Path
+            the local cache directory to read from.
+        thread_lock : threading.Lock
+            the thread lock to use when uploading via multithreading
+            to ensure the upload status is modified correctly.
+        simvue_monitor_run : SimvueRun | None
+            run to track uploading
+        throw_exceptions : bool, optional
+            whether to throw exceptions and terminate, default False.
+        retry_failed : bool, optional
+            whether to retry all failed uploads immediately, by default
+            failed uploads are retried once due.
+        upload_status : dict[str, int | float] | None, optional
+            a mapping which will be updated with upload status, default None.
+        run_filter : Callable[[str | None], bool] | None, optional
+            if provided, only uploads belonging to runs for which this
+            returns True are included, None being passed if the run is
+            not known, by default all uploads are included.
+
+        Yields
+        ------
+        UploadTask
+            upload of a batch of files or the segments of a run.
+        """
+        _kwargs: dict[str, typing.Any] = {
+            "id_mapping": id_mapping,
+            "cache_directory": cache_directory,
+            "thread_lock": thread_lock,
+            "simvue_monitor_run": simvue_monitor_run,
+            "throw_exceptions": throw_exceptions,
+            "upload_status": upload_status,
+        }
+
+        for run, batch in cls._file_batches(cache_directory, retry_failed, run_filter):
+            yield UploadTask(
+                object_type=cls.object_type,
+                identifier=run,
+                run=run,
+                upload=functools.partial(cls._upload_files, run, batch, **_kwargs),
+            )
+
+        for run, segments in (
+            CacheManifest.open(cache_directory)
+            .segments(
+                cls.object_type, retry_before=None if retry_failed else time.time()
+            )
+            .items()
+        ):
+            if run_filter and not run_filter(run):
+                continue
+            yield UploadTask(
+                object_type=cls.object_type,
+                identifier=run,
+                run=run,
+                upload=functools.partial(cls._upload_segments, segments, **_kwargs),
+            )
+
+
+class MetricsUploadAction(SegmentUploadAction):
+    object_type: str = "metrics"
+    batch_key: str = "metrics"
 
     @classmethod
     @override
@@ -850,9 +1365,10 @@ class MetricsUploadAction(UploadAction):
         return Metrics.new(**data)
 
 
-class GridMetricsUploadAction(UploadAction):
+class GridMetricsUploadAction(SegmentUploadAction):
     object_type: str = "grid_metrics"
-    singular_object: bool = False
+    dependencies: tuple[str, ...] = ("runs", "grids")
+    batch_key: str = "data"
 
     @classmethod
     @override
@@ -876,9 +1392,9 @@ class GridMetricsUploadAction(UploadAction):
         return GridMetrics.new(**data)
 
 
-class EventsUploadAction(UploadAction):
+class EventsUploadAction(SegmentUploadAction):
     object_type: str = "events"
-    singular_object: bool = False
+    batch_key: str = "events"
 
     @classmethod
     @override
@@ -905,6 +1421,9 @@ class EventsUploadAction(UploadAction):
 class HeartbeatUploadAction(UploadAction):
     object_type: str = "heartbeat"
     singular_object: bool = True
+    manifest_kind: ManifestKind = "heartbeat"
+    dependencies: tuple[str, ...] = ("runs",)
+    run_scoped: bool = True
 
     @override
     @classmethod
@@ -924,32 +1443,29 @@ class HeartbeatUploadAction(UploadAction):
         _ = cache_directory
         pass
 
-    @override
-    @classmethod
-    def uploadable_objects(cls, cache_directory: pathlib.Path) -> Generator[str]:
-        """Iterate through uploadable heartbeat run identifiers."""
-        for file in cache_directory.glob("runs/*.heartbeat"):
-            yield file.stem
-
     @override
     @classmethod
     def _single_item_upload(
         cls,
         identifier: str,
-        id_mapping: dict[str, str],
+        id_mapping: MutableMapping[str, str],
         cache_directory: pathlib.Path,
         thread_lock: threading.Lock,
         simvue_monitor_run: SimvueRun | None,
         *,
         throw_exceptions: bool = False,
-        retry_failed: bool = False,
         upload_status: dict[str, str | float] | None,
     ) -> None:
         """Upload a single heartbeat item."""
         _ = simvue_monitor_run
         if not (_online_id := id_mapping.get(identifier)):
             # Run has been closed - can just remove heartbeat and continue
-            cache_directory.joinpath(f"runs/{identifier}.heartbeat").unlink()
+            CacheManifest.open(cache_directory).remove(
+                cls.object_type, identifier, kind=cls.manifest_kind
+            )
+            cache_directory.joinpath(f"runs/{identifier}.heartbeat").unlink(
+                missing_ok=True
+            )
             return
 
         _local_config: SimvueConfiguration = SimvueConfiguration.fetch(mode="online")
@@ -1031,44 +1547,55 @@ class CO2IntensityUploadAction(UploadAction):
 
     @override
     @classmethod
-    def _single_item_upload(
+    def tasks(
         cls,
-        identifier: str,
-        id_mapping: dict[str, str],
+        id_mapping: MutableMapping[str, str],
         cache_directory: pathlib.Path,
         thread_lock: threading.Lock,
         simvue_monitor_run: SimvueRun | None,
         *,
         throw_exceptions: bool = False,
         retry_failed: bool = False,
-        upload_status: dict[str, str | float] | None,
-    ) -> None:
-        _ = simvue_monitor_run
-        _ = identifier
-        _ = id_mapping
-        _ = cache_directory
-        _ = thread_lock
+        upload_status: dict[str, int | float] | None = None,
+        run_filter: Callable[[str | None], bool] | None = None,
+    ) -> Generator[UploadTask]:
+        """Refresh of the CO2 intensity data as a single task."""
+        _ = retry_failed
+        if run_filter and not run_filter(None):
+            return
+        yield UploadTask(
+            object_type=cls.object_type,
+            identifier=cls.object_type,
+            run=None,
+            upload=functools.partial(
+                cls._single_item_upload,
+                identifier=cls.object_type,
+                id_mapping=id_mapping,
+                cache_directory=cache_directory,
+                thread_lock=thread_lock,
+                simvue_monitor_run=simvue_monitor_run,
+                throw_exceptions=throw_exceptions,
+                upload_status=upload_status,
+            ),
+        )
 
     @override
     @classmethod
-    def upload(
+    def _single_item_upload(
         cls,
-        id_mapping: dict[str, str],
+        identifier: str,
+        id_mapping: MutableMapping[str, str],
         cache_directory: pathlib.Path,
         thread_lock: threading.Lock,
-        threading_threshold: int,
-        max_thread_workers: int,
+        simvue_monitor_run: SimvueRun | None,
         *,
         throw_exceptions: bool = False,
-        retry_failed: bool = False,
-        upload_status: dict[str, str | float] | None = None,
-        simvue_monitor_run: SimvueRun | None = None,
+        upload_status: dict[str, str | float] | None,
     ) -> None:
         """Upload CO2 intensity data."""
+        _ = identifier
         _ = id_mapping
         _ = thread_lock
-        _ = threading_threshold
-        _ = max_thread_workers
         _ = simvue_monitor_run
         _ = upload_status
 
@@ -4,14 +4,27 @@ These are designed to be run with a cron task in cases where server connection
 is either not possible on the simulation machine, or connection is limited.
 """
 
+import contextlib
 import datetime
+import functools
 import logging
+import multiprocessing
+import pathlib
 import threading
+import time
 import typing
+import zlib
 import pydantic
 import psutil
 
-from simvue.sender.actions import UPLOAD_ACTION_ORDER
+from collections.abc import Callable, Generator
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from simvue.api.request import configure_rate_limit, transfer_stats
+from simvue.cache import CacheManifest, IdMapping
+from simvue.sender.actions import UPLOAD_ACTION_ORDER, UploadAction
+from simvue.sender.scheduler import UploadScheduler, upload_phases
+from simvue.sender.watch import create_cache_watcher
 from simvue.config.user import SimvueConfiguration
 from simvue.run import Run
 
@@ -36,6 +49,54 @@ UploadItem = typing.Literal[
 
 UPLOAD_ORDER: list[str] = [action.object_type for action in UPLOAD_ACTION_ORDER]
 
+FOLLOW_INTERVAL: float = 1.0
+FOLLOW_IDLE_INTERVAL: float = 30.0
+
+# Senders for each cache within a worker process, retained between uploads
+_worker_senders: dict[pathlib.Path, "Sender"] = {}
+
+
+def _in_shard(shard: int, n_shards: int, run: str | None) -> bool:
+    """Returns whether a run is uploaded by the given shard"""
+    return run is not None and zlib.crc32(run.encode()) % n_shards == shard
+
+
+def _upload_shard(
+    cache_directory: pathlib.Path,
+    objects_to_upload: list[str],
+    shard: int,
+    n_shards: int,
+    **sender_options,
+) -> tuple[dict[str, int | float], dict[str, int | float]]:
+    """Upload the objects for one shard of runs within a worker process.
+
+    Returns
+    -------
+    dict[str, int | float]
+        the number of uploads of each object type.
+    dict[str, int | float]
+        the number of bytes and requests sent, see 'transfer_stats'.
+    """
+    if not (_sender := _worker_senders.get(cache_directory)):
+        _sender = _worker_senders[cache_directory] = Sender(
+            cache_directory=cache_directory, **sender_options
+        )
+    _sender._upload_status = {}
+    _transferred: dict[str, int | float] = transfer_stats()
+    with _sender._rate_limit():
+        _sender._upload_phase(
+            [
+                action
+                for action in UPLOAD_ACTION_ORDER
+                if action.object_type in objects_to_upload
+            ],
+            None,
+            run_filter=functools.partial(_in_shard, shard, n_shards),
+        )
+    return _sender._upload_status, {
+        key: value - _transferred[key] for key, value in transfer_stats().items()
+    }
+
 
 class Sender:
     @pydantic.validate_call
@@ -49,6 +110,10 @@ class Sender:
         run_notification: typing.Literal["none", "all", "email"] = "none",
         run_retention_period: str | None = None,
         monitor_uploads: bool = False,
+        rebuild_manifest: bool = False,
+        processes: pydantic.PositiveInt = 1,
+        max_bandwidth: pydantic.PositiveInt | None = None,
+        max_request_rate: pydantic.PositiveFloat | None = None,
     ) -> None:
         """Initialise a local data sender.
 
@@ -59,18 +124,32 @@ class Sender:
         max_workers : int, optional
             The maximum number of threads to use, default 5.
         threading_threshold : int, optional
-            The number of cached files above which threading will be used, default 10.
+            The number of uploads above which threading will be used, default 10.
         throw_exceptions : bool, optional
             Whether to throw exceptions as they are encountered in the sender,
             default is False (exceptions will be logged)
         retry_failed_uploads : bool, optional
-            Whether to retry sending objects which previously failed, by default False
+            Whether to immediately retry sending all objects which previously
+            failed, by default False (failed uploads are retried with
+            exponential backoff up to a maximum number of attempts)
         monitor_uploads : bool, optional
             Whether to track uploads as a Simvue run, by default False
+        rebuild_manifest : bool, optional
+            Whether to rebuild the cache manifest from the files within the
+            cache, required if files were written without updating it, by
+            default False
+        processes : int, optional
+            The number of processes to use, runs being divided between
+            processes, default 1.
+        max_bandwidth : int | None, optional
+            The maximum number of bytes per second to send to the server
+            across all threads and processes, by default no limit.
+        max_request_rate : float | None, optional
+            The maximum number of requests per second to send to the server
+            across all threads and processes, by default no limit.
         """
         _local_config: SimvueConfiguration = SimvueConfiguration.fetch(mode="online")
         self._cache_directory = cache_directory or _local_config.offline.cache
-        self._cache_directory.joinpath("server_ids").mkdir(parents=True, exist_ok=True)
         self._throw_exceptions = throw_exceptions
         self._threading_threshold = threading_threshold
         self._retry_failed_uploads = retry_failed_uploads
@@ -81,10 +160,20 @@ class Sender:
         self._run_retention_period: str | None = run_retention_period
         self._upload_status: dict[str, str | float] = {}
         self._monitor_uploads: bool = monitor_uploads
-        self._id_mapping = {
-            file_path.name.split(".")[0]: file_path.read_text()
-            for file_path in self._cache_directory.glob("server_ids/*.txt")
-        }
+        self._processes: int = processes
+        self._max_bandwidth: int | None = max_bandwidth
+        self._max_request_rate: float | None = max_request_rate
+        self._transferred: dict[str, int | float] = {}
+        self._transferred_start: dict[str, int | float] = {}
+        self._throughput_time: float = time.monotonic()
+        self._throughput_bytes: int | float = 0
+        self._executor: Executor | None = None
+        self._manifest: CacheManifest = CacheManifest.open(self._cache_directory)
+        if rebuild_manifest:
+            self._manifest.rebuild()
+        self._id_mapping: IdMapping = IdMapping(self._manifest)
+        if (_legacy_ids := self._cache_directory.joinpath("server_ids")).is_dir():
+            self._id_mapping.migrate(_legacy_ids)
 
     @property
     def locked(self) -> bool:
@@ -96,7 +185,7 @@ class Sender:
         )
 
     @property
-    def id_mapping(self) -> dict[str, str]:
+    def id_mapping(self) -> IdMapping:
         """Get the ID mapping from offline to online ID."""
         return self._id_mapping
 
@@ -142,6 +231,161 @@ class Sender:
 
         return _run
 
+    def _upload_phase(
+        self,
+        actions: list[type[UploadAction]],
+        monitor_run: Run | None,
+        run_filter: Callable[[str | None], bool] | None,
+    ) -> None:
+        """Upload all cached objects for the given actions in this process."""
+        UploadScheduler(
+            actions,
+            max_workers=self._max_workers,
+            threading_threshold=self._threading_threshold,
+        ).upload(
+            cache_directory=self._cache_directory,
+            id_mapping=self._id_mapping,
+            thread_lock=self._thread_lock,
+            throw_exceptions=self._throw_exceptions,
+            retry_failed=self._retry_failed_uploads,
+            simvue_monitor_run=monitor_run,
+            upload_status=self._upload_status,
+            run_filter=run_filter,
+        )
+
+    def _upload_sharded_phase(
+        self, actions: list[type[UploadAction]], monitor_run: Run | None
+    ) -> None:
+        """Upload the objects for the given actions sharded by run.
+
+        Each worker process uploads the objects for its shard of runs,
+        objects whose run is not known being uploaded by this process.
+        """
+        _futures = [
+            self._executor.submit(
+                _upload_shard,
+                self._cache_directory,
+                [action.object_type for action in actions],
+                shard,
+                self._processes,
+                max_workers=self._max_workers,
+                threading_threshold=self._threading_threshold,
+                throw_exceptions=self._throw_exceptions,
+                retry_failed_uploads=self._retry_failed_uploads,
+                # Limits are shared equally between the worker processes
+                max_bandwidth=self._max_bandwidth
+                and max(1, self._max_bandwidth // self._processes),
+                max_request_rate=self._max_request_rate
+                and self._max_request_rate / self._processes,
+            )
+            for shard in range(self._processes)
+        ]
+
+        for future in _futures:
+            # This will raise any exceptions encountered during sending
+            _upload_status, _transferred = future.result()
+            for key, value in _transferred.items():
+                self._transferred[key] = self._transferred.get(key, 0) + value
+            for object_type, count in _upload_status.items():
+                self._upload_status[object_type] = (
+                    self._upload_status.get(object_type, 0) + count
+                )
+                if monitor_run:
+                    monitor_run.log_metrics(
+                        {f"uploads.{object_type}": self._upload_status[object_type]}
+                    )
+
+        self._upload_phase(actions, monitor_run, run_filter=lambda run: run is None)
+
+    def _log_throughput(self, monitor_run: Run | None) -> None:
+        """Record the bytes and requests sent since the upload started"""
+        if not monitor_run:
+            return
+        _now: float = time.monotonic()
+        _stats: dict[str, int | float] = transfer_stats()
+        _sent: dict[str, int | float] = {
+            key: value - self._transferred_start[key] + self._transferred.get(key, 0)
+            for key, value in _stats.items()
+        }
+        _elapsed: float = _now - self._throughput_time
+        monitor_run.log_metrics(
+            {
+                "sender.bytes_sent": _sent["bytes"],
+                "sender.requests_sent": _sent["requests"],
+                "sender.throttle_time": _sent["wait_time"],
+                "sender.throughput": (_sent["bytes"] - self._throughput_bytes)
+                / max(_elapsed, 1e-9),
+            }
+        )
+        self._throughput_time = _now
+        self._throughput_bytes = _sent["bytes"]
+
+    def _upload_objects(
+        self,
+        objects_to_upload: list[UploadItem] | None,
+        monitor_run: Run | None,
+    ) -> None:
+        """Perform a single pass uploading all cached objects.
+
+        Objects of all types are uploaded concurrently, each object being
+        uploaded once the objects it depends on have been uploaded. If
+        uploading using several processes, the upload is divided into
+        phases, objects belonging to runs being sharded by run across the
+        processes where possible.
+        """
+        _actions: list[type[UploadAction]] = [
+            action
+            for action in UPLOAD_ACTION_ORDER
+            if not objects_to_upload or action.object_type in objects_to_upload
+        ]
+
+        try:
+            if not self._executor:
+                self._upload_phase(_actions, monitor_run, run_filter=None)
+                self._log_throughput(monitor_run)
+            else:
+                for sharded, actions in upload_phases(_actions):
+                    if sharded:
+                        self._upload_sharded_phase(actions, monitor_run)
+                    else:
+                        self._upload_phase(actions, monitor_run, run_filter=None)
+                    self._log_throughput(monitor_run)
+        finally:
+            # Identifiers forgotten during the pass may be required by other
+            # processes until all objects have been uploaded
+            self._id_mapping.purge()
+
+    @contextlib.contextmanager
+    def _rate_limit(self) -> Generator[None]:
+        """Limit the rate of sending within this process for the duration of an upload"""
+        configure_rate_limit(
+            bytes_per_second=self._max_bandwidth,
+            requests_per_second=self._max_request_rate,
+        )
+        self._transferred = {}
+        self._transferred_start = transfer_stats()
+        self._throughput_time = time.monotonic()
+        self._throughput_bytes = 0
+        try:
+            yield
+        finally:
+            configure_rate_limit()
+
+    @contextlib.contextmanager
+    def _worker_processes(self) -> Generator[None]:
+        """Start the worker processes used for the duration of an upload"""
+        if self._processes == 1:
+            yield
+            return
+        with ProcessPoolExecutor(
+            max_workers=self._processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as self._executor:
+            try:
+                yield
+            finally:
+                self._executor = None
+
     @pydantic.validate_call
     def upload(self, objects_to_upload: list[UploadItem] | None = None) -> None:
         """Upload objects to server.
@@ -157,25 +401,76 @@ class Sender:
 
         self._upload_status = {}
 
-        for action in UPLOAD_ACTION_ORDER:
-            if objects_to_upload and action.object_type not in objects_to_upload:
-                continue
+        try:
+            with self._rate_limit(), self._worker_processes():
+                self._upload_objects(objects_to_upload, _monitor_run)
+        finally:
+            if _monitor_run:
+                _monitor_run.close()
+            self._release()
 
-            logger.info("Uploading %s", action.object_type)
+    @pydantic.validate_call(config={"arbitrary_types_allowed": True})
+    def follow(
+        self,
+        objects_to_upload: list[UploadItem] | None = None,
+        *,
+        interval: pydantic.PositiveFloat = FOLLOW_INTERVAL,
+        idle_interval: pydantic.PositiveFloat = FOLLOW_IDLE_INTERVAL,
+        stop_event: threading.Event | None = None,
+    ) -> None:
+        """Continuously upload objects as they are written to the cache.
 
-            _n_objects: int = action.count(self._cache_directory)
+        The cache directory is watched for changes, each change starting an
+        upload of all new objects, with uploads started at most once per
+        interval. Segmented logs for runs which are still active are
+        uploaded up to the last complete record, upload resuming from that
+        record on the next pass. The mapping from offline to online
+        identifiers is held in memory for the lifetime of the sender.
 
-            action.upload(
-                cache_directory=self._cache_directory,
-                id_mapping=self._id_mapping,
-                thread_lock=self._thread_lock,
-                throw_exceptions=self._throw_exceptions,
-                retry_failed=self._retry_failed_uploads,
-                threading_threshold=self._threading_threshold,
-                max_thread_workers=self._max_workers,
-                simvue_monitor_run=_monitor_run,
-                upload_status=self._upload_status,
-            )
-        if _monitor_run:
-            _monitor_run.close()
-        self._release()
+        Parameters
+        ----------
+        objects_to_upload : list[str]
+            Types of objects to upload, by default uploads all types of objects present in cache
+        interval : float, optional
+            minimum time in seconds between uploads, bounding the latency
+            between an object being written and uploaded, default is 1s.
+        idle_interval : float, optional
+            maximum time in seconds between uploads if no changes are
+            detected, allowing failed uploads to be retried, default is 30s.
+        stop_event : threading.Event | None, optional
+            event which when set ends the upload after the current pass,
+            by default upload continues until interrupted.
+        """
+        _stop_event = stop_event or threading.Event()
+
+        self._lock()
+
+        _monitor_run = self._initialise_monitor_run() if self._monitor_uploads else None
+        _watcher = create_cache_watcher(self._cache_directory)
+
+        self._upload_status = {}
+
+        try:
+            with self._rate_limit(), self._worker_processes():
+                while not _stop_event.is_set():
+                    _last_upload: float = time.monotonic()
+                    self._upload_objects(objects_to_upload, _monitor_run)
+
+                    # Limit the rate of uploads, changes during the wait are
+                    # still reported by the watcher
+                    if _stop_event.wait(
+                        max(0, interval - (time.monotonic() - _last_upload))
+                    ):
+                        break
+
+                    while (
+                        not _stop_event.is_set()
+                        and time.monotonic() - _last_upload < idle_interval
+                        and not _watcher.changed(timeout=interval)
+                    ):
+                        pass
+        finally:
+            _watcher.close()
+            if _monitor_run:
+                _monitor_run.close()
+            self._release()
@@ -0,0 +1,352 @@
+"""Schedule the upload of cached objects according to their dependencies.
+
+Rather than each object type being uploaded in turn, the uploads for all
+object types are submitted to a single pool of workers as soon as the
+objects they depend on have been uploaded. Dependencies are declared by
+each upload action as the object types which must be uploaded first, with
+objects belonging to a run, such as metrics and events, only waiting for
+the upload of that run if it is pending.
+
+When uploading using several processes, the object types are divided into
+phases, with the objects of run scoped types being sharded by run across
+the processes, see 'upload_phases'.
+"""
+
+import collections
+import logging
+import pathlib
+import threading
+import typing
+
+from collections.abc import Callable, Iterator, MutableMapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from simvue.run import Run as SimvueRun
+from simvue.sender.actions import UploadAction, UploadTask
+
+logger = logging.getLogger(__name__)
+
+
+def upload_phases(
+    actions: Sequence[type[UploadAction]],
+) -> list[tuple[bool, list[type[UploadAction]]]]:
+    """Divide upload actions into phases for uploading across processes.
+
+    Objects of run scoped types, which depend only on the upload of their
+    own run, can be sharded by run across processes. Each phase contains
+    either only sharded or only unsharded object types, with all object
+    types a phase depends on being uploaded in an earlier phase, other
+    than sharded types depending on runs within the same shard.
+
+    Parameters
+    ----------
+    actions : Sequence[type[UploadAction]]
+        the upload actions for the object types to upload, in an order
+        where each object type follows those it depends on.
+
+    Returns
+    -------
+    list[tuple[bool, list[type[UploadAction]]]]
+        whether each phase is sharded, and the actions within the phase.
+    """
+    # Unsharded phases are given even levels and sharded phases odd levels
+    _levels: dict[str, int] = {}
+
+    for action in actions:
+        _level: int = int(action.run_scoped)
+        for dependency in action.dependencies:
+            if (_dependency_level := _levels.get(dependency)) is None:
+                continue
+            _same_phase: bool = (
+                dependency == "runs"
+                if action.run_scoped
+                else _dependency_level % 2 == 0
+            )
+            _level = max(_level, _dependency_level + (not _same_phase))
+        if _level % 2 != action.run_scoped:
+            _level += 1
+        _levels[action.object_type] = _level
+
+    return [
+        (
+            bool(level % 2),
+            [action for action in actions if _levels[action.object_type] == level],
+        )
+        for level in sorted(set(_levels.values()))
+    ]
+
+
+class _UploadSchedule:
+    """Tracks the uploads which can be started as those they depend on complete.
+
+    The uploads for an object type are only generated once the object
+    types it depends on have been uploaded, and are then taken from the
+    generator as they are required, such that the pending uploads are not
+    all held in memory. Uploads of run scoped types wait only for the
+    upload of their own run, if pending, so the uploads for runs are
+    generated in full before those of the run scoped types.
+    """
+
+    def __init__(self, actions: Sequence[type[UploadAction]], **kwargs) -> None:
+        self._actions: dict[str, type[UploadAction]] = {
+            action.object_type: action for action in actions
+        }
+        self._kwargs: dict[str, typing.Any] = kwargs
+        self._n_blocking: dict[str, int] = dict.fromkeys(self._actions, 0)
+        # Object types unblocked once the uploads for a type are generated,
+        # or once they are complete
+        self._on_generated: dict[str, list[str]] = collections.defaultdict(list)
+        self._on_complete: dict[str, list[str]] = collections.defaultdict(list)
+
+        for action in actions:
+            for dependency in action.dependencies:
+                if dependency not in self._actions:
+                    continue
+                self._n_blocking[action.object_type] += 1
+                if self._waits_for_own_run(action, dependency):
+                    self._on_generated[dependency].append(action.object_type)
+                else:
+                    self._on_complete[dependency].append(action.object_type)
+
+        self._generators: dict[str, Iterator[UploadTask]] = {}
+        self._n_incomplete: dict[str, int] = dict.fromkeys(self._actions, 0)
+        self._n_uploads: dict[str, int] = dict.fromkeys(self._actions, 0)
+        self._completed: set[str] = set()
+        self._pending_runs: set[str] = set()
+        self._waiting: dict[str | None, list[UploadTask]] = collections.defaultdict(
+            list
+        )
+        self.ready: collections.deque[UploadTask] = collections.deque()
+
+        for object_type, n_blocking in list(self._n_blocking.items()):
+            if not n_blocking:
+                self._generate(object_type)
+
+    @staticmethod
+    def _waits_for_own_run(action: type[UploadAction], dependency: str) -> bool:
+        """Returns whether uploads of a type only wait for their own run"""
+        return dependency == "runs" and action.run_scoped
+
+    @property
+    def n_scheduled(self) -> int:
+        """Returns the number of uploads generated so far"""
+        return sum(self._n_uploads.values())
+
+    @property
+    def complete(self) -> bool:
+        """Returns whether the uploads of every object type are complete"""
+        return len(self._completed) == len(self._actions)
+
+    def _generate(self, object_type: str) -> None:
+        """Start generating the uploads for an object type"""
+        _tasks: typing.Iterable[UploadTask] = self._actions[object_type].tasks(
+            **self._kwargs
+        )
+
+        if self._on_generated[object_type]:
+            _tasks = list(_tasks)
+            self._pending_runs.update(task.run for task in _tasks if task.run)
+
+        self._generators[object_type] = iter(_tasks)
+
+        for dependent in self._on_generated[object_type]:
+            self._unblock(dependent)
+
+    def _unblock(self, object_type: str) -> None:
+        """Record that one of the dependencies of an object type is satisfied"""
+        self._n_blocking[object_type] -= 1
+        if not self._n_blocking[object_type]:
+            self._generate(object_type)
+
+    def _finish(self, object_type: str) -> None:
+        """Mark an object type as complete if all of its uploads are complete"""
+        if (
+            object_type in self._generators
+            or object_type in self._completed
+            or self._n_incomplete[object_type]
+        ):
+            return
+
+        self._completed.add(object_type)
+
+        if self._n_uploads[object_type]:
+            logger.info(
+                "Completed %d uploads of %s", self._n_uploads[object_type], object_type
+            )
+
+        if self._on_generated[object_type]:
+            # Release uploads waiting for all runs, i.e. those with no known run
+            for tasks in self._waiting.values():
+                self.ready.extend(tasks)
+            self._waiting.clear()
+
+        for dependent in self._on_complete[object_type]:
+            self._unblock(dependent)
+
+    def _add(self, task: UploadTask) -> None:
+        """Add an upload, to be started once any run it belongs to is uploaded"""
+        _action = self._actions[task.object_type]
+        self._n_incomplete[task.object_type] += 1
+        self._n_uploads[task.object_type] += 1
+
+        if any(
+            self._waits_for_own_run(_action, dependency)
+            and dependency in self._actions
+            and dependency not in self._completed
+            for dependency in _action.dependencies
+        ) and task.run in self._pending_runs | {None}:
+            self._waiting[task.run].append(task)
+        else:
+            self.ready.append(task)
+
+    def generate(self) -> bool:
+        """Generate the next upload from those of the object types which can be uploaded.
+
+        Returns
+        -------
+        bool
+            whether any object types are still generating uploads.
+        """
+        if not self._generators:
+            return False
+
+        _object_type, _tasks = next(iter(self._generators.items()))
+
+        if _task := next(_tasks, None):
+            self._add(_task)
+        else:
+            del self._generators[_object_type]
+            self._finish(_object_type)
+
+        return True
+
+    def complete_upload(self, task: UploadTask) -> None:
+        """Mark an upload as complete, readying any uploads depending only on it"""
+        self._n_incomplete[task.object_type] -= 1
+
+        if self._on_generated[task.object_type] and task.run:
+            self._pending_runs.discard(task.run)
+            self.ready.extend(self._waiting.pop(task.run, []))
+
+        self._finish(task.object_type)
+
+
+class UploadScheduler:
+    """Uploads cached objects concurrently in dependency order."""
+
+    def __init__(
+        self,
+        actions: Sequence[type[UploadAction]],
+        *,
+        max_workers: int,
+        threading_threshold: int,
+    ) -> None:
+        """Initialise a scheduler for the given upload actions.
+
+        Parameters
+        ----------
+        actions : Sequence[type[UploadAction]]
+            the upload actions for the object types to upload.
+        max_workers : int
+            the maximum number of threads to use.
+        threading_threshold : int
+            the number of uploads above which threading will be used.
+        """
+        self._actions: Sequence[type[UploadAction]] = actions
+        self._max_workers: int = max_workers
+        self._threading_threshold: int = threading_threshold
+
+    def _fill(self, schedule: _UploadSchedule) -> None:
+        """Generate uploads until there are enough ready to occupy every worker"""
+        while len(schedule.ready) < self._max_workers and schedule.generate():
+            pass
+
+    def _drain(self, schedule: _UploadSchedule) -> None:
+        """Perform each upload once its dependencies are complete.
+
+        Uploads are performed in turn until more than 'threading_threshold'
+        have been generated, after which they are submitted to a pool of
+        workers.
+        """
+        _executor: ThreadPoolExecutor | None = None
+        _running: dict[Future, UploadTask] = {}
+
+        try:
+            while self._fill(schedule) or schedule.ready or _running:
+                if not _executor and schedule.n_scheduled < self._threading_threshold:
+                    _task = schedule.ready.popleft()
+                    _task.upload()
+                    schedule.complete_upload(_task)
+                    continue
+
+                _executor = _executor or ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="sender_upload",
+                )
+                while schedule.ready and len(_running) < self._max_workers:
+                    _task = schedule.ready.popleft()
+                    _running[_executor.submit(_task.upload)] = _task
+
+                _done, _ = wait(_running, return_when=FIRST_COMPLETED)
+                for future in _done:
+                    # This will raise any exceptions encountered during sending
+                    future.result()
+                    schedule.complete_upload(_running.pop(future))
+        except BaseException:
+            for future in _running:
+                future.cancel()
+            raise
+        finally:
+            if _executor:
+                _executor.shutdown()
+
+    def upload(
+        self,
+        id_mapping: MutableMapping[str, str],
+        cache_directory: pathlib.Path,
+        thread_lock: threading.Lock,
+        simvue_monitor_run: SimvueRun | None,
+        *,
+        throw_exceptions: bool = False,
+        retry_failed: bool = False,
+        upload_status: dict[str, int | float] | None = None,
+        run_filter: Callable[[str | None], bool] | None = None,
+    ) -> None:
+        """Upload all cached objects for the scheduled object types.
+
+        Parameters
+        ----------
+        id_mapping : MutableMapping[str, str]
+            the offline-online mapping to update after upload.
+        cache_directory : pathlib.Path
+            the local cache directory to read from.
+        thread_lock : threading.Lock
+            the thread lock used to ensure the upload status is
+            modified correctly.
+        simvue_monitor_run : SimvueRun | None
+            run to track uploading
+        throw_exceptions : bool, optional
+            whether to throw exceptions and terminate, default False.
+        retry_failed : bool, optional
+            whether to retry failed uploads, default False.
+        upload_status : dict[str, int | float] | None, optional
+            a mapping which will be updated with upload status, default None.
+        run_filter : Callable[[str | None], bool] | None, optional
+            if provided, only uploads belonging to runs for which this
+            returns True are scheduled, by default all uploads are scheduled.
+        """
+        _schedule = _UploadSchedule(
+            self._actions,
+            id_mapping=id_mapping,
+            cache_directory=cache_directory,
+            thread_lock=thread_lock,
+            simvue_monitor_run=simvue_monitor_run,
+            throw_exceptions=throw_exceptions,
+            retry_failed=retry_failed,
+            upload_status=upload_status,
+            run_filter=run_filter,
+        )
+        self._drain(_schedule)
+
+        if not _schedule.complete:
+            raise RuntimeError("Circular dependency between uploaded object types")
@@ -0,0 +1,195 @@
+"""Watch the local cache for objects written by offline runs.
+
+Used by the sender in follow mode to begin an upload as soon as new data is
+written. On Linux the cache is watched using inotify, otherwise, or if inotify
+is unavailable, the cache is polled at the upload interval.
+"""
+
+import abc
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import pathlib
+import select
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Event masks from <sys/inotify.h>
+IN_MODIFY: int = 0x00000002
+IN_ATTRIB: int = 0x00000004
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+IN_ISDIR: int = 0x40000000
+IN_WATCH_MASK: int = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+INOTIFY_EVENT: struct.Struct = struct.Struct("iIII")
+
+# Files written by the sender itself which must not trigger an upload
+IGNORED_SUFFIXES: tuple[str, ...] = (".offset", ".lock", ".db", ".db-wal", ".db-shm")
+IGNORED_DIRECTORIES: tuple[str, ...] = ("server_ids",)
+
+
+class CacheWatcher(abc.ABC):
+    """Notifies the sender of changes to the local cache."""
+
+    def __init__(self, cache_directory: pathlib.Path) -> None:
+        """Initialise a watcher for the given cache.
+
+        Parameters
+        ----------
+        cache_directory : pathlib.Path
+            the local cache directory to watch.
+        """
+        self._cache_directory: pathlib.Path = cache_directory
+
+    @abc.abstractmethod
+    def changed(self, timeout: float) -> bool:
+        """Wait for a change to the cache.
+
+        Parameters
+        ----------
+        timeout : float
+            maximum time in seconds to wait.
+
+        Returns
+        -------
+        bool
+            whether the cache may have changed.
+        """
+
+    def close(self) -> None:
+        """Stop watching the cache"""
+        pass
+
+
+class PollingCacheWatcher(CacheWatcher):
+    """Fallback watcher, the cache is assumed to change between each check."""
+
+    def changed(self, timeout: float) -> bool:
+        """The cache is always checked, the sender limiting the rate of uploads"""
+        _ = timeout
+        return True
+
+
+class InotifyCacheWatcher(CacheWatcher):
+    """Watches the cache and the object directories within it using inotify."""
+
+    def __init__(self, cache_directory: pathlib.Path) -> None:
+        """Initialise an inotify watcher for the given cache.
+
+        Parameters
+        ----------
+        cache_directory : pathlib.Path
+            the local cache directory to watch.
+
+        Raises
+        ------
+        OSError
+            if inotify is not available.
+        """
+        super().__init__(cache_directory)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd: int = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            _errno = ctypes.get_errno()
+            raise OSError(_errno, os.strerror(_errno))
+        self._watched: dict[int, pathlib.Path] = {}
+        self._watch(cache_directory)
+        for directory in cache_directory.iterdir():
+            if directory.is_dir() and directory.name not in IGNORED_DIRECTORIES:
+                self._watch(directory)
+
+    def _watch(self, directory: pathlib.Path) -> None:
+        """Add a watch to a directory"""
+        _wd: int = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), IN_WATCH_MASK
+        )
+        if _wd < 0:
+            _errno = ctypes.get_errno()
+            raise OSError(_errno, os.strerror(_errno), f"{directory}")
+        self._watched[_wd] = directory
+
+    def _read_events(self) -> bool:
+        """Read all pending events returning whether any are of interest"""
+        _changed: bool = False
+
+        while True:
+            try:
+                _buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return _changed
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+
+            _position: int = 0
+
+            while _position < len(_buffer):
+                _wd, _mask, _, _length = INOTIFY_EVENT.unpack_from(_buffer, _position)
+                _position += INOTIFY_EVENT.size
+                _name = os.fsdecode(
+                    _buffer[_position : _position + _length].rstrip(b"\0")
+                )
+                _position += _length
+
+                if _name.endswith(IGNORED_SUFFIXES) or _name in IGNORED_DIRECTORIES:
+                    continue
+
+                _changed = True
+
+                # Object directories are created when first written to
+                if (
+                    _mask & IN_ISDIR
+                    and _mask & IN_CREATE
+                    and self._watched.get(_wd) == self._cache_directory
+                ):
+                    self._watch(self._cache_directory.joinpath(_name))
+
+    def changed(self, timeout: float) -> bool:
+        """Wait for a change to the cache.
+
+        Parameters
+        ----------
+        timeout : float
+            maximum time in seconds to wait.
+
+        Returns
+        -------
+        bool
+            whether a file within the cache has been written.
+        """
+        _readable, _, _ = select.select([self._fd], [], [], timeout)
+        return bool(_readable) and self._read_events()
+
+    def close(self) -> None:
+        """Stop watching the cache"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_cache_watcher(cache_directory: pathlib.Path) -> CacheWatcher:
+    """Returns the watcher for the local cache supported on this platform.
+
+    Parameters
+    ----------
+    cache_directory : pathlib.Path
+        the local cache directory to watch.
+
+    Returns
+    -------
+    CacheWatcher
+        an inotify watcher on Linux, else a polling watcher
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyCacheWatcher(cache_directory)
+        except (OSError, AttributeError, TypeError) as e:
+            logger.warning("Unable to watch cache using inotify, polling: %s", e)
+    return PollingCacheWatcher(cache_directory)
@@ -7,14 +7,19 @@ import pydantic
 import importlib.util
 import functools
 import contextlib
+import collections
+import mmap
 import os
 import pathlib
 import typing
 import jwt
+from concurrent.futures import Future, ThreadPoolExecutor
 from deepmerge import Merger
 
 
-CHECKSUM_BLOCK_SIZE = 4096
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+CHECKSUM_MMAP_THRESHOLD: int = 64 * 1024 * 1024
+COPY_BUFFER_BLOCKS: int = 8
 EXTRAS: tuple[str, ...] = ("plot", "torch")
 
 logger = logging.getLogger(__name__)
@@ -358,20 +363,81 @@ def prepare_for_api(data_in, all=True):
     return data
 
 
+def calculate_file_sha256(
+    file_path: pathlib.Path, copy_to: pathlib.Path | None = None
+) -> str:
+    """Calculate the sha256 checksum of a file, optionally copying it.
+
+    The file is read only once, each block read being hashed and, if a copy
+    is requested, written to the copy by a separate thread which falls at
+    most a fixed number of blocks behind. Large files are memory mapped so
+    that blocks are hashed and written without being copied in memory.
+
+    Parameters
+    ----------
+    file_path : pathlib.Path
+        the file to calculate the checksum of.
+    copy_to : pathlib.Path | None, optional
+        if specified, the path to copy the file to.
+
+    Returns
+    -------
+    str
+        the sha256 checksum of the file.
+    """
+    sha256_hash = hashlib.sha256()
+
+    with contextlib.ExitStack() as stack:
+        _in_f = stack.enter_context(file_path.open("rb"))
+
+        if (_file_size := os.fstat(_in_f.fileno()).st_size) >= CHECKSUM_MMAP_THRESHOLD:
+            _mapped = stack.enter_context(
+                mmap.mmap(_in_f.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+            _view = stack.enter_context(memoryview(_mapped))
+            _blocks = (
+                _view[start : start + CHECKSUM_BLOCK_SIZE]
+                for start in range(0, _file_size, CHECKSUM_BLOCK_SIZE)
+            )
+        else:
+            _blocks = iter(lambda: _in_f.read(CHECKSUM_BLOCK_SIZE), b"")
+
+        # The writer is shut down, completing all writes, before the
+        # mapped file is released
+        if copy_to:
+            _out_f = stack.enter_context(copy_to.open("wb"))
+            _writer = stack.enter_context(ThreadPoolExecutor(max_workers=1))
+        _pending: collections.deque[Future] = collections.deque()
+
+        try:
+            for block in _blocks:
+                if copy_to:
+                    _pending.append(_writer.submit(_out_f.write, block))
+                sha256_hash.update(block)
+                if len(_pending) > COPY_BUFFER_BLOCKS:
+                    _pending.popleft().result()
+
+            while _pending:
+                _pending.popleft().result()
+        finally:
+            # Views of the mapped file must be released before it is closed
+            block = None
+
+    return sha256_hash.hexdigest()
+
+
 def calculate_sha256(filename: str | typing.Any, is_file: bool) -> str | None:
     """
     Calculate sha256 checksum of the specified file
     """
-    sha256_hash = hashlib.sha256()
     if is_file:
         try:
-            with open(filename, "rb") as fd:
-                for byte_block in iter(lambda: fd.read(CHECKSUM_BLOCK_SIZE), b""):
-                    sha256_hash.update(byte_block)
-                return sha256_hash.hexdigest()
+            return calculate_file_sha256(pathlib.Path(filename))
         except Exception:
             return None
 
+    sha256_hash = hashlib.sha256()
+
     if isinstance(filename, str):
         sha256_hash.update(bytes(filename, "utf-8"))
     else:
@@ -164,3 +164,61 @@ def test_config_setup(
 
         simvue.config.user.SimvueConfiguration.config_file.cache_clear()
 
+
+
+@pytest.mark.config
+def test_config_cache(monkeypatch: pytest.MonkeyPatch, mocker: pytest_mock.MockerFixture) -> None:
+    monkeypatch.setenv("SIMVUE_NO_SERVER_CHECK", "True")
+    monkeypatch.delenv("SIMVUE_TOKEN", False)
+    monkeypatch.delenv("SIMVUE_URL", False)
+    mocker.patch("simvue.config.parameters.get_expiry", lambda *_, **__: 1e10)
+
+    with tempfile.TemporaryDirectory() as temp_d:
+        _config_file = pathlib.Path(temp_d).joinpath("simvue.toml")
+
+        def _write_config(url: str) -> None:
+            _config_file.write_text(
+                f"""
+[server]
+url = "{url}"
+token = "{uuid.uuid4().hex}"
+
+[offline]
+cache = "{pathlib.Path(temp_d).joinpath('cache').as_posix()}"
+"""
+            )
+
+        _write_config("https://simvue.example.com/")
+
+        mocker.patch(
+            "simvue.config.user.sv_util.find_first_instance_of_file",
+            lambda file_names, *_, **__: None if "pyproject.toml" in file_names else _config_file
+        )
+        SimvueConfiguration.clear_cache()
+        _load = mocker.spy(SimvueConfiguration, "_load")
+
+        _config = SimvueConfiguration.fetch(mode="online")
+        _cached_config = SimvueConfiguration.fetch(mode="online")
+        assert _load.call_count == 1
+        assert _cached_config == _config
+
+        # Each call receives its own copy
+        _cached_config.run.folder = "/modified"
+        assert SimvueConfiguration.fetch(mode="online").run.folder == "/"
+
+        # Changed arguments are not served from the cache
+        assert SimvueConfiguration.fetch(mode="online", server_url="https://simvue.example.io/").server.url == "https://simvue.example.io/api"
+        assert _load.call_count == 2
+
+        # Modifying the configuration file invalidates the cache
+        _write_config("https://simvue-dev.example.com/")
+        os.utime(_config_file, ns=(0, os.stat(_config_file).st_mtime_ns + 1_000_000))
+        assert SimvueConfiguration.fetch(mode="online").server.url == "https://simvue-dev.example.com/api"
+        assert _load.call_count == 3
+
+        # As do changes to relevant environment variables
+        monkeypatch.setenv("SIMVUE_URL", "https://simvue.example.org/")
+        assert SimvueConfiguration.fetch(mode="online").server.url == "https://simvue.example.org/api"
+        assert _load.call_count == 4
+
+        SimvueConfiguration.clear_cache()
@@ -1,15 +1,22 @@
+import numpy
 import pytest
 import string
 import typing
 import time
+import threading
 from threading import Event, Thread
 from queue import Queue
 from concurrent.futures import ThreadPoolExecutor
 
 
+from simvue.dispatch.artifact import ArtifactQueue
 from simvue.dispatch.queued import QueuedDispatcher
 
 from simvue.dispatch.direct import DirectDispatcher
+from simvue.dispatch.columnar import ColumnarMetricQueue, MetricBatch
+from simvue.dispatch.rate import AdaptiveRateController
+from simvue.dispatch.scheduled import ScheduledDispatcher
+from simvue.dispatch.shared import SharedDispatchLoop, SharedHeartbeatLoop
 from simvue.exception import ObjectDispatchError
 
 # FIXME: Update the layout of these tests
@@ -306,3 +313,447 @@ def test_direct_dispatcher(scenario: typing.Literal["multiple", "single", "max_e
             f"Check of counter for dispatcher '{variable}' failed with count = {check_dict[variable]['counter']}"
         )
     assert time.time() - start_time < time_threshold
+
+
+@pytest.mark.dispatch
+def test_queued_dispatcher_latency_targets() -> None:
+    trigger = Event()
+    dispatch_times: dict[str, list[float]] = {"fast": [], "slow": []}
+
+    def callback(buffer: list[typing.Any], label: str) -> None:
+        dispatch_times[label].append(time.time())
+
+    dispatcher = QueuedDispatcher(
+        callback=callback,
+        object_types=["fast", "slow"],
+        termination_trigger=trigger,
+        max_read_rate=0.1,
+        latency_targets={"fast": 0.2},
+        name="test_queued_dispatcher_latency_targets"
+    )
+    dispatcher.start()
+
+    start_time = time.time()
+
+    for i in range(3):
+        dispatcher.add_item(i, object_type="fast", blocking=False)
+        dispatcher.add_item(i, object_type="slow", blocking=False)
+        time.sleep(0.5)
+
+    # The first item in each queue is sent after the linger time, thereafter
+    # the fast queue dispatches within its latency target while the slow
+    # queue must wait for the default interval of 1 / max_read_rate
+    assert len(dispatch_times["fast"]) == 3
+    assert len(dispatch_times["slow"]) == 1
+    assert dispatch_times["fast"][0] - start_time < 0.5
+
+    trigger.set()
+    dispatcher.join()
+
+    assert len(dispatch_times["slow"]) == 2
+    assert dispatcher.empty
+
+
+@pytest.mark.dispatch
+def test_queued_dispatcher_flushes_full_buffer() -> None:
+    trigger = Event()
+    buffers: list[list[typing.Any]] = []
+
+    dispatcher = QueuedDispatcher(
+        callback=lambda buffer, _: buffers.append(buffer),
+        object_types=["q"],
+        termination_trigger=trigger,
+        max_buffer_size=5,
+        max_read_rate=0.01,
+        name="test_queued_dispatcher_flushes_full_buffer"
+    )
+    dispatcher.start()
+
+    # Exhaust the initial dispatch so the next one is rate limited
+    dispatcher.add_item(-1, object_type="q", blocking=False)
+    time.sleep(0.5)
+    assert len(buffers) == 1
+
+    for i in range(10):
+        dispatcher.add_item(i, object_type="q", blocking=False)
+
+    time.sleep(0.5)
+
+    assert [len(buffer) for buffer in buffers[1:]] == [5, 5]
+
+    trigger.set()
+    dispatcher.join()
+
+
+def test_queued_dispatch_error_unknown_latency_target() -> None:
+    with pytest.raises(KeyError):
+        QueuedDispatcher(
+            callback=lambda *_: None,
+            object_types=["q"],
+            termination_trigger=Event(),
+            latency_targets={"z": 1},
+            name="test_queued_dispatch_error_unknown_latency_target"
+        )
+
+
+@pytest.mark.dispatch
+def test_columnar_metric_queue_wraparound() -> None:
+    metric_queue = ColumnarMetricQueue(capacity=8)
+    assert metric_queue.capacity == 8
+
+    for i in range(3):
+        metric_queue.append({"x": i, "y": 2 * i}, step=i, time=0.5 * i, timestamp=1.7e9 + i)
+
+    assert metric_queue.qsize() == 6
+    assert len(metric_queue.drain(4)) == 4
+
+    # The next entries wrap around the end of the preallocated arrays
+    for i in range(3, 6):
+        metric_queue.append({"x": i, "y": 2 * i}, step=i, time=0.5 * i, timestamp=1.7e9 + i)
+
+    with pytest.raises(ObjectDispatchError):
+        metric_queue.append({"x": 0, "y": 0}, step=6, time=3, timestamp=1.7e9, block=False)
+
+    _batch = metric_queue.drain()
+    assert metric_queue.empty()
+    assert _batch.step.tolist() == [2, 2, 3, 3, 4, 4, 5, 5]
+
+    _metric_sets = _batch.to_metric_sets()
+    assert len(_metric_sets) == 4
+    assert _metric_sets[0] == {
+        "values": {"x": 2.0, "y": 4.0},
+        "time": 1.0,
+        "timestamp": "2023-11-14T22:13:22.000000",
+        "step": 2,
+    }
+
+
+@pytest.mark.dispatch
+def test_queued_dispatcher_columnar_metrics() -> None:
+    trigger = Event()
+    buffers: list[MetricBatch] = []
+
+    dispatcher = QueuedDispatcher(
+        callback=lambda buffer, _: buffers.append(buffer),
+        object_types=["metrics"],
+        termination_trigger=trigger,
+        max_buffer_size=10,
+        max_read_rate=0.01,
+        columnar_types=["metrics"],
+        name="test_queued_dispatcher_columnar_metrics"
+    )
+    dispatcher.start()
+
+    with pytest.raises(TypeError):
+        dispatcher.add_item({"x": 1}, object_type="metrics")
+
+    for i in range(25):
+        dispatcher.add_metrics({"x": i, "y": -i}, object_type="metrics", step=i, time=i, timestamp=time.time())
+
+    trigger.set()
+    dispatcher.join()
+
+    assert all(isinstance(buffer, MetricBatch) for buffer in buffers)
+    assert all(len(buffer) <= 10 for buffer in buffers)
+    assert sum(len(buffer) for buffer in buffers) == 50
+    assert sum(len(buffer.to_metric_sets()) for buffer in buffers) == 25
+
+
+@pytest.mark.dispatch
+@pytest.mark.parametrize("columnar", (True, False), ids=("columnar", "queue"))
+def test_queued_dispatcher_metrics_batch(columnar: bool) -> None:
+    trigger = Event()
+    metric_sets: list[dict] = []
+
+    def callback(buffer: list[typing.Any] | MetricBatch, _: str) -> None:
+        metric_sets.extend(buffer.to_metric_sets() if isinstance(buffer, MetricBatch) else buffer)
+
+    dispatcher = QueuedDispatcher(
+        callback=callback,
+        object_types=["metrics"],
+        termination_trigger=trigger,
+        columnar_types=["metrics"] if columnar else None,
+        name="test_queued_dispatcher_metrics_batch"
+    )
+    dispatcher.start()
+
+    # Exceed the queue capacity to check values are written in chunks
+    n_steps: int = 50000
+    dispatcher.add_metrics_batch(
+        {"x": numpy.arange(n_steps), "y": -numpy.arange(n_steps)},
+        object_type="metrics",
+        step=numpy.arange(n_steps),
+        time=numpy.arange(n_steps, dtype=float),
+        timestamp=numpy.full(n_steps, time.time()),
+    )
+
+    trigger.set()
+    dispatcher.join()
+
+    assert len(metric_sets) == n_steps
+    assert [metric_set["step"] for metric_set in metric_sets] == list(range(n_steps))
+    assert all(metric_set["values"] == {"x": i, "y": -i} for i, metric_set in enumerate(metric_sets))
+
+
+@pytest.mark.dispatch
+def test_adaptive_rate_controller() -> None:
+    controller = AdaptiveRateController(
+        initial_interval=1.0,
+        initial_batch_size=1000,
+        target_latency=0.5,
+        rate_increment=1.0,
+        batch_increment=100,
+    )
+
+    # Fast dispatch leaving items queued, increase rate and batch size
+    controller.record("metrics", latency=0.1, queue_depth=10)
+    assert controller.interval("metrics") == pytest.approx(0.5)
+    assert controller.batch_size("metrics") == 1100
+
+    # Fast dispatch emptying the queue, only increase rate
+    controller.record("metrics", latency=0.1, queue_depth=0)
+    assert controller.interval("metrics") == pytest.approx(1 / 3)
+    assert controller.batch_size("metrics") == 1100
+
+    # Slow dispatch, halve rate and batch size
+    controller.record("metrics", latency=1.0, queue_depth=0)
+    assert controller.interval("metrics") == pytest.approx(2 / 3)
+    assert controller.batch_size("metrics") == 550
+
+    # Throttled, halve rate but send larger batches
+    controller.record("metrics", latency=0.1, queue_depth=0, throttled=2)
+    assert controller.interval("metrics") == pytest.approx(4 / 3)
+    assert controller.batch_size("metrics") == 650
+
+    # Other queues are unaffected
+    assert controller.interval("events") == 1.0
+    assert controller.batch_size("events") == 1000
+
+    _metrics = controller.metrics()
+    assert _metrics["dispatch/metrics.batch_size"] == 650
+    assert _metrics["dispatch/metrics.throttled"] == 2
+    assert _metrics["dispatch/metrics.increases"] == 2
+    assert _metrics["dispatch/metrics.decreases"] == 2
+    assert not any("events" in key for key in _metrics)
+
+
+@pytest.mark.dispatch
+def test_adaptive_rate_controller_limits() -> None:
+    controller = AdaptiveRateController(
+        initial_interval=1.0,
+        initial_batch_size=200,
+        min_interval=0.5,
+        max_interval=2.0,
+        min_batch_size=100,
+        max_batch_size=300,
+        target_latency=0.5,
+    )
+
+    for _ in range(10):
+        controller.record("metrics", latency=1.0, queue_depth=0)
+    assert controller.interval("metrics") == 2.0
+    assert controller.batch_size("metrics") == 100
+
+    for _ in range(100):
+        controller.record("metrics", latency=0.1, queue_depth=1)
+    assert controller.interval("metrics") == 0.5
+    assert controller.batch_size("metrics") == 300
+
+    with pytest.raises(ValueError):
+        AdaptiveRateController(decrease_factor=1.5)
+
+
+@pytest.mark.dispatch
+def test_queued_dispatcher_rate_controller() -> None:
+    trigger = Event()
+    buffers: list[list[typing.Any]] = []
+    throttled: list[int] = [0]
+
+    def callback(buffer: list[typing.Any], _: str) -> None:
+        # Every request is throttled by the server
+        throttled[0] += 1
+        buffers.append(buffer)
+
+    controller = AdaptiveRateController(
+        initial_interval=0.1,
+        initial_batch_size=100,
+        min_interval=0.1,
+        min_batch_size=10,
+        batch_increment=10,
+        throttle_counter=lambda: throttled[0],
+    )
+
+    dispatcher = QueuedDispatcher(
+        callback=callback,
+        object_types=["events"],
+        termination_trigger=trigger,
+        latency_targets=None,
+        rate_controller=controller,
+        name="test_queued_dispatcher_rate_controller"
+    )
+    dispatcher.start()
+
+    for i in range(1000):
+        dispatcher.add_item(i, object_type="events")
+
+    trigger.set()
+    dispatcher.join()
+
+    assert sum(len(buffer) for buffer in buffers) == 1000
+    assert len(buffers[-1]) <= controller.batch_size("events")
+    assert controller.batch_size("events") > 100
+    assert controller.interval("events") > 0.1
+    assert dispatcher.latency_target("events") == controller.interval("events")
+    assert dispatcher.buffer_size("events") == controller.batch_size("events")
+
+    dispatcher.rate_controller = None
+    assert dispatcher.buffer_size("events") == dispatcher._max_buffer_size
+
+
+@pytest.mark.dispatch
+def test_scheduled_dispatcher() -> None:
+    trigger = Event()
+    buffers: list[list[typing.Any]] = []
+    wakes: list[float] = []
+
+    dispatcher = ScheduledDispatcher(
+        wake=lambda: wakes.append(time.time()),
+        callback=lambda buffer, _: buffers.append(buffer),
+        object_types=["events"],
+        termination_trigger=trigger,
+        max_buffer_size=10,
+        linger=0,
+    )
+    dispatcher.start()
+    assert dispatcher.is_alive()
+
+    dispatcher.add_item(0, object_type="events")
+    assert len(wakes) == 1
+
+    dispatcher.dispatch_ready()
+    assert buffers == [[0]]
+
+    # Within the latency target of the previous dispatch, only a full
+    # buffer wakes the scheduler and is dispatched
+    for i in range(1, 26):
+        dispatcher.add_item(i, object_type="events")
+    assert len(wakes) >= 2
+    assert dispatcher.wait_timeout() == 0
+
+    dispatcher.dispatch_ready()
+    assert [len(buffer) for buffer in buffers] == [1, 10, 10]
+
+    trigger.set()
+    dispatcher.join()
+    assert not dispatcher.is_alive()
+    assert sum(buffers, []) == list(range(26))
+
+
+@pytest.mark.dispatch
+def test_shared_dispatch_loop() -> None:
+    loop = SharedDispatchLoop()
+    triggers: list[Event] = [Event() for _ in range(20)]
+    buffers: dict[int, list[typing.Any]] = {i: [] for i in range(len(triggers))}
+
+    def _callback(index: int) -> typing.Callable[[list[typing.Any], str], None]:
+        return lambda buffer, _: buffers[index].extend(buffer)
+
+    dispatchers = [
+        loop.register(
+            ScheduledDispatcher(
+                wake=loop.wake,
+                callback=_callback(i),
+                object_types=["events"],
+                termination_trigger=trigger,
+                latency_targets={"events": 0.1},
+                linger=0,
+            )
+        )
+        for i, trigger in enumerate(triggers)
+    ]
+
+    for i in range(10):
+        for dispatcher in dispatchers:
+            dispatcher.add_item(i, object_type="events")
+
+    # All dispatchers are served without being joined
+    time.sleep(0.5)
+    assert all(buffer == list(range(10)) for buffer in buffers.values())
+    assert len(loop.dispatchers) == len(dispatchers)
+
+    for trigger, dispatcher in zip(triggers, dispatchers):
+        trigger.set()
+        dispatcher.join()
+
+    time.sleep(0.1)
+    assert not loop.dispatchers
+    assert not any(thread.name == "simvue_shared_dispatch" and thread.is_alive() for thread in threading.enumerate())
+
+
+@pytest.mark.dispatch
+def test_shared_heartbeat_loop() -> None:
+    loop = SharedHeartbeatLoop(poll_interval=0.05, max_workers=2)
+    triggers: list[Event] = [Event() for _ in range(5)]
+    calls: list[int] = [0] * len(triggers)
+
+    def _heartbeat(index: int) -> typing.Callable[[], None]:
+        def _beat() -> None:
+            calls[index] += 1
+            # A slow heartbeat must not be called again until it completes
+            time.sleep(0.2 if index == 0 else 0)
+        return _beat
+
+    for i, trigger in enumerate(triggers):
+        loop.register(_heartbeat(i), trigger)
+
+    time.sleep(0.5)
+    assert loop.size == len(triggers)
+    assert all(count > 1 for count in calls)
+    assert calls[0] <= 3
+
+    for trigger in triggers:
+        trigger.set()
+    time.sleep(0.2)
+    assert loop.size == 0
+
+
+@pytest.mark.dispatch
+def test_artifact_queue() -> None:
+    queue = ArtifactQueue(max_bytes=100, max_workers=2)
+    release = Event()
+    uploaded: list[str] = []
+
+    def _upload(label: str, fail: bool = False) -> typing.Callable[[], None]:
+        def _run() -> None:
+            release.wait()
+            if fail:
+                raise RuntimeError("connection reset")
+            uploaded.append(label)
+        return _run
+
+    queue.put(_upload("a"), label="a", size=60)
+    queue.put(_upload("b", fail=True), label="b", size=40)
+
+    # Adding another artifact blocks until bytes in flight are released
+    _adding = Thread(target=queue.put, args=(_upload("c"),), kwargs={"label": "c", "size": 30})
+    _adding.start()
+    _adding.join(timeout=0.2)
+    assert _adding.is_alive()
+    assert queue.in_flight_bytes == 100
+
+    release.set()
+    _adding.join(timeout=1)
+    assert not _adding.is_alive()
+    assert queue.wait(timeout=1)
+    assert queue.pending == 0 and queue.in_flight_bytes == 0
+    assert sorted(uploaded) == ["a", "c"]
+    assert queue.pop_errors() == ["'b': connection reset"]
+    assert not queue.pop_errors()
+
+    # An artifact larger than the limit is accepted when the queue is empty
+    queue.put(_upload("d"), label="d", size=1000)
+    queue.close()
+    assert uploaded[-1] == "d"
+
+    with pytest.raises(RuntimeError, match="closed"):
+        queue.put(_upload("e"), label="e", size=1)
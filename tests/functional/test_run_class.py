@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import platform
@@ -17,11 +18,14 @@ import psutil
 import pathlib
 import concurrent.futures
 import random
+import tarfile
 import datetime
 import simvue
-from simvue.api.objects import Alert, EventsAlert, Metrics, MetricsRangeAlert, MetricsThresholdAlert, UserAlert
+from simvue.api.objects import Alert, Artifact, EventsAlert, Metrics, MetricsRangeAlert, MetricsThresholdAlert, UserAlert
 from simvue.api.objects.grids import GridMetrics
+from simvue.cache import SegmentReader, segment_files
 from simvue.exception import ObjectNotFoundError, SimvueRunError
+from simvue.dispatch.shared import shared_heartbeat_loop
 from simvue.sender import Sender
 import simvue.run as sv_run
 import simvue.client as sv_cl
@@ -33,6 +37,14 @@ if typing.TYPE_CHECKING:
     from .conftest import CountingLogHandler
 
 
+def _segment_records(cache_directory: pathlib.Path, object_type: str, run_id: str) -> list[dict]:
+    return [
+        record
+        for segment in segment_files(cache_directory, object_type).get(run_id, [])
+        for record, _ in SegmentReader(segment).records()
+    ]
+
+
 @pytest.mark.run
 @pytest.mark.online
 def test_created_run(request) -> None:
@@ -366,6 +378,191 @@ def test_log_metrics_offline(
         _steps = set(_steps)
         assert len(_steps) == 1
 
+@pytest.mark.run
+@pytest.mark.offline
+def test_log_metrics_batch_offline(
+    create_plain_run_offline: tuple[sv_run.Run, dict],
+) -> None:
+    run, _ = create_plain_run_offline
+    _n_steps: int = 1000
+    _start_step: int = run._step
+
+    assert run.log_metrics_batch(
+        {"a": numpy.arange(_n_steps), "b": numpy.linspace(0, 1, _n_steps)},
+        times=numpy.arange(_n_steps, dtype=float),
+    )
+    assert run._step == _start_step + _n_steps
+
+    run._shutdown_event.set()
+    run._dispatcher.join()
+
+    _metric_sets = [
+        metric_set
+        for record in _segment_records(pathlib.Path(os.environ["SIMVUE_OFFLINE_DIRECTORY"]), "metrics", run.id)
+        for metric_set in record["metrics"]
+        if "a" in metric_set["values"]
+    ]
+    assert len(_metric_sets) == _n_steps
+    assert sorted(metric_set["step"] for metric_set in _metric_sets) == list(range(_start_step, _start_step + _n_steps))
+    assert all(metric_set["values"]["a"] == metric_set["time"] for metric_set in _metric_sets)
+
+
+@pytest.mark.run
+@pytest.mark.offline
+@pytest.mark.parametrize(
+    "arguments,message",
+    (
+        ({"metrics": {"a": numpy.array(1.0)}}, "one dimensional"),
+        ({"metrics": {"a": numpy.arange(3), "b": numpy.arange(4)}}, "equal length"),
+        ({"metrics": {"a": numpy.arange(3)}, "steps": numpy.array(1)}, "match length"),
+        ({"metrics": {"a": numpy.arange(3)}, "steps": [0, -1, 2]}, "non-negative"),
+    ),
+    ids=("zero_dimensional", "unequal_lengths", "scalar_steps", "negative_steps"),
+)
+def test_log_metrics_batch_invalid_offline(
+    create_plain_run_offline: tuple[sv_run.Run, dict],
+    arguments: dict[str, typing.Any],
+    message: str,
+) -> None:
+    run, _ = create_plain_run_offline
+    with pytest.raises(SimvueRunError, match=message):
+        run.log_metrics_batch(**arguments)
+
+
+@pytest.mark.run
+@pytest.mark.offline
+@pytest.mark.parametrize("queue_blocking", (True, False), ids=("blocking", "non_blocking"))
+def test_async_runs_offline(monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest, queue_blocking: bool) -> None:
+    _n_runs: int = 20
+    _n_steps: int = 100
+    _uuid: str = f"{uuid.uuid4()}".split("-")[0]
+
+    async def _log_run(index: int) -> str:
+        async with simvue.AsyncRun(mode="offline") as run:
+            run.config(disable_resources_metrics=True, queue_blocking=queue_blocking)
+            await run.init(
+                name=f"test_async_runs_offline_{index}",
+                folder=f"/simvue_unit_testing/{_uuid}",
+                tags=["simvue_client_unit_tests", request.node.name],
+                retention_period=os.environ.get("SIMVUE_TESTING_RETENTION_PERIOD", "2 mins"),
+            )
+            assert not run.run._heartbeat_thread
+            for step in range(_n_steps):
+                await run.log_metrics({"x": step})
+            await run.log_event(f"run {index}")
+            return run.id
+
+    async def _log_runs() -> tuple[list[str], int]:
+        _threads: int = threading.active_count()
+        _ids = await asyncio.gather(*(_log_run(i) for i in range(_n_runs)))
+        return _ids, threading.active_count() - _threads
+
+    with tempfile.TemporaryDirectory() as temp_d:
+        monkeypatch.setenv("SIMVUE_OFFLINE_DIRECTORY", temp_d)
+        _ids, _new_threads = asyncio.run(_log_runs())
+
+        # Runs share a thread pool rather than each creating threads
+        assert _new_threads < _n_runs
+        assert len(set(_ids)) == _n_runs
+
+        _metric_sets = [
+            metric_set
+            for run_id in _ids
+            for record in _segment_records(pathlib.Path(temp_d), "metrics", run_id)
+            for metric_set in record["metrics"]
+        ]
+        assert len(_metric_sets) == _n_runs * _n_steps
+        assert all(len(_segment_records(pathlib.Path(temp_d), "events", run_id)) == 1 for run_id in _ids)
+        assert len(list(pathlib.Path(temp_d).joinpath("runs").glob("*.closed"))) == _n_runs
+
+
+@pytest.mark.run
+@pytest.mark.offline
+def test_async_metric_units_offline(monkeypatch: pytest.MonkeyPatch) -> None:
+    _metadata_threads: list[threading.Thread] = []
+
+    async def _log_run() -> threading.Thread:
+        async with simvue.AsyncRun(mode="offline") as run:
+            run.config(disable_resources_metrics=True)
+            await run.init(
+                name="test_async_metric_units_offline",
+                folder="/simvue_unit_testing",
+                retention_period=os.environ.get("SIMVUE_TESTING_RETENTION_PERIOD", "2 mins"),
+            )
+            _update_metadata = run.run.update_metadata
+
+            def _record_thread(*args, **kwargs) -> bool:
+                _metadata_threads.append(threading.current_thread())
+                return _update_metadata(*args, **kwargs)
+
+            monkeypatch.setattr(run.run, "update_metadata", _record_thread)
+            run.run.set_metric_units("x", units="m")
+            await run.log_metrics({"x": 1})
+            await run.log_metrics({"x": 2})
+            return threading.current_thread()
+
+    with tempfile.TemporaryDirectory() as temp_d:
+        monkeypatch.setenv("SIMVUE_OFFLINE_DIRECTORY", temp_d)
+        _loop_thread = asyncio.run(_log_run())
+
+    # Units are sent once, from the thread pool rather than the event loop
+    assert len(_metadata_threads) == 1
+    assert _metadata_threads[0] is not _loop_thread
+
+
+@pytest.mark.run
+@pytest.mark.offline
+def test_shared_dispatch_offline(monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest) -> None:
+    _n_runs: int = 10
+    _n_steps: int = 100
+    _uuid: str = f"{uuid.uuid4()}".split("-")[0]
+
+    with tempfile.TemporaryDirectory() as temp_d:
+        monkeypatch.setenv("SIMVUE_OFFLINE_DIRECTORY", temp_d)
+        _threads: int = threading.active_count()
+        _runs: list[sv_run.Run] = []
+
+        for i in range(_n_runs):
+            run = sv_run.Run(mode="offline")
+            run.config(shared_dispatch=True, suppress_errors=False)
+            run.init(
+                name=f"test_shared_dispatch_offline_{i}",
+                folder=f"/simvue_unit_testing/{_uuid}",
+                tags=["simvue_client_unit_tests", request.node.name],
+                retention_period=os.environ.get("SIMVUE_TESTING_RETENTION_PERIOD", "2 mins"),
+            )
+            assert not run._heartbeat_thread
+            _runs.append(run)
+
+        for step in range(_n_steps):
+            for run in _runs:
+                run.log_metrics({"x": step})
+
+        assert threading.active_count() - _threads < _n_runs
+
+        with pytest.raises(SimvueRunError):
+            _runs[0].config(shared_dispatch=False)
+
+        for run in _runs[1:]:
+            run.close()
+
+        for run in _runs[1:]:
+            _steps = [
+                metric_set["step"]
+                for record in _segment_records(pathlib.Path(temp_d), "metrics", run.id)
+                for metric_set in record["metrics"]
+                if "x" in metric_set["values"]
+            ]
+            assert sorted(_steps) == list(range(_n_steps))
+
+        # Heartbeats of closed or failed runs are removed from the shared loop
+        assert all(run._heartbeat_termination_trigger.is_set() for run in _runs)
+        _timeout: float = time.time() + 5
+        while shared_heartbeat_loop().size and time.time() < _timeout:
+            time.sleep(0.1)
+        assert not shared_heartbeat_loop().size
+
+
 @pytest.mark.run
 @pytest.mark.online
 @pytest.mark.parametrize(
@@ -925,6 +1122,160 @@ def test_save_file_online(
         assert out_loc.joinpath(name or out_name.name).exists()
 
 
+@pytest.mark.run
+@pytest.mark.online
+def test_save_file_deduplicated_online(request) -> None:
+    _uuid = f"{uuid.uuid4()}".split("-")[0]
+    _run_ids: list[str] = []
+    with tempfile.TemporaryDirectory() as tempd:
+        _file = pathlib.Path(tempd).joinpath(f"mesh_{_uuid}.txt")
+        _file.write_text(f"mesh data {_uuid}")
+        for i in range(2):
+            with sv_run.Run() as simvue_run:
+                simvue_run.init(
+                    f"{request.node.name}_{i}",
+                    folder=f"/simvue_unit_testing/{_uuid}",
+                    tags=["simvue_client_unit_tests", "test_save_file_deduplicated"],
+                    visibility="tenant" if os.environ.get("CI") else None,
+                    retention_period=os.environ.get("SIMVUE_TESTING_RETENTION_PERIOD", "2 mins"),
+                )
+                assert simvue_run.save_file(_file, category="input")
+                _run_ids.append(simvue_run.id)
+
+    # The second run is attached to the artifact uploaded by the first
+    _artifacts = [
+        Artifact.from_name(run_id=run_id, name=f"mesh_{_uuid}.txt")
+        for run_id in _run_ids
+    ]
+    assert _artifacts[0].id == _artifacts[1].id
+
+
+@pytest.mark.run
+@pytest.mark.online
+def test_save_background_online(request) -> None:
+    _uuid = f"{uuid.uuid4()}".split("-")[0]
+    with tempfile.TemporaryDirectory() as tempd:
+        _file = pathlib.Path(tempd).joinpath("state.txt")
+        _file.write_text("step 1")
+        _array = numpy.arange(10)
+        with sv_run.Run() as simvue_run:
+            simvue_run.init(
+                request.node.name,
+                folder=f"/simvue_unit_testing/{_uuid}",
+                tags=["simvue_client_unit_tests", "test_save_background"],
+                visibility="tenant" if os.environ.get("CI") else None,
+                retention_period=os.environ.get("SIMVUE_TESTING_RETENTION_PERIOD", "2 mins"),
+            )
+            simvue_run.config(background_artifacts=True)
+            assert simvue_run.save_file(_file, category="input")
+            assert simvue_run.save_object(_array, category="input", name="state_array")
+            # Changes after saving are not uploaded
+            _file.write_text("step 2")
+            _array[:] = 0
+            assert simvue_run.wait_for_artifacts(timeout=30)
+
+        os.remove(_file)
+        client = sv_cl.Client()
+        client.get_artifact_as_file(run_id=simvue_run.id, name="state.txt", output_dir=tempd)
+        assert _file.read_text() == "step 1"
+        assert (client.get_artifact(simvue_run.id, name="state_array") == numpy.arange(10)).all()
+
+
+@pytest.mark.run
+@pytest.mark.offline
+def test_queue_file_closed_offline(
+    create_plain_run_offline: tuple[sv_run.Run, dict],
+) -> None:
+    simvue_run, _ = create_plain_run_offline
+    simvue_run.config(background_artifacts=True)
+    simvue_run._artifact_queue.close()
+    with tempfile.TemporaryDirectory() as tempd:
+        _file = pathlib.Path(tempd).joinpath("state.txt")
+        _file.write_text("step 1")
+        with pytest.raises(RuntimeError, match="closed"):
+            simvue_run._queue_file(_file, category="input", file_type=None, preserve_path=False)
+
+    # The snapshot is removed if the file could not be queued
+    _staging = pathlib.Path(os.environ["SIMVUE_OFFLINE_DIRECTORY"]).joinpath("artifacts")
+    assert not list(_staging.glob("*.file"))
+
+
+@pytest.mark.run
+@pytest.mark.offline
+def test_queue_file_deduplicated_offline(
+    create_plain_run_offline: tuple[sv_run.Run, dict],
+    mocker: pytest_mock.MockerFixture,
+) -> None:
+    simvue_run, _ = create_plain_run_offline
+    simvue_run.config(background_artifacts=True)
+
+    # Respond as a server on which the file content has already been uploaded
+    mocker.patch.object(simvue_run._user_config.run, "mode", "online")
+    _existing = mocker.MagicMock(id="existing_artifact")
+    _from_checksum = mocker.patch(
+        "simvue.run.Artifact.from_checksum", return_value=_existing
+    )
+    _attach = mocker.patch("simvue.run.FileArtifact.attach_to_run")
+    _new = mocker.patch("simvue.run.FileArtifact.new")
+
+    with tempfile.TemporaryDirectory() as tempd:
+        _file = pathlib.Path(tempd).joinpath("state.txt")
+        _file.write_text("step 1")
+        for _ in range(2):
+            simvue_run._queue_file(
+                _file, category="input", file_type=None, preserve_path=False
+            )
+            assert simvue_run.wait_for_artifacts()
+
+    _new.assert_not_called()
+    # The server is only searched once, the second upload using the local index
+    _from_checksum.assert_called_once()
+    _existing.attach_to_run.assert_called_once_with(simvue_run.id, "input")
+    _attach.assert_called_once_with(simvue_run.id, "input")
+
+
+@pytest.mark.run
+@pytest.mark.offline
+def test_save_directory_offline(
+    create_plain_run_offline: tuple[sv_run.Run, dict],
+) -> None:
+    simvue_run, _ = create_plain_run_offline
+    _progress: list[tuple[pathlib.Path, int, int]] = []
+    with tempfile.TemporaryDirectory() as tempd:
+        _directory = pathlib.Path(tempd).joinpath("results")
+        for i in range(12):
+            _directory.joinpath(f"case_{i % 3}").mkdir(parents=True, exist_ok=True)
+            _directory.joinpath(f"case_{i % 3}", f"out_{i}.txt").write_text(
+                "x" * (10 if i % 2 else 1000)
+            )
+        _directory.joinpath("run.log").write_text("log")
+
+        assert simvue_run.save_directory(
+            _directory,
+            category="input",
+            include=["*.txt"],
+            exclude=["case_2/*"],
+            max_workers=3,
+            pack_below=100,
+            progress_callback=lambda *args: _progress.append(args),
+        )
+
+    _artifacts = [
+        json.loads(path.read_text())
+        for path in pathlib.Path(os.environ["SIMVUE_OFFLINE_DIRECTORY"]).rglob("artifacts/*.json")
+    ]
+    _names = sorted(artifact["name"] for artifact in _artifacts)
+    # Small files are packed into a single archive, the others saved individually
+    assert _names == ["out_0.txt", "out_10.txt", "out_4.txt", "out_6.txt", "results.tar.gz"]
+    _archive = next(a for a in _artifacts if a["name"] == "results.tar.gz")
+    assert _archive["metadata"] == {"packed_files": 4}
+    assert sorted(tarfile.open(_archive["file_path"]).getnames()) == [
+        "case_0/out_3.txt", "case_0/out_9.txt", "case_1/out_1.txt", "case_1/out_7.txt"
+    ]
+    assert len(_progress) == 5
+    assert _progress[-1][1:] == (8, 8)
+
+
 @pytest.mark.run
 @pytest.mark.offline
 @pytest.mark.parametrize(
@@ -1,5 +1,6 @@
 import pytest
 import tempfile
+import os
 import os.path
 import pathlib
 import stat
@@ -24,6 +25,26 @@ def test_calculate_hash(is_file: bool, hash: str) -> None:
     else:
         assert sv_util.calculate_sha256(filename="temp.txt", is_file=is_file) == hash
 
+@pytest.mark.utilities
+@pytest.mark.parametrize(
+    "memory_mapped", (True, False), ids=("memory_mapped", "read")
+)
+def test_calculate_file_hash_with_copy(memory_mapped: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    if memory_mapped:
+        monkeypatch.setattr(sv_util, "CHECKSUM_MMAP_THRESHOLD", 1)
+    monkeypatch.setattr(sv_util, "CHECKSUM_BLOCK_SIZE", 1024)
+    with tempfile.TemporaryDirectory() as tempd:
+        _file = pathlib.Path(tempd).joinpath("temp.bin")
+        _file.write_bytes(os.urandom(100 * 1024 + 1))
+        _copy = pathlib.Path(tempd).joinpath("copy.bin")
+        assert sv_util.calculate_file_sha256(_file, copy_to=_copy) == sv_util.calculate_sha256(_file.read_bytes(), is_file=False)
+        assert _copy.read_bytes() == _file.read_bytes()
+
+        _file.write_bytes(b"")
+        assert sv_util.calculate_file_sha256(_file, copy_to=_copy) == sv_util.calculate_sha256(b"", is_file=False)
+        assert not _copy.read_bytes()
+
+
 @pytest.mark.config
 @pytest.mark.parametrize(
     "user_area", (True, False),
@@ -0,0 +1,152 @@
+import hashlib
+import http.server
+import pathlib
+import re
+import threading
+import urllib.parse
+
+import pytest
+
+from simvue.api.objects.artifact.multipart import MultipartUpload
+
+PART_SIZE: int = 64 * 1024
+
+
+class S3StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Minimal S3 compatible multipart upload endpoint"""
+
+    protocol_version = "HTTP/1.1"
+    parts: dict[str, dict[int, bytes]] = {}
+    objects: dict[str, bytes] = {}
+    fail_parts: set[int] = set()
+    part_requests: int = 0
+
+    def _respond(self, status: int, body: bytes = b"", etag: str | None = None) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", f"{len(body)}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self) -> None:
+        _url = urllib.parse.urlsplit(self.path)
+        _query = urllib.parse.parse_qs(_url.query)
+        _part = int(_query["partNumber"][0])
+        _data = self.rfile.read(int(self.headers["Content-Length"]))
+        S3StandInHandler.part_requests += 1
+        if _part in self.fail_parts:
+            self.fail_parts.discard(_part)
+            self._respond(400, b"<Error><Code>BadDigest</Code></Error>")
+            return
+        self.parts.setdefault(_query["uploadId"][0], {})[_part] = _data
+        self._respond(200, etag=f'"{hashlib.md5(_data).hexdigest()}"')
+
+    def do_POST(self) -> None:
+        _url = urllib.parse.urlsplit(self.path)
+        _upload_id = urllib.parse.parse_qs(_url.query)["uploadId"][0]
+        _body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        _parts = self.parts[_upload_id]
+        _data = b""
+        for part, etag in re.findall(
+            r"<PartNumber>(\d+)</PartNumber><ETag>([^<]+)</ETag>", _body
+        ):
+            if etag != f'"{hashlib.md5(_parts[int(part)]).hexdigest()}"':
+                self._respond(200, b"<Error><Code>InvalidPart</Code></Error>")
+                return
+            _data += _parts[int(part)]
+        self.objects[_url.path] = _data
+        self._respond(200, b"<CompleteMultipartUploadResult/>")
+
+    def log_message(self, *_, **__) -> None:
+        pass
+
+
+@pytest.fixture
+def s3_stand_in() -> str:
+    S3StandInHandler.parts = {}
+    S3StandInHandler.objects = {}
+    S3StandInHandler.fail_parts = set()
+    S3StandInHandler.part_requests = 0
+    _server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), S3StandInHandler)
+    _thread = threading.Thread(target=_server.serve_forever, daemon=True)
+    _thread.start()
+    yield f"http://127.0.0.1:{_server.server_port}"
+    _server.shutdown()
+    _server.server_close()
+
+
+def _presigned_urls(server: str, upload_id: str, n_parts: int) -> dict:
+    _url = f"{server}/bucket/artifact"
+    return {
+        "upload_id": upload_id,
+        "part_urls": [
+            f"{_url}?partNumber={part}&uploadId={upload_id}"
+            for part in range(1, n_parts + 1)
+        ],
+        "complete_url": f"{_url}?uploadId={upload_id}",
+    }
+
+
+@pytest.fixture
+def large_file(tmp_path: pathlib.Path) -> pathlib.Path:
+    _path = tmp_path.joinpath("checkpoint.bin")
+    _path.write_bytes(bytes(range(256)) * (10 * PART_SIZE // 256) + b"remainder")
+    return _path
+
+
+@pytest.mark.local
+def test_multipart_upload(s3_stand_in: str, large_file: pathlib.Path, tmp_path: pathlib.Path) -> None:
+    _journal = tmp_path.joinpath("uploads", "checkpoint.journal")
+    _upload = MultipartUpload(large_file, journal_path=_journal, part_size=PART_SIZE)
+    assert _upload.n_parts == 11
+
+    assert not _upload.upload(lambda _: None)
+    assert _upload.upload(
+        lambda upload_id: _presigned_urls(s3_stand_in, "upload_1", _upload.n_parts)
+    )
+    assert S3StandInHandler.objects["/bucket/artifact"] == large_file.read_bytes()
+    assert S3StandInHandler.part_requests == 11
+    assert not _journal.exists()
+
+
+@pytest.mark.local
+def test_multipart_upload_resume(s3_stand_in: str, large_file: pathlib.Path, tmp_path: pathlib.Path) -> None:
+    _journal = tmp_path.joinpath("uploads", "checkpoint.journal")
+    S3StandInHandler.fail_parts = {3}
+    _upload = MultipartUpload(large_file, journal_path=_journal, part_size=PART_SIZE, max_workers=2)
+
+    with pytest.raises(RuntimeError, match="part 3"):
+        _upload.upload(lambda _: _presigned_urls(s3_stand_in, "upload_1", 11))
+
+    # Only the parts which were not uploaded are sent on resuming
+    _resumed = MultipartUpload(large_file, journal_path=_journal, part_size=PART_SIZE)
+    assert _resumed.upload_id == "upload_1"
+    assert 3 not in _resumed.completed_parts
+    _n_completed = len(_resumed.completed_parts)
+    _requests = S3StandInHandler.part_requests
+
+    assert _resumed.upload(
+        lambda upload_id: _presigned_urls(s3_stand_in, upload_id, 11)
+    )
+    assert S3StandInHandler.part_requests - _requests == 11 - _n_completed
+    assert S3StandInHandler.objects["/bucket/artifact"] == large_file.read_bytes()
+    assert not _journal.exists()
+
+
+@pytest.mark.local
+def test_multipart_upload_expired(s3_stand_in: str, large_file: pathlib.Path, tmp_path: pathlib.Path) -> None:
+    _journal = tmp_path.joinpath("uploads", "checkpoint.journal")
+    S3StandInHandler.fail_parts = {11}
+    _upload = MultipartUpload(large_file, journal_path=_journal, part_size=PART_SIZE, max_workers=1)
+
+    with pytest.raises(RuntimeError):
+        _upload.upload(lambda _: _presigned_urls(s3_stand_in, "upload_1", 11))
+
+    # If the previous upload is no longer known all parts are uploaded again
+    _resumed = MultipartUpload(large_file, journal_path=_journal, part_size=PART_SIZE)
+    assert len(_resumed.completed_parts) == 10
+    _requests = S3StandInHandler.part_requests
+    assert _resumed.upload(lambda _: _presigned_urls(s3_stand_in, "upload_2", 11))
+    assert S3StandInHandler.part_requests - _requests == 11
+    assert S3StandInHandler.objects["/bucket/artifact"] == large_file.read_bytes()
@@ -0,0 +1,204 @@
+import pathlib
+import time
+import types
+import pytest
+
+from simvue.cache import ArtifactIndex, CacheManifest, IdMapping, SegmentWriter, manifest
+
+
+@pytest.mark.local
+def test_manifest_entries(tmp_path: pathlib.Path) -> None:
+    _manifest = CacheManifest.open(tmp_path)
+    assert CacheManifest.open(tmp_path) is _manifest
+
+    for i in range(3):
+        _manifest.add("metrics", f"offline_{i}", run="offline_run")
+    _manifest.add("metrics", "offline_0", run="offline_run")
+    _manifest.add("heartbeat", "offline_run", run="offline_run", kind="heartbeat")
+
+    assert sorted(_manifest.identifiers("metrics")) == ["offline_0", "offline_1", "offline_2"]
+    assert _manifest.identifiers("heartbeat", kind="heartbeat") == ["offline_run"]
+    assert _manifest.count("metrics") == 3
+
+    _manifest.set_state("metrics", "offline_1", "failed")
+    assert sorted(_manifest.identifiers("metrics", state="pending")) == ["offline_0", "offline_2"]
+    assert _manifest.identifiers("metrics", state="failed") == ["offline_1"]
+
+    _manifest.remove("metrics", "offline_0")
+    assert _manifest.count("metrics", kind="json") == 2
+
+
+@pytest.mark.local
+def test_manifest_segments_and_rebuild(tmp_path: pathlib.Path) -> None:
+    _manifest = CacheManifest.open(tmp_path)
+    _writer = SegmentWriter(
+        directory=tmp_path,
+        run="offline_run",
+        object_type="events",
+        max_segment_size=256,
+        manifest=_manifest,
+    )
+    for i in range(20):
+        _writer.append({"events": [{"message": f"event {i}"}]})
+    _writer.close()
+
+    (_segments,) = _manifest.segments("events").values()
+    assert len(_segments) > 1
+    assert _segments == sorted(tmp_path.joinpath("events").glob("*.seg"))
+
+    # Files written without updating the manifest are found on rebuild
+    tmp_path.joinpath("runs").mkdir()
+    tmp_path.joinpath("runs", "offline_run.json").write_text("{}")
+    tmp_path.joinpath("runs", "offline_run.heartbeat").touch()
+    assert not _manifest.count("runs")
+    _manifest.rebuild()
+    assert _manifest.identifiers("runs") == ["offline_run"]
+    assert _manifest.identifiers("heartbeat", kind="heartbeat") == ["offline_run"]
+    assert _manifest.segments("events") == {"offline_run": _segments}
+
+    # A manifest created for an existing cache is built from its contents
+    _manifest.path.unlink()
+    assert CacheManifest.open(tmp_path).count("events", kind="segment") == len(_segments)
+
+
+@pytest.mark.local
+def test_id_mapping(tmp_path: pathlib.Path) -> None:
+    _manifest = CacheManifest.open(tmp_path)
+    _id_mapping = IdMapping(_manifest)
+    _id_mapping["offline_run"] = "run_id"
+    _id_mapping.update({f"offline_alert_{i}": f"alert_id_{i}" for i in range(3)})
+    _id_mapping["offline_run"] = "new_run_id"
+
+    # Mappings are shared between sessions
+    _other = IdMapping(_manifest)
+    assert _other["offline_run"] == "new_run_id"
+    assert _other.get("offline_folder") is None
+    assert len(_other) == 4
+
+    # Forgotten identifiers remain available until the store is purged
+    _id_mapping.forget(["offline_run", "offline_alert_0"])
+    assert sorted(IdMapping(_manifest)) == ["offline_alert_1", "offline_alert_2"]
+    assert IdMapping(_manifest)["offline_alert_0"] == "alert_id_0"
+    _id_mapping.purge()
+    assert _id_mapping["offline_run"] == "new_run_id"
+    assert "offline_run" not in IdMapping(_manifest)
+    assert "offline_alert_0" not in _other
+
+    del _id_mapping["offline_alert_1"]
+    assert "offline_alert_1" not in _id_mapping
+    assert sorted(IdMapping(_manifest)) == ["offline_alert_2"]
+
+
+@pytest.mark.local
+def test_artifact_index(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _manifest = CacheManifest.open(tmp_path)
+    _index = ArtifactIndex(_manifest, "https://simvue.example.com", ttl=60, max_entries=2)
+    _index.add("checksum_0", "mesh.h5", "artifact_0")
+    _index.add("checksum_0", "mesh_copy.h5", "artifact_1")
+
+    # Entries are specific to content, name and server
+    assert _index.get("checksum_0", "mesh.h5") == "artifact_0"
+    assert _index.get("checksum_0", "other.h5") is None
+    assert ArtifactIndex(_manifest, "https://other.example.com").get("checksum_0", "mesh.h5") is None
+
+    # The least recently used entry is evicted beyond the maximum size
+    _index.add("checksum_1", "data.h5", "artifact_2")
+    assert _index.get("checksum_0", "mesh_copy.h5") is None
+    assert _index.get("checksum_0", "mesh.h5") == "artifact_0"
+
+    _index.discard("checksum_0", "mesh.h5")
+    assert _index.get("checksum_0", "mesh.h5") is None
+
+    # Checksums are only returned for unchanged files
+    _file = tmp_path.joinpath("mesh.h5")
+    _file.write_text("mesh")
+    assert _index.file_checksum(_file) is None
+    _index.add_file(_file, "checksum_2")
+    assert _index.file_checksum(_file) == "checksum_2"
+    _file.write_text("changed mesh")
+    assert _index.file_checksum(_file) is None
+
+    # Entries unused within the time to live expire, each use refreshing the entry
+    _now = time.time()
+    _index.add_file(_file, "checksum_3")
+    monkeypatch.setattr(manifest.time, "time", lambda: _now + 40)
+    assert _index.file_checksum(_file) == "checksum_3"
+    monkeypatch.setattr(manifest.time, "time", lambda: _now + 61)
+    assert _index.get("checksum_1", "data.h5") is None
+    assert _index.file_checksum(_file) == "checksum_3"
+
+
+@pytest.mark.local
+def test_id_mapping_migrate(tmp_path: pathlib.Path) -> None:
+    _directory = tmp_path.joinpath("server_ids")
+    _directory.mkdir()
+    for i in range(3):
+        _directory.joinpath(f"offline_run_{i}.txt").write_text(f"run_id_{i}")
+
+    _id_mapping = IdMapping(CacheManifest.open(tmp_path))
+    _id_mapping.migrate(_directory)
+    assert not _directory.exists()
+    assert dict(IdMapping(CacheManifest.open(tmp_path))) == {
+        f"offline_run_{i}": f"run_id_{i}" for i in range(3)
+    }
+
+
+@pytest.mark.local
+def test_manifest_retry(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _manifest = CacheManifest.open(tmp_path)
+    _manifest.add("metrics", "offline_0", run="offline_run")
+    _manifest.add("metrics", "offline_run.000000", run="offline_run", kind="segment")
+    _manifest.add("metrics", "offline_run.000001", run="offline_run", kind="segment")
+    tmp_path.joinpath("metrics").mkdir()
+    tmp_path.joinpath("metrics", "offline_0.json").touch()
+    tmp_path.joinpath("metrics", "offline_run.000000.seg").touch()
+    tmp_path.joinpath("metrics", "offline_run.000001.seg").touch()
+
+    # Delay doubles with each attempt, with jitter, up to the maximum
+    assert all(manifest.RETRY_BASE_DELAY / 2 <= manifest.retry_delay(1) <= manifest.RETRY_BASE_DELAY for _ in range(10))
+    assert manifest.RETRY_BASE_DELAY <= manifest.retry_delay(2) <= 2 * manifest.RETRY_BASE_DELAY
+    assert manifest.retry_delay(100) <= manifest.RETRY_MAX_DELAY
+
+    _now = time.time()
+    assert _manifest.record_failure("metrics", "offline_0") == 1
+    assert _manifest.record_failure("metrics", "offline_0") == 2
+    assert _manifest.record_failure("metrics", "unknown") == 0
+    assert _manifest.identifiers("metrics", retry_before=_now) == []
+    assert _manifest.identifiers("metrics", retry_before=_now + manifest.RETRY_MAX_DELAY) == ["offline_0"]
+
+    # Segments for a run are excluded if any segment is awaiting retry
+    _manifest.record_failure("metrics", "offline_run.000001", kind="segment")
+    assert _manifest.segments("metrics", retry_before=_now) == {}
+    assert len(_manifest.segments("metrics")["offline_run"]) == 2
+
+    # Recording progress clears failed attempts, progress surviving a rebuild
+    _manifest.set_checkpoint("metrics", "offline_run.000001", 100)
+    _manifest.rebuild()
+    assert _manifest.checkpoint("metrics", "offline_run.000001") == 100
+    assert _manifest.checkpoint("metrics", "offline_run.000000") is None
+    assert len(_manifest.segments("metrics", retry_before=_now)["offline_run"]) == 2
+
+    # Objects are only retried when requested after the maximum attempts
+    monkeypatch.setattr(manifest, "retry_delay", lambda attempts: 0)
+    for _ in range(manifest.MAX_UPLOAD_ATTEMPTS - 2):
+        _manifest.record_failure("metrics", "offline_0")
+    assert _manifest.identifiers("metrics", retry_before=time.time() + manifest.RETRY_MAX_DELAY) == []
+    assert _manifest.identifiers("metrics", state="failed") == ["offline_0"]
+
+
+@pytest.mark.local
+@pytest.mark.parametrize("fstype", ("ext4", "nfs4", "lustre"))
+def test_manifest_journal_mode(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch, fstype: str
+) -> None:
+    _partitions = [
+        types.SimpleNamespace(mountpoint="/", fstype="ext4", opts="rw"),
+        types.SimpleNamespace(mountpoint=f"{tmp_path.resolve()}", fstype=fstype, opts="rw"),
+    ]
+    monkeypatch.setattr(manifest.psutil, "disk_partitions", lambda all: _partitions)
+    assert manifest.is_network_filesystem(tmp_path.joinpath("cache")) == (fstype != "ext4")
+
+    # The write-ahead log is only used where the cache is on a local disk
+    _manifest = CacheManifest(tmp_path)
+    ((_journal_mode,),) = _manifest._execute("PRAGMA journal_mode")
+    assert _journal_mode == ("wal" if fstype == "ext4" else "delete")
@@ -0,0 +1,137 @@
+import pathlib
+import pytest
+import tempfile
+
+from simvue.cache import SegmentReader, SegmentWriter, segment_files
+
+
+@pytest.mark.local
+@pytest.mark.parametrize("fsync", ("never", "close", "always"))
+def test_segment_write_and_read(fsync: str) -> None:
+    with tempfile.TemporaryDirectory() as temp_d:
+        _writer = SegmentWriter(
+            directory=pathlib.Path(temp_d),
+            run="offline_run",
+            object_type="metrics",
+            max_segment_size=1024,
+            fsync=fsync,
+        )
+        for i in range(100):
+            _writer.append({"metrics": [{"step": i, "values": {"x": float(i)}}]})
+
+        # Records are readable before the segment is sealed
+        (*_, _current) = segment_files(pathlib.Path(temp_d), "metrics")["offline_run"]
+        _reader = SegmentReader(_current)
+        assert list(_reader.records())
+        assert not _reader.sealed
+
+        _writer.close()
+
+        _segments = segment_files(pathlib.Path(temp_d), "metrics")["offline_run"]
+        assert len(_segments) > 1
+        assert all(segment.stat().st_size <= 1024 + 64 for segment in _segments)
+
+        _steps: list[int] = []
+        for segment in _segments:
+            _reader = SegmentReader(segment)
+            assert _reader.run == "offline_run"
+            assert _reader.object_type == "metrics"
+            _steps += [record["metrics"][0]["step"] for record, _ in _reader.records()]
+            assert _reader.sealed
+        assert _steps == list(range(100))
+
+        # A new writer for the same run continues from the next segment
+        _writer = SegmentWriter(
+            directory=pathlib.Path(temp_d),
+            run="offline_run",
+            object_type="metrics",
+            max_segment_size=1024,
+        )
+        _writer.append({"metrics": []})
+        _writer.close()
+        assert len(segment_files(pathlib.Path(temp_d), "metrics")["offline_run"]) == len(_segments) + 1
+
+
+@pytest.mark.local
+def test_segment_resume_and_torn_record() -> None:
+    with tempfile.TemporaryDirectory() as temp_d:
+        _writer = SegmentWriter(
+            directory=pathlib.Path(temp_d),
+            run="offline_run",
+            object_type="events",
+            max_segment_size=2**20,
+        )
+        for i in range(10):
+            _writer.append({"events": [{"message": f"event {i}"}]})
+
+        _reader = SegmentReader(_writer.path)
+        _records = list(_reader.records())
+        _, _offset = _records[4]
+        assert [record["events"][0]["message"] for record, _ in _reader.records(_offset)] == [
+            f"event {i}" for i in range(5, 10)
+        ]
+
+        # Partially written record at the end is not returned
+        with _writer.path.open("ab") as out_f:
+            out_f.write(b"\x10\x00\x00\x00\x00")
+        assert len(list(SegmentReader(_writer.path).records())) == 10
+
+        # Corrupted record ends the readable segment
+        _path = _writer.path
+        _data = bytearray(_path.read_bytes())
+        _data[_offset - 1] ^= 0xFF
+        _path.write_bytes(_data)
+        assert len(list(SegmentReader(_path).records())) == 4
+
+
+@pytest.mark.local
+def test_segment_invalid_file() -> None:
+    with tempfile.TemporaryDirectory() as temp_d:
+        _path = pathlib.Path(temp_d).joinpath("metrics", "offline_run.000000.seg")
+        _path.parent.mkdir()
+        _path.write_bytes(b"{}")
+        with pytest.raises(ValueError):
+            SegmentReader(_path)
+
+
+@pytest.mark.local
+@pytest.mark.parametrize("codec", ("gzip", "zstd"))
+def test_segment_compression(codec: str) -> None:
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    _records = [
+        {"metrics": [{"step": i, "values": {"x": float(j)}} for j in range(100)]}
+        for i in range(10)
+    ]
+    _segments: dict[str, pathlib.Path] = {}
+    with tempfile.TemporaryDirectory() as temp_d:
+        for run, run_codec in (("offline_run_a", "none"), ("offline_run_b", codec)):
+            _writer = SegmentWriter(
+                directory=pathlib.Path(temp_d),
+                run=run,
+                object_type="metrics",
+                max_segment_size=2**20,
+                codec=run_codec,
+            )
+            for record in _records:
+                _writer.append(record)
+            _writer.close()
+            (_segments[run_codec],) = segment_files(pathlib.Path(temp_d), "metrics")[run]
+
+        assert _segments[codec].stat().st_size < _segments["none"].stat().st_size / 2
+        assert [record for record, _ in SegmentReader(_segments[codec]).records()] == _records
+
+
+@pytest.mark.local
+def test_segment_unsupported_codec() -> None:
+    with tempfile.TemporaryDirectory() as temp_d:
+        _writer = SegmentWriter(
+            directory=pathlib.Path(temp_d),
+            run="offline_run",
+            object_type="events",
+            max_segment_size=2**20,
+        )
+        _writer._codec = "unknown"
+        _writer.append({"events": []})
+        with pytest.raises(ValueError, match="Unsupported segment codec"):
+            SegmentReader(_writer.path)
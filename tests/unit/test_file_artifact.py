@@ -6,7 +6,10 @@ import time
 import pathlib
 import tempfile
 import json
+import io
+import requests
 from simvue.api.objects import FileArtifact, Run, Artifact
+from simvue.api.objects.artifact.base import _FormDataStream
 from simvue.api.objects.folder import Folder
 from simvue.sender import Sender
 
@@ -220,3 +223,22 @@ def test_download_duplicate_artifact(force_overwrite: bool) -> None:
             )
     _run.delete()
     _folder.delete()
+
+
+@pytest.mark.local
+def test_file_artifact_form_data_stream() -> None:
+    _file = io.BytesIO(b"Hello World!" * 100000)
+    _file.name = "/tmp/output.txt"
+    _fields = {"key": "artifacts/output.txt", "policy": "policy"}
+    _body = _FormDataStream(_fields, "file", _file)
+
+    # Body is identical to that constructed by requests and may be resent
+    _expected = requests.Request(
+        "POST", "http://localhost", data=_fields, files={"file": _file}
+    ).prepare()
+    assert b"".join(_body) == _expected.body.replace(
+        _expected.headers["Content-Type"].split("boundary=")[1].encode(),
+        _body.boundary.encode()
+    )
+    assert b"".join(_body) == b"".join(_body)
+    assert len(_body) == len(_expected.body)
@@ -0,0 +1,77 @@
+import pathlib
+import pytest
+import time
+import uuid
+
+import numpy
+
+from simvue.api.objects import Events, Folder, Metrics, Run
+from simvue.api.objects.sink import RunDataSink
+from simvue.cache import SegmentReader, segment_files
+from simvue.dispatch.columnar import ColumnarMetricQueue
+from simvue.models import simvue_timestamp
+
+
+@pytest.mark.api
+@pytest.mark.online
+def test_run_data_sink_online() -> None:
+    _uuid: str = f"{uuid.uuid4()}".split("-")[0]
+    _folder_name = f"/simvue_unit_testing/{_uuid}"
+    _folder = Folder.new(path=_folder_name)
+    _run = Run.new(folder=_folder_name)
+    _folder.commit()
+    _run.commit()
+    _sink = RunDataSink(run=_run.id)
+
+    for flush in range(2):
+        _queue = ColumnarMetricQueue()
+        for step in range(5 * flush, 5 * (flush + 1)):
+            _queue.append({"x": step}, step=step, time=step, timestamp=time.time())
+        _sink.metrics(_queue.drain())
+        _sink.events(
+            [{"message": f"flush {flush}", "timestamp": simvue_timestamp(), "log_level": "info"}]
+        )
+
+    _data = next(Metrics.get(metrics=["x"], runs=[_run.id], xaxis="step"))
+    assert [entry.get("value") for entry in _data.get(_run.id).get("x")] == list(range(10))
+    assert [event.message for event in Events.get(run_id=_run.id)] == ["flush 0", "flush 1"]
+    _run.delete()
+    _folder.delete(recursive=True, delete_runs=True, runs_only=False)
+
+
+@pytest.mark.api
+@pytest.mark.offline
+def test_run_data_sink_offline(offline_cache_setup) -> None:
+    _sink = RunDataSink(run="offline_run", offline=True)
+    _queue = ColumnarMetricQueue()
+    _queue.append({"x": 1, "y": 2.0}, step=1, time=1, timestamp=time.time())
+    _sink.metrics(_queue.drain())
+    _sink.events(
+        [{"message": "event", "timestamp": simvue_timestamp(), "log_level": "info"}]
+    )
+    _sink.grid_metrics(
+        [
+            {
+                "array": numpy.ones((2, 2)),
+                "time": 1,
+                "timestamp": simvue_timestamp(),
+                "step": 1,
+                "grid": "offline_grid",
+                "metric": "z",
+            }
+        ]
+    )
+    _sink.close()
+    _cache = pathlib.Path(offline_cache_setup.name)
+
+    for object_type, key in (
+        ("metrics", "metrics"),
+        ("events", "events"),
+        ("grid_metrics", "data"),
+    ):
+        (_segment,) = segment_files(_cache, object_type)["offline_run"]
+        _reader = SegmentReader(_segment)
+        (_record,) = [record for record, _ in _reader.records()]
+        assert _reader.sealed
+        assert len(_record[key]) == 1
+    assert not list(_cache.glob("*/*.json"))
@@ -4,11 +4,18 @@ import time
 import datetime
 import uuid
 from simvue.sender import Sender
+from simvue.sender.actions import MetricsUploadAction
+from simvue.sender.watch import InotifyCacheWatcher, PollingCacheWatcher
 from simvue.api.objects import Run, Metrics, Folder
+from simvue.api.objects.sink import RunDataSink
+from simvue.cache import CacheManifest, IdMapping, segment_files
+from simvue.dispatch.columnar import ColumnarMetricQueue
 from simvue.models import DATETIME_FORMAT
 import logging
 import pathlib
 import requests
+import sys
+import threading
 
 @pytest.mark.parametrize("throw_exceptions", (True, False))
 @pytest.mark.parametrize("retry_failed_uploads", (True, False))
@@ -66,8 +73,9 @@ def test_sender_exception_handling(offline_cache_setup, caplog, throw_exceptions
             _metric = json.load(_file)
             assert _metric.get("upload_failed") == True
 
+@pytest.mark.parametrize("processes", (1, 2), ids=("single_process", "multi_process"))
 @pytest.mark.parametrize("parallel", (True, False))
-def test_sender_server_ids(offline_cache_setup, caplog, parallel):
+def test_sender_server_ids(offline_cache_setup, caplog, parallel, processes):
     # Create an offline run
     _uuid: str = f"{uuid.uuid4()}".split("-")[0]
     _path = f"/simvue_unit_testing/objects/folder/{_uuid}"
@@ -100,19 +108,19 @@ def test_sender_server_ids(offline_cache_setup, caplog, parallel):
     
     # Send both items
     with caplog.at_level(logging.ERROR):
-        _sender = Sender(threading_threshold=1 if parallel else 10)
+        _sender = Sender(threading_threshold=1 if parallel else 10, processes=processes)
         _sender.upload()
     
     assert not caplog.text
     
     # Check server ID mapping correctly created
     _online_runs = []
+    _id_mapping = IdMapping(CacheManifest.open(pathlib.Path(offline_cache_setup.name)))
     for i, _offline_run_id in enumerate(_offline_run_ids):
-        _id_file = pathlib.Path(offline_cache_setup.name).joinpath("server_ids", f"{_offline_run_id}.txt")
-        assert _id_file.exists()
-        _online_id = _id_file.read_text()
+        assert _offline_run_id in _id_mapping
+        _online_id = _id_mapping[_offline_run_id]
     
-        # Check correct ID is contained within file
+        # Check correct ID is contained within store
         _online_run = Run(identifier=_online_id)
         _online_runs.append(_online_run)
         assert _online_run.name == f"test_sender_server_ids-{_uuid}-{i}"
@@ -138,9 +146,9 @@ def test_sender_server_ids(offline_cache_setup, caplog, parallel):
         )
         _metrics.commit()
     
-    # Run sender again, check online ID is correctly loaded from file and substituted for offline ID
+    # Run sender again, check online ID is correctly loaded from store and substituted for offline ID
     with caplog.at_level(logging.ERROR):
-        _sender = Sender(threading_threshold=1 if parallel else 10)
+        _sender = Sender(threading_threshold=1 if parallel else 10, processes=processes)
         _sender.upload()
     
     assert not caplog.text
@@ -192,3 +200,273 @@ def test_send_heartbeat(offline_cache_setup, parallel, mocker):
     # Get online runs and check all running
     [_online_run.refresh() for _online_run in _online_runs]
     assert all([_online_run.status == "running" for _online_run in _online_runs])
+
+
+@pytest.mark.parametrize("parallel", (True, False))
+@pytest.mark.offline
+def test_sender_segments(offline_cache_setup, mocker, parallel):
+    _posted: list[dict] = []
+    mocker.patch.object(
+        Metrics,
+        "_post_single",
+        autospec=True,
+        side_effect=lambda self, **kwargs: _posted.append(kwargs) or {},
+    )
+    _sink = RunDataSink(run="offline_run", offline=True)
+    _queue = ColumnarMetricQueue()
+
+    def _log_steps(steps: range) -> None:
+        for step in steps:
+            _queue.append({"x": step}, step=step, time=step, timestamp=time.time())
+            _sink.metrics(_queue.drain())
+
+    _log_steps(range(3))
+    Sender(threading_threshold=1 if parallel else 10).upload(["metrics"])
+    # Records are combined into a single request
+    assert len(_posted) == 1
+    assert [metric["step"] for metric in _posted[0]["metrics"]] == [0, 1, 2]
+
+    # Segment is kept until sealed, upload resuming from the last record
+    (_segment,) = segment_files(pathlib.Path(offline_cache_setup.name), "metrics")["offline_run"]
+    assert CacheManifest.open(pathlib.Path(offline_cache_setup.name)).checkpoint("metrics", _segment.stem)
+
+    _log_steps(range(3, 5))
+    _sink.close()
+    Sender(threading_threshold=1 if parallel else 10).upload(["metrics"])
+    assert len(_posted) == 2
+    assert [metric["step"] for posted in _posted for metric in posted["metrics"]] == list(range(5))
+    assert all(posted["run"] == "offline_run" for posted in _posted)
+    assert not list(pathlib.Path(offline_cache_setup.name).joinpath("metrics").iterdir())
+
+
+@pytest.mark.local
+@pytest.mark.parametrize("watcher_type", ("inotify", "polling"))
+def test_cache_watcher(watcher_type, tmp_path):
+    if watcher_type == "inotify" and not sys.platform.startswith("linux"):
+        pytest.skip("inotify is only available on Linux")
+    _watcher = (InotifyCacheWatcher if watcher_type == "inotify" else PollingCacheWatcher)(tmp_path)
+    if watcher_type == "polling":
+        assert _watcher.changed(timeout=0)
+        return
+    assert not _watcher.changed(timeout=0.1)
+    # Files written by the sender itself are ignored
+    tmp_path.joinpath("metrics").mkdir()
+    assert _watcher.changed(timeout=0.1)
+    tmp_path.joinpath("metrics", "run.000000.offset").write_text("10")
+    tmp_path.joinpath("manifest.db-wal").write_bytes(b"")
+    assert not _watcher.changed(timeout=0.1)
+    # New object directories are watched
+    tmp_path.joinpath("metrics", "run.000000.seg").write_bytes(b"")
+    assert _watcher.changed(timeout=0.1)
+    _watcher.close()
+
+
+@pytest.mark.offline
+def test_sender_follow(offline_cache_setup, mocker):
+    _posted: list[dict] = []
+    mocker.patch.object(
+        Metrics,
+        "_post_single",
+        autospec=True,
+        side_effect=lambda self, **kwargs: _posted.append(kwargs) or {},
+    )
+    _stop_event = threading.Event()
+    _sender = Sender()
+    _thread = threading.Thread(
+        target=_sender.follow,
+        args=(["metrics"],),
+        kwargs={"interval": 0.1, "stop_event": _stop_event},
+    )
+    _thread.start()
+
+    try:
+        _sink = RunDataSink(run="offline_run", offline=True)
+        _queue = ColumnarMetricQueue()
+
+        for step in range(5):
+            _queue.append({"x": step}, step=step, time=step, timestamp=time.time())
+            _sink.metrics(_queue.drain())
+            _start = time.monotonic()
+            while len(_posted) <= step and time.monotonic() - _start < 5:
+                time.sleep(0.01)
+            # Each record is uploaded while the run is still writing
+            assert len(_posted) == step + 1
+
+        with pytest.raises(RuntimeError):
+            Sender().upload()
+        _sink.close()
+    finally:
+        _stop_event.set()
+        _thread.join()
+
+    assert [posted["metrics"][0]["step"] for posted in _posted] == list(range(5))
+    assert not _sender.locked
+
+
+@pytest.mark.parametrize("parallel", (True, False))
+@pytest.mark.offline
+def test_sender_batches(offline_cache_setup, mocker, monkeypatch, parallel):
+    _posted: list[dict] = []
+    mocker.patch.object(
+        Metrics,
+        "_post_single",
+        autospec=True,
+        side_effect=lambda self, **kwargs: _posted.append(kwargs) or {},
+    )
+    monkeypatch.setattr(MetricsUploadAction, "max_batch_entries", 4)
+
+    for run in ("offline_run_a", "offline_run_b"):
+        for step in range(10):
+            Metrics.new(
+                run=run,
+                metrics=[
+                    {
+                        "timestamp": datetime.datetime.now().strftime(DATETIME_FORMAT),
+                        "time": step,
+                        "step": step,
+                        "values": {"x": step},
+                    }
+                ],
+                offline=True,
+            ).commit()
+
+    _sink = RunDataSink(run="offline_run_c", offline=True)
+    _queue = ColumnarMetricQueue()
+    for step in range(10):
+        _queue.append({"x": step}, step=step, time=step, timestamp=time.time())
+        _sink.metrics(_queue.drain())
+    _sink.close()
+
+    Sender(threading_threshold=1 if parallel else 100).upload(["metrics"])
+
+    # Each run is sent as batches of at most four metric sets
+    for run in ("offline_run_a", "offline_run_b", "offline_run_c"):
+        _run_posts = [posted["metrics"] for posted in _posted if posted["run"] == run]
+        assert sorted(len(metrics) for metrics in _run_posts) == [2, 4, 4]
+        assert sorted(metric["step"] for metrics in _run_posts for metric in metrics) == list(range(10))
+    assert not list(pathlib.Path(offline_cache_setup.name).joinpath("metrics").iterdir())
+
+
+@pytest.mark.offline
+def test_sender_batch_requests(offline_cache_setup, mocker, monkeypatch):
+    _posted: list[dict] = []
+    mocker.patch.object(
+        Metrics,
+        "_post_single",
+        autospec=True,
+        side_effect=lambda self, **kwargs: _posted.append(kwargs) or {},
+    )
+    monkeypatch.setattr(MetricsUploadAction, "max_batch_entries", 4)
+    _cache_directory = pathlib.Path(offline_cache_setup.name)
+
+    for i in range(3):
+        Metrics.new(
+            run="offline_run",
+            metrics=[
+                {
+                    "timestamp": datetime.datetime.now().strftime(DATETIME_FORMAT),
+                    "time": 3 * i + step,
+                    "step": 3 * i + step,
+                    "values": {"x": step},
+                }
+                for step in range(3)
+            ],
+            offline=True,
+        ).commit()
+
+    # Batches hold only the identifiers of files, read when uploaded
+    ((_run, _batch),) = MetricsUploadAction._file_batches(_cache_directory, retry_failed=False)
+    assert _run == "offline_run"
+    assert sorted(_batch) == sorted(file.stem for file in _cache_directory.joinpath("metrics").glob("*.json"))
+
+    Sender().upload(["metrics"])
+
+    # Files are not split between requests, so each is sent separately
+    assert [len(posted["metrics"]) for posted in _posted] == [3, 3, 3]
+    assert sorted(metric["step"] for posted in _posted for metric in posted["metrics"]) == list(range(9))
+    assert not list(_cache_directory.joinpath("metrics").iterdir())
+
+
+@pytest.mark.offline
+def test_sender_manifest(offline_cache_setup, mocker):
+    _posted: list[dict] = []
+    mocker.patch.object(
+        Metrics,
+        "_post_single",
+        autospec=True,
+        side_effect=lambda self, **kwargs: _posted.append(kwargs) or {},
+    )
+    _metrics = Metrics.new(
+        run="offline_run",
+        metrics=[
+            {
+                "timestamp": datetime.datetime.now().strftime(DATETIME_FORMAT),
+                "time": 0,
+                "step": 0,
+                "values": {"x": 0},
+            }
+        ],
+        offline=True,
+    )
+    _metrics.commit()
+
+    # Files written without updating the manifest are not found by the sender
+    _unregistered = _metrics._local_staging_file.with_stem(f"offline_{uuid.uuid1()}")
+    _unregistered.write_text(_metrics._local_staging_file.read_text())
+    assert MetricsUploadAction.count(pathlib.Path(offline_cache_setup.name)) == 1
+
+    Sender().upload(["metrics"])
+    assert len(_posted) == 1
+    assert _unregistered.exists()
+
+    Sender(rebuild_manifest=True).upload(["metrics"])
+    assert len(_posted) == 2
+    assert not list(pathlib.Path(offline_cache_setup.name).joinpath("metrics").iterdir())
+    assert MetricsUploadAction.count(pathlib.Path(offline_cache_setup.name)) == 0
+
+
+@pytest.mark.offline
+def test_sender_retry(offline_cache_setup, mocker):
+    _posted: list[dict] = []
+    _available = threading.Event()
+
+    def _post(self, **kwargs) -> dict:
+        if not _available.is_set():
+            raise ValueError("Server unavailable")
+        _posted.append(kwargs)
+        return {}
+
+    mocker.patch.object(Metrics, "_post_single", autospec=True, side_effect=_post)
+    _cache = pathlib.Path(offline_cache_setup.name)
+    _manifest = CacheManifest.open(_cache)
+
+    Metrics.new(
+        run="offline_run",
+        metrics=[
+            {
+                "timestamp": datetime.datetime.now().strftime(DATETIME_FORMAT),
+                "time": 0,
+                "step": 0,
+                "values": {"x": 0},
+            }
+        ],
+        offline=True,
+    ).commit()
+    _sink = RunDataSink(run="offline_run", offline=True)
+    _queue = ColumnarMetricQueue()
+    _queue.append({"x": 1}, step=1, time=1, timestamp=time.time())
+    _sink.metrics(_queue.drain())
+    _sink.close()
+
+    Sender().upload(["metrics"])
+    assert len(_manifest.identifiers("metrics", state="failed")) == 1
+    assert len(_manifest.identifiers("metrics", kind="segment", state="failed")) == 1
+
+    # Failed uploads are not retried until due
+    _available.set()
+    Sender().upload(["metrics"])
+    assert not _posted
+
+    Sender(retry_failed_uploads=True).upload(["metrics"])
+    assert sorted(metric["step"] for posted in _posted for metric in posted["metrics"]) == [0, 1]
+    assert MetricsUploadAction.count(_cache) == 0
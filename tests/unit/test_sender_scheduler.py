@@ -0,0 +1,142 @@
+import functools
+import json
+import pathlib
+import threading
+import time
+import pytest
+
+from simvue.cache import CacheManifest
+from simvue.sender.actions import UPLOAD_ACTION_ORDER, MetricsUploadAction, RunUploadAction, UploadAction, UploadTask
+from simvue.sender.scheduler import UploadScheduler, upload_phases
+
+
+def _actions(record: list[tuple[str, str, str]], lock: threading.Lock, fail: str | None = None) -> list[type[UploadAction]]:
+    def _upload(object_type: str, identifier: str) -> None:
+        if object_type == fail:
+            raise ValueError(f"Failed to upload {object_type}")
+        with lock:
+            record.append(("start", object_type, identifier))
+        # Creation of the second run is slow
+        time.sleep(0.2 if identifier == "run_b" and object_type == "runs" else 0.01)
+        with lock:
+            record.append(("end", object_type, identifier))
+
+    def _action(object_type: str, runs: list[str], **attributes) -> type[UploadAction]:
+        def _tasks(cls, **_) -> list[UploadTask]:
+            return [
+                UploadTask(object_type, run, run, functools.partial(_upload, object_type, run))
+                for run in runs
+            ]
+        return type(
+            f"{object_type}Action",
+            (UploadAction,),
+            {"object_type": object_type, "tasks": classmethod(_tasks)} | attributes,
+        )
+
+    return [
+        _action("folders", ["folder"]),
+        _action("runs", ["run_a", "run_b"], dependencies=("folders",)),
+        _action("artifacts", ["run_a"], dependencies=("runs",)),
+        _action("metrics", ["run_a", "run_b", "run_c"], dependencies=("runs",), run_scoped=True),
+    ]
+
+
+@pytest.mark.local
+@pytest.mark.parametrize("parallel", (True, False), ids=("parallel", "serial"))
+def test_upload_scheduler(parallel: bool) -> None:
+    _record: list[tuple[str, str, str]] = []
+    UploadScheduler(
+        _actions(_record, threading.Lock()),
+        max_workers=4,
+        threading_threshold=1 if parallel else 100,
+    ).upload(id_mapping={}, cache_directory=None, thread_lock=threading.Lock(), simvue_monitor_run=None)
+
+    assert len(_record) == 14
+    _position = {(event, object_type, identifier): i for i, (event, object_type, identifier) in enumerate(_record)}
+
+    assert _position[("end", "folders", "folder")] < _position[("start", "runs", "run_a")]
+    # Metrics wait only for their own run, artifacts for all runs
+    for run in ("run_a", "run_b"):
+        assert _position[("end", "runs", run)] < _position[("start", "metrics", run)]
+    assert _position[("end", "runs", "run_b")] < _position[("start", "artifacts", "run_a")]
+
+    if parallel:
+        # Metrics for run which is not pending and for the first run are
+        # uploaded whilst the second run is created
+        assert _position[("end", "metrics", "run_c")] < _position[("end", "runs", "run_b")]
+        assert _position[("end", "metrics", "run_a")] < _position[("end", "runs", "run_b")]
+
+
+@pytest.mark.local
+@pytest.mark.parametrize("parallel", (True, False), ids=("parallel", "serial"))
+def test_upload_scheduler_exception(parallel: bool) -> None:
+    _record: list[tuple[str, str, str]] = []
+    with pytest.raises(ValueError, match="Failed to upload runs"):
+        UploadScheduler(
+            _actions(_record, threading.Lock(), fail="runs"),
+            max_workers=4,
+            threading_threshold=1 if parallel else 100,
+        ).upload(id_mapping={}, cache_directory=None, thread_lock=threading.Lock(), simvue_monitor_run=None)
+    assert not any(object_type in ("artifacts", "metrics") and identifier != "run_c" for _, object_type, identifier in _record)
+
+
+
+@pytest.mark.local
+@pytest.mark.parametrize("parallel", (True, False), ids=("parallel", "serial"))
+def test_upload_scheduler_lazy(parallel: bool) -> None:
+    _record: list[tuple[str, str]] = []
+
+    def _tasks(cls, **_):
+        for i in range(20):
+            _record.append(("generated", f"event_{i}"))
+            yield UploadTask("events", None, f"event_{i}", functools.partial(_record.append, ("uploaded", f"event_{i}")))
+
+    _action = type("EventsAction", (UploadAction,), {"object_type": "events", "tasks": classmethod(_tasks)})
+    UploadScheduler(
+        [_action], max_workers=2, threading_threshold=1 if parallel else 100
+    ).upload(id_mapping={}, cache_directory=None, thread_lock=threading.Lock(), simvue_monitor_run=None)
+
+    assert len(_record) == 40
+    # Uploads start before all of the uploads have been generated
+    assert _record.index(("uploaded", "event_0")) < _record.index(("generated", "event_19"))
+
+
+@pytest.mark.local
+def test_upload_phases() -> None:
+    _phases = [
+        (sharded, [action.object_type for action in actions])
+        for sharded, actions in upload_phases(UPLOAD_ACTION_ORDER)
+    ]
+    assert _phases == [
+        (False, ["tenants", "users", "storage", "folders", "tags", "alerts", "co2_intensity"]),
+        (True, ["runs", "metrics", "events", "heartbeat"]),
+        (False, ["grids", "artifacts"]),
+        (True, ["grid_metrics"]),
+    ]
+
+
+@pytest.mark.local
+def test_upload_tasks_run_filter(tmp_path: pathlib.Path) -> None:
+    _manifest = CacheManifest.open(tmp_path)
+    tmp_path.joinpath("runs").mkdir()
+    tmp_path.joinpath("metrics").mkdir()
+    for run in ("run_a", "run_b"):
+        tmp_path.joinpath("runs", f"{run}.json").write_text(json.dumps({"obj_type": "Run"}))
+        _manifest.add("runs", run)
+        tmp_path.joinpath("metrics", f"metrics_{run}.json").write_text(
+            json.dumps({"obj_type": "Metrics", "run": run, "metrics": []})
+        )
+        _manifest.add("metrics", f"metrics_{run}", run=run)
+    # Run of files not known to the manifest is read from the file
+    _manifest.remove("metrics", "metrics_run_b")
+    _manifest.add("metrics", "metrics_run_b")
+
+    for action in (RunUploadAction, MetricsUploadAction):
+        _tasks = action.tasks(
+            id_mapping={},
+            cache_directory=tmp_path,
+            thread_lock=threading.Lock(),
+            simvue_monitor_run=None,
+            run_filter=lambda run: run == "run_b",
+        )
+        assert [task.run for task in _tasks] == ["run_b"]
@@ -0,0 +1,97 @@
+import http.server
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from simvue.api.request import SessionPool
+
+
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        _body = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", f"{len(_body)}")
+        self.end_headers()
+        self.wfile.write(_body)
+
+    def do_POST(self) -> None:
+        _received = self.rfile.read(int(self.headers["Content-Length"]))
+        _body = f'{{"received": {len(_received)}}}'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", f"{len(_body)}")
+        self.end_headers()
+        self.wfile.write(_body)
+
+    def log_message(self, *_, **__) -> None:
+        pass
+
+
+@pytest.fixture
+def local_server() -> str:
+    _server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    _thread = threading.Thread(target=_server.serve_forever, daemon=True)
+    _thread.start()
+    yield f"http://127.0.0.1:{_server.server_port}"
+    _server.shutdown()
+    _server.server_close()
+
+
+@pytest.mark.local
+def test_session_pool_reuses_connections(local_server: str) -> None:
+    _pool = SessionPool(pool_size=2)
+
+    for _ in range(10):
+        assert _pool.session(local_server).get(f"{local_server}/api/version").json() == {"status": "ok"}
+
+    _stats = _pool.stats()[f"{local_server}/"]
+    assert _stats == {"connections": 1, "requests": 10, "reused": 9}
+    _pool.close()
+    assert not _pool.stats()
+
+
+@pytest.mark.local
+def test_session_pool_shared_between_threads(local_server: str) -> None:
+    _pool = SessionPool(pool_size=4)
+
+    def _request(_) -> int:
+        return _pool.session(local_server).get(f"{local_server}/api/version").status_code
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert set(executor.map(_request, range(100))) == {200}
+
+    _stats = _pool.stats()[f"{local_server}/"]
+    assert _stats["requests"] == 100
+    assert _stats["connections"] <= 4
+    _pool.close()
+
+
+@pytest.mark.local
+def test_session_pool_rate_limit(local_server: str) -> None:
+    _pool = SessionPool(pool_size=4)
+    _pool.rate_limiter.configure(bytes_per_second=200_000, requests_per_second=20)
+
+    def _request(size: int) -> int:
+        return _pool.session(local_server).post(
+            f"{local_server}/api/upload", data=b"x" * size
+        ).json()["received"]
+
+    _start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(_request, [100_000] * 4)) == [100_000] * 4
+    # One second of tokens are available immediately
+    assert time.perf_counter() - _start >= 0.9
+
+    _start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert set(executor.map(_request, [0] * 50)) == {0}
+    assert time.perf_counter() - _start >= 1.4
+
+    assert _pool.rate_limiter.stats()["bytes"] == 400_000
+    assert _pool.rate_limiter.stats()["requests"] == 54
+    _pool.close()